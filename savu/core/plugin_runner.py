@@ -23,6 +23,7 @@ import logging
 
 import savu.core.utils as cu
 import savu.plugins.utils as pu
+from savu.core.setup_cache import SetupCache
 from savu.data.experiment_collection import Experiment
 
 
@@ -108,12 +109,20 @@ class PluginRunner(object):
 
     def _run_plugin_list_check(self, plugin_list):
         """ Run the plugin list through the framework without executing the
-        main processing.
+        main processing.  If the checked plugin list is in the setup cache,
+        it is restored instead.
         """
         plugin_list._check_loaders()
 
         self.__check_gpu()
 
+        cache = SetupCache(self.exp)
+        cache._set_key(plugin_list)
+        if cache._load(plugin_list):
+            self.exp._set_nxs_filename()
+            cu.user_message("Plugin list check loaded from the setup cache.")
+            return
+
         self.__fake_plugin_list_run(plugin_list, setnxs=True)
 
         plugin_list._add_missing_savers(self.exp.index['in_data'].keys())
@@ -126,6 +135,7 @@ class PluginRunner(object):
         self.__fake_plugin_list_run(plugin_list)
 
         self.exp._clear_data_objects()
+        cache._save(plugin_list)
         cu.user_message("Plugin list check complete!")
 
     def __fake_plugin_list_run(self, plugin_list, setnxs=False):
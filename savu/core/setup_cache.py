@@ -0,0 +1,112 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: setup_cache
+   :platform: Unix
+   :synopsis: A cache of the checked plugin list, which allows repeat runs \
+       with the same configuration to skip the plugin list check.
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+"""
+
+import os
+import json
+import hashlib
+import logging
+import cPickle as pickle
+from mpi4py import MPI
+
+from savu.version import __version__
+
+
+class SetupCache(object):
+    """ Stores the state of the plugin list after the plugin list check
+    (the resolved dataset names, the dataset flow with patterns and max
+    frames, the savers and the citation information).  Entries are keyed on
+    the plugin list, the input data file, the processes, the transport and
+    the command line options that change the checked plugin list (--threads
+    sets the max frames of thread-safe plugins and --precision the dataset
+    types).  The cache is only used if a folder is given (--setup_cache).
+    """
+
+    def __init__(self, exp):
+        self.exp = exp
+        self.folder = \
+            exp.meta_data.get_dictionary().get('setup_cache', None)
+        self.filename = None
+
+    def _set_key(self, plugin_list):
+        """ Set the cache file name from the configuration.  This must be
+        called before the plugin list is checked.
+
+        :param PluginList plugin_list: The unchecked plugin list.
+        """
+        if not self.folder:
+            return
+        mData = self.exp.meta_data
+        data_file = os.path.abspath(mData.get('data_file'))
+        stat = os.stat(data_file)
+        options = mData.get_dictionary()
+        key = [__version__, plugin_list.plugin_list, data_file, stat.st_size,
+               stat.st_mtime, mData.get('processes'), mData.get('transport'),
+               int(options.get('threads', 1)),
+               options.get('precision', 'auto')]
+        key = json.dumps(key, sort_keys=True, default=str)
+        self.filename = os.path.join(
+            self.folder, hashlib.sha1(key).hexdigest() + '.pkl')
+
+    def _load(self, plugin_list):
+        """ Restore the checked plugin list from the cache.  The cache file is
+        read by process 0 only and broadcast to the other processes.
+
+        :param PluginList plugin_list: The unchecked plugin list.
+        :returns: True if the plugin list was found in the cache.
+        :rtype: bool
+        """
+        if not self.filename:
+            return False
+        state = None
+        if MPI.COMM_WORLD.rank == 0 and os.path.exists(self.filename):
+            try:
+                with open(self.filename, 'rb') as f:
+                    state = pickle.load(f)
+            except Exception as e:
+                logging.warn("Unable to read the setup cache %s: %s",
+                             self.filename, e)
+        if self.exp.meta_data.get('mpi') is True:
+            state = MPI.COMM_WORLD.bcast(state, root=0)
+        if state is None:
+            return False
+        plugin_list.__dict__.update(state)
+        return True
+
+    def _save(self, plugin_list):
+        """ Add the checked plugin list to the cache.
+
+        :param PluginList plugin_list: The checked plugin list.
+        """
+        if not self.filename or MPI.COMM_WORLD.rank != 0:
+            return
+        try:
+            if not os.path.exists(self.folder):
+                os.makedirs(self.folder)
+            # write to a temporary file first so that a partially written
+            # file is never read
+            temp = '%s.%i' % (self.filename, os.getpid())
+            with open(temp, 'wb') as f:
+                pickle.dump(plugin_list.__dict__, f, pickle.HIGHEST_PROTOCOL)
+            os.rename(temp, self.filename)
+        except Exception as e:
+            logging.warn("Unable to write the setup cache %s: %s",
+                         self.filename, e)
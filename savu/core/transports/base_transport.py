@@ -21,8 +21,15 @@
 .. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
 
 """
+import sys
 import copy
+import Queue
+import logging
+import threading
 import numpy as np
+from mpi4py import MPI
+from multiprocessing.pool import ThreadPool
+
 import savu.core.utils as cu
 
 
@@ -34,6 +41,10 @@ class BaseTransport(object):
 
     def __init__(self):
         self.pDict = None
+        self.pipeline = None
+        self.frame_pool = None
+        self.buffers = {}
+        self.buffers_in_use = []
 
     def _transport_initialise(self, options):
         """
@@ -93,6 +104,7 @@ class BaseTransport(object):
         pDict['nTrans'] = len(pDict['in_sl']['transfer'][0])
         pDict['squeeze'] = self.__set_functions(pDict['in_data'], 'squeeze')
         pDict['expand'] = self.__set_functions(pDict['out_data'], 'expand')
+        pDict['buffer'] = self.__set_functions(pDict['out_data'], 'buffer')
 
         frames = [f for f in pDict['in_sl']['frames']]
         self.__set_global_frame_index(plugin, frames, pDict['nProc'])
@@ -105,43 +117,235 @@ class BaseTransport(object):
         """
         self.process_setup(plugin)
         pDict = self.pDict
-        result = [np.empty(d._get_plugin_data().get_shape_transfer()) for d in
-                  pDict['out_data']]
+        nBuffers = self.__get_n_pipeline_buffers()
+        nThreads = min(plugin._get_n_threads(), pDict['nProc'])
+        if nThreads > 1:
+            self.frame_pool = ThreadPool(nThreads)
+
+        try:
+            if nBuffers and pDict['nTrans'] > 1 and \
+                    self.__pipeline_supported():
+                self.__pipelined_process(plugin, nBuffers)
+            else:
+                self.__serial_process(plugin)
+        finally:
+            if self.frame_pool:
+                self.frame_pool.close()
+                self.frame_pool.join()
+                self.frame_pool = None
+            self.__release_buffers()
+
+        cu.user_message("%s - 100%% complete" % (plugin.name))
+        plugin._revert_preview(pDict['in_data'])
+
+    def __serial_process(self, plugin):
+        """ Read, process and write each block of transfer data in turn. """
+        pDict = self.pDict
+        result = self.__allocate_result()
 
         # loop over the transfer data
         nTrans = pDict['nTrans']
         for count in range(nTrans):
             end = True if count == nTrans-1 else False
-            percent_complete = count/(nTrans * 0.01)
-            cu.user_message("%s - %3i%% complete" %
-                            (plugin.name, percent_complete))
+            self.__report_progress(plugin, count)
             # get the transfer data
             transfer_data = self.__transfer_all_data(count)
-
-            # loop over the process data
-            for i in range(pDict['nProc']):
-                data = self._get_input_data(plugin, transfer_data, i)
-                res = self._get_output_data(
-                        plugin.plugin_process_frames(data), i)
-                for j in pDict['nOut']:
-                    out_sl = pDict['out_sl']['process'][i][j]
-                    result[j][out_sl] = res[j]
-
+            self.__process_transfer_data(plugin, transfer_data, result, count)
             self.__return_all_data(count, result, end)
 
-        cu.user_message("%s - 100%% complete" % (plugin.name))
-        plugin._revert_preview(pDict['in_data'])
+    def __pipelined_process(self, plugin, nBuffers):
+        """ Overlap the file transfers with the processing.
+
+        While transfer block ``count`` is processed, block ``count+1`` is read
+        and block ``count-1`` is written on background threads.  At most
+        nBuffers blocks are queued for reading and writing at any one time.
 
-    def _get_input_data(self, plugin, trans_data, count):
+        :param plugin plugin: The current plugin instance.
+        :param int nBuffers: The number of in-flight transfer buffers.
+        """
+        nTrans = self.pDict['nTrans']
+        self.pipeline = {'read': Queue.Queue(maxsize=nBuffers),
+                         'write': Queue.Queue(maxsize=nBuffers),
+                         'free': Queue.Queue(),
+                         'stop': threading.Event(),
+                         'lock': threading.Lock(),
+                         'errors': []}
+        for i in range(nBuffers):
+            self.pipeline['free'].put(self.__allocate_result())
+
+        threads = [threading.Thread(target=self.__pipeline_reader,
+                                    args=(nTrans,)),
+                   threading.Thread(target=self.__pipeline_writer,
+                                    args=(nTrans,))]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        try:
+            for count in range(nTrans):
+                self.__report_progress(plugin, count)
+                transfer_data = self.__pipeline_get('read')
+                result = self.__pipeline_get('free')
+                self.__process_transfer_data(
+                    plugin, transfer_data, result, count)
+                self.__pipeline_put('write', (count, result))
+        except Exception:
+            self.__pipeline_error()
+        finally:
+            for thread in threads:
+                thread.join()
+
+        errors = self.pipeline['errors']
+        self.pipeline = None
+        if errors:
+            raise errors[0][0], errors[0][1], errors[0][2]
+
+    def __pipeline_reader(self, nTrans):
+        """ Background thread reading the transfer data, in order. """
+        try:
+            for count in range(nTrans):
+                self.__pipeline_put('read', self.__transfer_all_data(count))
+        except Exception:
+            self.__pipeline_error()
+
+    def __pipeline_writer(self, nTrans):
+        """ Background thread writing the results to file, in order.  The
+        excess data (due to padding) is removed from the final block only.
+        """
+        try:
+            for i in range(nTrans):
+                count, result = self.__pipeline_get('write')
+                end = True if count == nTrans-1 else False
+                self.__return_all_data(count, result, end)
+                self.__pipeline_put('free', result)
+        except Exception:
+            self.__pipeline_error()
+
+    def __pipeline_get(self, name):
+        queue = self.pipeline[name]
+        while True:
+            self.__check_pipeline()
+            try:
+                return queue.get(timeout=0.1)
+            except Queue.Empty:
+                pass
+
+    def __pipeline_put(self, name, item):
+        queue = self.pipeline[name]
+        while True:
+            self.__check_pipeline()
+            try:
+                return queue.put(item, timeout=0.1)
+            except Queue.Full:
+                pass
+
+    def __check_pipeline(self):
+        if self.pipeline['stop'].is_set():
+            raise Exception("The transfer pipeline has been stopped.")
+
+    def __pipeline_error(self):
+        """ Record the first error raised in the pipeline and stop all
+        threads. """
+        with self.pipeline['lock']:
+            if not self.pipeline['stop'].is_set():
+                self.pipeline['errors'].append(sys.exc_info())
+                self.pipeline['stop'].set()
+
+    def __pipeline_supported(self):
+        """ The reader and writer threads access the (parallel) hdf5 files
+        concurrently, which requires MPI_THREAD_MULTIPLE in an MPI run. """
+        if self.exp.meta_data.get('mpi') is True and \
+                MPI.Query_thread() < MPI.THREAD_MULTIPLE:
+            logging.warning("MPI_THREAD_MULTIPLE is not available: the "
+                            "transfer pipeline is switched off.")
+            return False
+        return True
+
+    def __get_n_pipeline_buffers(self):
+        """ The number of in-flight transfer buffers (0 if pipelining is
+        switched off). """
+        return int(self.exp.meta_data.get_dictionary().get('pipeline', 0))
+
+    def __allocate_result(self):
+        """ Get a transfer buffer, of the correct type, for each output
+        dataset. """
+        return [self.__get_buffer(d._get_plugin_data().get_shape_transfer(),
+                                  d.dtype) for d in self.pDict['out_data']]
+
+    def __get_buffer(self, shape, dtype):
+        """ Reuse a buffer released by the previous plugin, if one of the
+        same shape and type exists, otherwise allocate a new one. """
+        dtype = np.dtype(dtype if dtype is not None else np.float64)
+        free = self.buffers.get((tuple(shape), dtype), [])
+        buf = free.pop() if free else np.empty(shape, dtype=dtype)
+        self.buffers_in_use.append(buf)
+        return buf
+
+    def __release_buffers(self):
+        """ Keep the buffers used by the current plugin for reuse by the next
+        plugin.  Any buffers that were not reused are freed. """
+        self.buffers = {}
+        for buf in self.buffers_in_use:
+            self.buffers.setdefault((buf.shape, buf.dtype), []).append(buf)
+        self.buffers_in_use = []
+
+    def __report_progress(self, plugin, count):
+        percent_complete = count/(self.pDict['nTrans'] * 0.01)
+        cu.user_message("%s - %3i%% complete" %
+                        (plugin.name, percent_complete))
+
+    def __process_transfer_data(self, plugin, transfer_data, result, count):
+        """ Run process_frames over the count'th block of transfer data,
+        populating the result buffers.  If there is a frame pool, the process
+        data is shared between its threads. """
+        nProc = range(self.pDict['nProc'])
+        process = lambda i: \
+            self.__process_frames(plugin, transfer_data, result, count, i)
+        if self.frame_pool:
+            self.frame_pool.map(process, nProc, chunksize=1)
+        else:
+            for i in nProc:
+                process(i)
+
+    def __process_frames(self, plugin, transfer_data, result, count, i):
+        """ Process the i'th section of the count'th block of transfer data
+        and populate the result buffers.  The sections written are disjoint.
+        Results that were written directly into the output buffers are not
+        copied. """
+        pDict = self.pDict
+        out_sl = pDict['out_sl']['process'][i]
+        buffers = [pDict['buffer'][j](result[j][out_sl[j]])
+                   for j in pDict['nOut']]
+        data = self._get_input_data(plugin, transfer_data, i, count)
+        plugin._set_output_buffers(buffers)
+        res = plugin.plugin_process_frames(data)
+        res_list = res if isinstance(res, list) else [res]
+        filled = [b is not None and r is b for r, b in zip(res_list, buffers)]
+        res = self._get_output_data(res, i)
+        for j in pDict['nOut']:
+            if not filled[j]:
+                result[j][out_sl[j]] = res[j]
+
+    def _get_input_data(self, plugin, trans_data, count, trans=0):
         data = []
         current_sl = []
         for d in self.pDict['nIn']:
-            in_sl = self.pDict['in_sl']['process'][count][d]            
+            in_sl = self.pDict['in_sl']['process'][count][d]
             data.append(self.pDict['squeeze'][d](trans_data[d][in_sl]))
-            current_sl.append(self.pDict['in_sl']['current'][d][count])
+            current_sl.append(self.__get_current_slice(d, trans, count))
         plugin.set_current_slice_list(current_sl)
         return data
 
+    def __get_current_slice(self, d, trans, count):
+        """ Get the slice of the full dataset d processed by the count'th run
+        of process_frames in transfer block trans, using the process global
+        frame index (see __set_global_frame_index).  Frames that only pad the
+        final transfer block to a fixed length are given the final slice.
+        """
+        current = self.pDict['in_sl']['current'][d]
+        frame = self.pDict['in_sl']['frames'][d][trans]*self.pDict['nProc']
+        return current[min(frame + count, len(current) - 1)]
+
     def _get_output_data(self, result, count):
         if result is None:
             return
@@ -172,7 +376,8 @@ class BaseTransport(object):
         """
         str_name = 'self.' + name + '_output'
         function = {'expand': self.__create_expand_function,
-                    'squeeze': self.__create_squeeze_function}
+                    'squeeze': self.__create_squeeze_function,
+                    'buffer': self.__create_buffer_function}
         ddict = {}
         for i in range(len(data_list)):
             ddict[i] = {i: str_name + str(i)}
@@ -218,6 +423,26 @@ class BaseTransport(object):
             squeeze_dims = squeeze_dims[1:]
         return lambda x: np.squeeze(x, axis=squeeze_dims)
 
+    def __create_buffer_function(self, data):
+        """ Create a function that returns a view of a section of the result
+        buffer, with the shape that process_frames is expected to return.
+
+        :param Data data: Dataset
+        :returns: buffer function (returning None if the output is padded)
+        :rtype: lambda
+        """
+        if data._get_plugin_data().padding:
+            return lambda x: None
+        squeeze = self.__create_squeeze_function(data)
+
+        def get_buffer(x):
+            try:
+                return squeeze(x)
+            except ValueError:
+                # the process frames are not a simple section of the buffer
+                return None
+        return get_buffer
+
     def __get_all_slice_lists(self, data_list, dtype):
         """ Get all slice lists for the current process.
 
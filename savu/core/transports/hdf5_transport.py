@@ -25,7 +25,9 @@ import logging
 import os
 
 from savu.plugins.savers.utils.hdf5_utils import Hdf5Utils
+from savu.plugins.savers.utils.memory_utils import MemoryUtils
 from savu.core.transports.base_transport import BaseTransport
+from savu.data.data_structures.data_types.base_type import BaseType
 from savu.core.transport_setup import MPI_setup
 
 
@@ -53,8 +55,9 @@ class Hdf5Transport(BaseTransport):
             plugin_list._remove(idx)
 
     def _transport_pre_plugin_list_run(self):
-        # run through the experiment (no processing) and create output files
+        # run through the experiment (no processing) and set the output files
         self.hdf5 = Hdf5Utils(self.exp)
+        self.memory = self._get_memory_utils()
         self.exp_coll = self.exp._get_experiment_collection()
         self.data_flow = self.exp.meta_data.plugin_list._get_dataset_flow()
 
@@ -63,20 +66,27 @@ class Hdf5Transport(BaseTransport):
             self.exp._set_experiment_for_current_plugin(i)
             self.files.append(
                 self.__get_filenames(self.exp_coll['plugin_dict'][i]))
-            self.__set_file_details(self.files[i])
-            self.__setup_h5_files()  # creates the hdf5 files
+
+    def _get_memory_utils(self):
+        return MemoryUtils(self.exp)
 
     def _transport_pre_plugin(self):
         count = self.exp.meta_data.get('nPlugin')
         self.__set_file_details(self.files[count])
+        # the output datasets are created once the datasets terminated by the
+        # previous plugins have returned their memory to the budget
+        self.__setup_h5_files()  # creates the hdf5 files
 
     def _transport_post_plugin(self):
         for data in self.exp.index['out_data'].values():
-            if not data.remove:
+            if not data.remove and not self.memory._is_in_memory(data):
                 self.hdf5._link_datafile_to_nexus_file(data)
                 self.hdf5._open_read_only(data)
 
     def _transport_terminate_dataset(self, data):
+        if isinstance(data.data, BaseType):
+            data.data._close()
+        self.memory._close(data)
         self.hdf5._close_file(data)
 
     def __setup_h5_files(self):
@@ -88,6 +98,10 @@ class Hdf5Transport(BaseTransport):
         count = 0
         for key in out_data_dict.keys():
             out_data = out_data_dict[key]
+            if self.memory._in_memory(out_data, key):
+                self.memory._create_entries(out_data)
+                count += 1
+                continue
             filename = self.exp.meta_data.get(["filename", key])
             logging.debug("creating the backing file %s", filename)
             out_data.backing_file = self.hdf5._open_backing_h5(filename, 'w')
@@ -0,0 +1,65 @@
+# Copyright 2015 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+.. module:: mpi_transport
+   :platform: Unix
+   :synopsis: Transport specific plugin list runner that keeps intermediate \
+       datasets in memory, distributed between the MPI processes.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import logging
+
+from savu.core.transports.hdf5_transport import Hdf5Transport
+from savu.plugins.savers.utils.memory_utils import DistributedUtils
+from savu.data.data_structures.data_types.distributed_array import \
+    DistributedArray
+
+
+class MpiTransport(Hdf5Transport):
+    """ Input data and final results are read from and written to hdf5 files,
+    as in the hdf5 transport.  Intermediate datasets are held in memory, each
+    process holding the section it writes.  Before a plugin reads an
+    intermediate dataset, the data is redistributed between the processes
+    with MPI_Alltoallv if the sections required by the processes have
+    changed (e.g. PROJECTION to SINOGRAM).
+    """
+
+    def __init__(self):
+        super(MpiTransport, self).__init__()
+
+    def _get_memory_utils(self):
+        return DistributedUtils(self.exp)
+
+    def process_setup(self, plugin):
+        super(MpiTransport, self).process_setup(plugin)
+        pDict = self.pDict
+        written = self.__get_written_datasets()
+        for i in pDict['nIn']:
+            data = pDict['in_data'][i]
+            if data.get_name() in written and \
+                    isinstance(data.data, DistributedArray):
+                logging.debug("Redistributing dataset %s", data.get_name())
+                data.data._redistribute(pDict['in_sl']['transfer'][i])
+        for i in pDict['nOut']:
+            data = pDict['out_data'][i]
+            if isinstance(data.data, DistributedArray):
+                data.data._allocate(pDict['out_sl']['transfer'][i])
+
+    def __get_written_datasets(self):
+        """ The names of datasets written by previous plugins. """
+        count = self.exp.meta_data.get('nPlugin')
+        return set(n for names in self.data_flow[:count] for n in names)
@@ -19,7 +19,6 @@
 .. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
 """
 
-import copy
 import logging
 from fractions import gcd
 import numpy as np
@@ -27,9 +26,22 @@ import numpy as np
 
 class Chunking(object):
     """
-    A class to save tomography data to a hdf5 file
+    A class to optimise hdf5 chunking.
+
+    Candidate chunk shapes are scored against every access pattern that will
+    write or read the dataset.  For each pattern the score estimates the
+    number of chunk reads per ``max_frames_transfer`` block and the bytes
+    that are read but not used, taking into account the hdf5 chunk cache
+    size and the split of frames between processes.
     """
 
+    # default hdf5 chunk cache size (bytes)
+    cache_size = 1000000
+    # fixed cost of accessing a chunk, expressed in bytes read
+    read_overhead = 256000
+    # upper limit on the chunk cache allocated to a single dataset (bytes)
+    max_cache_size = 256000000
+
     def __init__(self, exp, patternDict):
         self.pattern_dict = patternDict
         self.current = patternDict['current'][patternDict['current'].keys()[0]]
@@ -44,126 +56,150 @@ class Chunking(object):
             self.next_pattern = patternDict['current'].keys()[0]
 
         self.exp = exp
-        self.core = None
-        self.slice1 = None
-        self.other = None
+        self.patterns = self.__get_access_patterns(patternDict)
+        self.cache = self.__get_cache_size()
+
+    def __get_access_patterns(self, patternDict):
+        """
+        Get the current pattern followed by all patterns that will read the
+        dataset later in the plugin list.
+        """
+        future = patternDict.get('future', [])
+        if not future:
+            future = [patternDict['next']] if patternDict['next'] else []
+        return [self.current] + [p.values()[0] for p in future]
+
+    def __get_cache_size(self):
+        """
+        Get the hdf5 chunk cache size, in bytes.
+        """
+        cache = self.exp.meta_data.get_dictionary().get('chunk_cache', None)
+        return int(cache) if cache else self.cache_size
 
     def _calculate_chunking(self, shape, ttype):
         """
         Calculate appropriate chunk sizes for this dataset
         """
         logging.debug("shape = %s", shape)
-        if len(shape) < 3:
+        if len(shape) < 3 or 0 in shape:
             return True
 
-        chunks = [1]*len(shape)
-        adjust = self.__set_adjust_params(shape)
-        self.__set_chunks(chunks, shape, adjust)
+        itemsize = np.dtype(ttype).itemsize
+        candidates = self.__get_candidates(shape)
+        cost, nbytes = self.__get_cost(shape, itemsize, candidates)
 
-        if 0 in chunks:
+        # lowest cost first, then the largest chunk
+        order = np.lexsort((-nbytes.ravel(), cost.ravel()))
+        if not np.isfinite(cost.ravel()[order[0]]):
             return True
-        else:
-            chunks = self.__adjust_chunk_size(chunks, ttype, shape, adjust)
-            logging.debug("chunk size %s", chunks)
-            return tuple(chunks)
+        idx = np.unravel_index(order[0], cost.shape)
+        chunks = tuple(int(candidates[i][idx[i]]) for i in range(len(shape)))
+        logging.debug("chunk size %s", chunks)
+        return chunks
 
-    def __set_adjust_params(self, shape):
+    def _get_chunk_cache(self, shape, chunks, ttype):
         """
-        Set adjustable dimension parameters (the dimension number, increment
-        and max value)
-        """
-        adjust_dim = self.__get_adjustable_dims()
-        array_len = len(adjust_dim)
-        adjust_max = [1]*array_len
+        Get the hdf5 chunk cache parameters for a dataset, sized to hold all
+        chunks touched by a transfer block in any of the access patterns.
 
-        for i in range(array_len):
-            adjust_max[i] = shape[adjust_dim[i]]
-        inc_dict = {'up': [1]*array_len, 'down': [1]*array_len}
-        bounds = {'min': [1]*array_len, 'max': adjust_max}
-        return {'dim': adjust_dim, 'inc': inc_dict, 'bounds': bounds}
+        :returns: The number of hash table slots and the cache size in bytes.
+        :rtype: tuple(int, int)
+        """
+        chunk_bytes = int(np.prod(chunks))*np.dtype(ttype).itemsize
+        nChunks = max(self.__get_chunks_per_block(p, shape, chunks)
+                      for p in self.patterns)
+        nbytes = min(max(nChunks*chunk_bytes, self.cache),
+                     self.max_cache_size)
+        nbytes = max(nbytes, chunk_bytes)
+        # hdf5 recommends a prime number of slots, ~100 times the number of
+        # chunks that fit in the cache
+        nslots = self.__next_prime(100*max(nbytes/chunk_bytes, 1))
+        return nslots, int(nbytes)
+
+    def __get_chunks_per_block(self, pattern, shape, chunks):
+        """
+        The number of chunks touched by a single transfer block.
+        """
+        nChunks = 1
+        for d in pattern['core_dims']:
+            nChunks *= int(np.ceil(shape[d]/float(chunks[d])))
+        if pattern['slice_dims']:
+            s0 = pattern['slice_dims'][0]
+            mft = min(pattern['max_frames_transfer'], shape[s0])
+            c0 = chunks[s0]
+            nChunks *= int(np.ceil((mft + c0 - gcd(mft, c0))/float(c0)))
+        return nChunks
+
+    def __next_prime(self, n):
+        """
+        The smallest prime number greater than or equal to n.
+        """
+        n = max(int(n), 2)
+        while any(n % i == 0 for i in xrange(2, int(n**0.5) + 1)):
+            n += 1
+        return n
 
-    def __get_adjustable_dims(self):
+    def __get_candidates(self, shape):
         """
-        Get all core dimensions and fastest changing slice dimension (all
-        potentially adjustable)
+        Get the candidate chunk values for each dimension.  All core
+        dimensions and the fastest changing slice dimension of each pattern
+        are adjustable, the remaining dimensions are set to 1.
         """
-        self.core = \
-            list(self.current['core_dims']) + list(self.next['core_dims'])
-        c_sl = list(self.current['slice_dims'])
-        n_sl = list(self.next['slice_dims'])
-        self.slice1 = [c_sl[0]] + [n_sl[0]]
-        self.other = c_sl[1:] + n_sl[1:]
-        return list(set(self.core + self.slice1))
-
-    def __set_chunks(self, chunks, shape, adjust):
+        adjust = set()
+        for p in self.patterns:
+            adjust.update(p['core_dims'])
+            adjust.update(p['slice_dims'][:1])
+
+        bounds = self.__get_slice_bounds(shape)
+        candidates = []
+        for dim in range(len(shape)):
+            if dim not in adjust:
+                candidates.append(np.array([1]))
+                continue
+            values = self.__halve(shape[dim])
+            if dim in bounds:
+                mft, bound = bounds[dim]
+                values += self.__double(mft, bound)
+                values = [min(v, bound) for v in values]
+            candidates.append(np.unique(values))
+        return candidates
+
+    def __halve(self, length):
         """
-        Calculate initial chunk values
+        Successive halvings of length, down to 1.
         """
-        chunk_functions = {0: self.__slice_slice, 1: self.__slice_other,
-                           2: self.__core_core, 3: self.__core_other,
-                           4: self.__core_slice}
-        adj_idx = 0
-        for dim in adjust['dim']:
-            count = (dim in self.core)*4 + (dim in self.slice1)*2 + \
-                (dim in self.other) - 2
-            chunks[dim] = chunk_functions[count](dim, adj_idx, adjust, shape)
-#            if 'VOLUME' in self.next_pattern:
-#                self.__set_volume_bounds(adjust, dim, chunks)
-            adj_idx += 1
-        return chunks
+        values = [length]
+        while values[-1] > 1:
+            values.append(int(np.ceil(values[-1]/2.0)))
+        return values
 
-    def __set_volume_bounds(self, adjust, dim, chunks):
-        adjust['bounds']['min'][dim] = \
-            eval(str(62) + adjust['inc']['down'][dim])
-        chunks[dim] = int(min(adjust['bounds']['max'][dim], 62))
-
-    def __core_core(self, dim, adj_idx, adjust, shape):
-        adjust['inc']['up'][adj_idx] = '+1'
-        adjust['inc']['down'][adj_idx] = '/2'
-        adjust['bounds']['max'][adj_idx] = shape[dim]
-        return shape[dim]
-
-    def __core_slice(self, dim, adj_idx, adjust, shape):
-        max_frames = self.__get_max_frames_dict()[dim]
-        adjust['inc']['up'][adj_idx] = '+' + str(max_frames)
-        adjust['inc']['down'][adj_idx] = '-' + str(max_frames)
-        adjust['bounds']['max'][adj_idx] = \
-            self.__max_frames_per_process(shape[dim], max_frames)
-        return min(max_frames, shape[dim])
-
-    def __core_other(self, dim, adj_idx, adjust, shape):
-        adjust['inc']['up'][adj_idx] = '+1'
-        adjust['inc']['down'][adj_idx] = '-1'
-        adjust['bounds']['max'][adj_idx] = shape[dim]
-        return 1
-
-    def __slice_slice(self, dim, adj_idx, adjust, shape):
-        max_frames = self.__get_max_frames_dict()[dim]
-        adjust['inc']['up'][adj_idx] = '+' + str(max_frames)
-        adjust['inc']['down'][adj_idx] = '-' + str(max_frames)
-        adjust['bounds']['max'][adj_idx] = \
-            self.__max_frames_per_process(shape[dim], max_frames)
-        return min(max_frames, shape[dim])
-
-    def __slice_other(self, dim, adj_idx, adjust, shape):
-        adjust['inc']['up'][adj_idx] = '+1'
-        adjust['inc']['down'][adj_idx] = '-1'
-        adjust['bounds']['max'][adj_idx] = shape[dim]
-        return 1
-
-    def __get_max_frames_dict(self):
-        current_sdir = self.current['slice_dims'][0]
-        next_sdir = self.next['slice_dims'][0]
-        mft = 'max_frames_transfer'
-        if current_sdir == next_sdir:
-            c_max = self.current[mft]
-            n_max = self.next[mft]
-            least_common_multiple = (c_max*n_max)/gcd(c_max, n_max)
-            ddict = {current_sdir: least_common_multiple}
-        else:
-            ddict = {self.current['slice_dims'][0]: self.current[mft],
-                     self.next['slice_dims'][0]: self.next[mft]}
-        return ddict
+    def __double(self, mft, bound):
+        """
+        Successive doublings of the frames per transfer, up to the bound.
+        """
+        values = [mft]
+        while values[-1]*2 <= bound:
+            values.append(values[-1]*2)
+        return values
+
+    def __get_slice_bounds(self, shape):
+        """
+        Get the frames per transfer and the maximum chunk size for each
+        dimension that is the fastest changing slice dimension of a pattern,
+        so that a chunk is not shared between processes.
+        """
+        bounds = {}
+        for p in self.patterns:
+            if not p['slice_dims']:
+                continue
+            dim = p['slice_dims'][0]
+            mft = min(p['max_frames_transfer'], shape[dim])
+            if dim in bounds:
+                mft = (mft*bounds[dim][0])/gcd(mft, bounds[dim][0])
+                mft = min(mft, shape[dim])
+            bound = self.__max_frames_per_process(shape[dim], mft)
+            bounds[dim] = (mft, max(bound, mft))
+        return bounds
 
     def __max_frames_per_process(self, shape, nFrames):
         """
@@ -179,93 +215,66 @@ class Chunking(object):
         runs_per_proc = int(np.median(np.array(flist_len)))
         return int(min(runs_per_proc*nFrames, shape))
 
-    def __adjust_chunk_size(self, chunks, ttype, shape, adjust):
+    def __get_cost(self, shape, itemsize, candidates):
         """
-        Adjust the chunk size to as close to 1MB as possible
-        """
-        chunks = np.array(chunks)
-        chunk_size = np.prod(chunks)*np.dtype(ttype).itemsize
-        cache_size = 1000000
-        if (chunk_size > cache_size):
-            self.__decrease_chunks(chunks, ttype, adjust)
-        else:
-            chunks = self.__increase_chunks(chunks, ttype, shape, adjust)
-        return tuple(chunks)
+        Score every combination of the candidate chunk values.
 
-    def __decrease_chunks(self, chunks, ttype, adjust):
-        """
-        Decrease the chunk size to below but as close to 1MB as possible
-        """
-        while ((np.prod(chunks)*np.dtype(ttype).itemsize) > 1000000):
-            idx = self.__get_idx_decrease(chunks, adjust)
-            dim = adjust['dim'].index(idx)
-#            if idx == -1:
-#                break
-            chunks[idx] = int(np.ceil(eval(str(float(chunks[idx])) +
-                              adjust['inc']['down'][dim])))
-
-    def __increase_chunks(self, chunks, ttype, shape, adjust):
+        :returns: The estimated cost (bytes equivalent) and chunk size in
+            bytes for each candidate shape, with one array axis per dimension.
         """
-        Increase the chunk size as close to 1MB as possible
-        """
-        next_chunks = copy.copy(chunks)
-        while ((np.prod(next_chunks)*np.dtype(ttype).itemsize) <= 1000000):
-            chunks = copy.copy(next_chunks)
-            idx = self.__get_idx_increase(next_chunks, adjust)
-            if idx == -1:
-                break
-            dim = adjust['dim'].index(idx)
-            next_chunks[idx] = \
-                eval(str(next_chunks[idx]) + adjust['inc']['up'][dim])
-        return chunks
-
-    def __get_idx_decrease(self, chunks, adjust):
+        nDims = len(shape)
+        c = [self.__expand(candidates[d].astype(float), d, nDims)
+             for d in range(nDims)]
+        nbytes = np.ones([len(v) for v in candidates])*itemsize
+        for d in range(nDims):
+            nbytes = nbytes*c[d]
+
+        cost = np.zeros(nbytes.shape)
+        for p in self.patterns:
+            cost += self.__get_pattern_cost(p, shape, itemsize, c, nbytes)
+        cost[nbytes > self.cache] = np.inf
+        return cost, nbytes
+
+    def __expand(self, values, dim, nDims):
         """
-        Determine the chunk dimension to decrease
+        Reshape 1D values to broadcast along dimension dim.
         """
-        self.check = lambda a, b, c, i: \
-            True if (eval(str(a) + b[i])) < c['min'][i] else False
-        self.__check_adjust_dims(adjust, chunks, 'down')
-        return self.__get_idx_order(adjust, chunks, 'down')
+        new_shape = [1]*nDims
+        new_shape[dim] = len(values)
+        return values.reshape(new_shape)
 
-    def __get_idx_increase(self, chunks, adjust):
+    def __get_pattern_cost(self, pattern, shape, itemsize, c, nbytes):
         """
-        Determine the chunk dimension to increase
+        Estimate the cost of accessing the whole dataset in the given pattern.
+        The chunks touched by a transfer block are reused by the next block
+        if they fit in the chunk cache.
         """
-        self.check = lambda a, b, c, i: \
-            True if (eval(str(a) + b[i])) > c['max'][i] else False
-        self.__check_adjust_dims(adjust, chunks, 'up')
-        return self.__get_idx_order(adjust, chunks, 'up')
-
-    def __get_idx_order(self, adjust, chunks, direction):
-        process_order = [self.slice1, self.core]
-        sl = slice(None, None, -1)
-        if direction is 'up':
-            sl = slice(None, None, 1)
-            process_order = process_order[::-1]
-
-        avail1 = list(set(adjust['dim']).intersection(process_order[0]))
-        idx_order = np.argsort(chunks[avail1])[sl]
-
-        if not idx_order.size:
-            avail2 = list(set(adjust['dim']).intersection(process_order[1]))
-            idx_order = np.argsort(chunks[avail2])[sl]
-
-        return adjust['dim'][idx_order[0]] if idx_order.size else -1
-
-    def __check_adjust_dims(self, adjust, chunks, up_down):
-        nDel = 0
-        for i in range(len(adjust['dim'])):
-            i -= nDel
-            dim = adjust['dim'][i]
-#            if self.check(chunks[dim], adjust['inc'][up_down],
-#                          adjust['bounds'], i):
-#                adjust['inc']['down'][i] = '-1'
-            if self.check(chunks[dim], adjust['inc'][up_down],
-                          adjust['bounds'], i):
-                del adjust['dim'][i]
-                del adjust['inc']['up'][i]
-                del adjust['inc']['down'][i]
-                del adjust['bounds']['max'][i]
-                del adjust['bounds']['min'][i]
-                nDel += 1
+        core = list(pattern['core_dims'])
+        sl = list(pattern['slice_dims'])
+
+        n_core = 1.0
+        for d in core:
+            n_core = n_core*np.ceil(shape[d]/c[d])
+
+        if not sl:
+            return n_core*(self.read_overhead + nbytes)
+
+        s0 = sl[0]
+        mft = min(pattern['max_frames_transfer'], shape[s0])
+        n_blocks = np.prod([shape[d] for d in sl])/float(mft)
+        frames = self.__max_frames_per_process(shape[s0], mft)
+
+        # chunks spanned by a block along the first slice dimension
+        c0 = c[s0]
+        g = np.vectorize(lambda x: gcd(mft, int(x)))(c0)
+        spans = (mft + c0 - g)/c0
+        cached = n_core*spans*nbytes <= self.cache
+        reads = n_core*np.where(cached, mft/c0, spans)
+
+        # chunks extending along the remaining slice dimensions are reused
+        # only if a full pass along the first slice dimension is cached
+        sweep = n_core*np.ceil(frames/c0)*nbytes <= self.cache
+        for d in sl[1:]:
+            reads = reads*np.where(sweep, 1.0/c[d], 1.0)
+
+        return n_blocks*reads*(self.read_overhead + nbytes)
@@ -25,6 +25,7 @@ import copy
 import numpy as np
 
 import savu.data.data_structures.data_notes as notes
+import savu.data.data_structures.utils as dsu
 from savu.core.utils import docstring_parameter
 
 
@@ -48,7 +49,9 @@ class DataCreate(object):
         :keyword patterns: The patterns associated with the dataset (optional,\
             see note below)
         :keyword type dtype: Type of the data (optional: Defaults to \
-            np.float32)
+            np.float32, or the type of the Data object if raw is True).  \
+            Floating point types are limited by the precision policy \
+            (--precision).
         :keyword bool remove: Remove from framework after completion \
         (no link in .nxs file) (optional: Defaults to False.)
         :keyword bool raw: Keep dark and flats (ImageKey or NoImageKey)
@@ -56,7 +59,7 @@ class DataCreate(object):
         {0} \n {1} \n {2} \n {3}
 
         """
-        self.dtype = kwargs.get('dtype', np.float32)
+        self.dtype = kwargs.get('dtype', None)
         self.remove = kwargs.get('remove', False)
         self.raw = kwargs.get('raw', False)
 
@@ -64,6 +67,10 @@ class DataCreate(object):
             self.__create_dataset_from_object(args[0])
         else:
             self.__create_dataset_from_kwargs(kwargs)
+
+        if self.dtype is None:
+            self.dtype = np.float32
+        self.dtype = dsu._apply_precision(self.exp, self.dtype)
         self.get_preview().set_preview([])
 
     def __create_dataset_from_object(self, data_obj):
@@ -75,6 +82,10 @@ class DataCreate(object):
         self._set_data_patterns(patterns)
         if self.raw:
             self.raw = data_obj.data
+            # the output is still raw data, so retain the raw data type
+            if self.dtype is None:
+                self.dtype = data_obj.dtype if data_obj.dtype is not None \
+                    else getattr(data_obj.data, 'dtype', None)
 
     def __create_dataset_from_kwargs(self, kwargs):
         """ Create dataset from kwargs. """
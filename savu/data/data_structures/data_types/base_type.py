@@ -32,6 +32,11 @@ class BaseType(object):
         """ Get full stiched shape of a stack of files"""
         raise NotImplementedError("get_shape must be implemented.")
 
+    def _close(self):
+        """ Release any resources held by the data type (e.g. temporary
+        files) when the dataset is removed from the framework. """
+        pass
+
     def add_base_class_with_instance(self, base, inst):
         """ Add a base class instance to a class (merging of two data types).
 
@@ -24,6 +24,7 @@
 
 import numpy as np
 import copy
+from mpi4py import MPI
 
 from savu.data.data_structures.data_types.base_type import BaseType
 
@@ -40,10 +41,12 @@ class DataWithDarksAndFlats(BaseType):
         self.data = data_obj.data
         self.proj_dim = proj_dim
         self.dark_flat_slice_list = None
+        self.means = {}
 
     def _copy_base(self, new_obj):
         new_obj.flat_updated = self.flat_updated
         new_obj.dark_updated = self.dark_updated
+        new_obj.means = self.means
         self._set_dark_and_flat()
 
     def get_image_key(self):
@@ -58,8 +61,69 @@ class DataWithDarksAndFlats(BaseType):
     def _getitem_imagekey(self, idx):
         index = list(idx)
         index[self.proj_dim] = \
-            self.get_index(0, full=True)[idx[self.proj_dim]].tolist()
-        return self.data[tuple(index)]
+            self.get_index(0, full=True)[idx[self.proj_dim]]
+        return self._read_projections(index)
+
+    def _read_projections(self, index, data=None):
+        """ Read the data at a list of projection indices.  The indices are
+        grouped into runs with a constant step (e.g. a contiguous block of
+        projections between darks and flats, or a strided preview) and each
+        run is read as a single hyperslab into a preallocated array.
+
+        :params list index: An index for each dimension of the data, with \
+            an array of indices in the projection dimension.
+        :params data: The dataset to read from (optional: Defaults to the \
+            data).
+        """
+        data = self.data if data is None else data
+        proj_idx = np.asarray(index[self.proj_dim])
+        if proj_idx.ndim == 0:
+            index[self.proj_dim] = int(proj_idx)
+            return data[tuple(index)]
+
+        shape, dest = [], []
+        for dim, sl in enumerate(index):
+            if dim == self.proj_dim:
+                out_dim = len(dest)
+                shape.append(len(proj_idx))
+                dest.append(slice(None))
+            elif isinstance(sl, slice):
+                shape.append(len(xrange(*sl.indices(data.shape[dim]))))
+                dest.append(slice(None))
+        out = np.empty(shape, dtype=data.dtype)
+
+        for start, stop, run in self.__get_runs(proj_idx):
+            index[self.proj_dim] = run
+            dest[out_dim] = slice(start, stop)
+            if hasattr(data, 'read_direct'):
+                data.read_direct(out, source_sel=tuple(index),
+                                 dest_sel=tuple(dest))
+            else:
+                out[tuple(dest)] = data[tuple(index)]
+        return out
+
+    def __get_runs(self, index):
+        """ Group a list of indices into runs with a constant positive step.
+
+        :returns: The start and stop positions of each run in the list and \
+            the equivalent slice.
+        :rtype: list(tuple(int, int, slice))
+        """
+        runs = []
+        start = 0
+        while start < len(index):
+            stop = start + 1
+            step = 1
+            if stop < len(index) and index[stop] > index[start]:
+                step = index[stop] - index[start]
+                while stop < len(index) and \
+                        index[stop] - index[stop-1] == step:
+                    stop += 1
+            runs.append((start, stop, slice(int(index[start]),
+                                            int(index[stop-1]) + 1,
+                                            int(step))))
+            start = stop
+        return runs
 
     def _getitem_noimagekey(self, idx):
         return self.data[idx]
@@ -98,16 +162,100 @@ class DataWithDarksAndFlats(BaseType):
 
     def dark_mean(self):
         """ Get the averaged dark projection data. """
-        return self._calc_mean(self.dark())
+        if self.dark_updated is not False:
+            return self._calc_mean(self.dark_updated)
+        return self._get_file_mean('dark', self.dscale)
 
     def flat_mean(self):
         """ Get the averaged flat projection data. """
-        return self._calc_mean(self.flat())
+        if self.flat_updated is not False:
+            return self._calc_mean(self.flat_updated)
+        return self._get_file_mean('flat', self.fscale)
 
     def _calc_mean(self, data):
         return data if len(data.shape) is 2 else\
             data.mean(self.proj_dim).astype(np.float32)
 
+    def _get_file_frames(self, name):
+        """ Get the dataset containing the dark or flat frames and the
+        projection indices of the frames.
+
+        :params str name: 'dark' or 'flat'
+        """
+        return self.data, self.get_index(2 if name == 'dark' else 1)
+
+    def _reduce_means(self):
+        """ Calculate the means of the dark and flat frames in the file in
+        parallel and cache them.  This is a collective operation: it must be
+        called by all processes, and is called when the darks and flats are
+        set.
+        """
+        comm = MPI.COMM_WORLD if \
+            self.data_obj.exp.meta_data.get('mpi') is True else None
+        for name in ['dark', 'flat']:
+            if getattr(self, name + '_updated') is not False:
+                continue
+            source, frames = self._get_file_frames(name)
+            key = (name, tuple(np.asarray(frames).tolist()))
+            if source is not None and key not in self.means:
+                self.means[key] = self._reduce_mean(source, frames, comm)
+
+    def _get_file_mean(self, name, scale):
+        """ Get the mean of the dark or flat frames in the file.  The mean is
+        cached, unscaled and uncropped, until the frames are updated.  If it
+        has not been reduced by all processes in _reduce_means, it is
+        calculated by this process alone.
+
+        :params str name: 'dark' or 'flat'
+        :params float scale: The dark or flat scale.
+        """
+        source, frames = self._get_file_frames(name)
+        key = (name, tuple(np.asarray(frames).tolist()))
+        if key not in self.means:
+            self.means[key] = self._reduce_mean(source, frames)
+        crop = self.__get_mean_crop()
+        if self.means[key] is None or crop is None:
+            return self._calc_mean(getattr(self, name)())
+        return (self.means[key][crop]*scale).astype(np.float32)
+
+    def _reduce_mean(self, source, frames, comm=None):
+        """ Calculate the mean of a stack of frames.  With a communicator,
+        each process reads and sums a disjoint part of the frames and the
+        sums are combined with an MPI allreduce.
+
+        :params comm: The communicator (optional: Defaults to None, where \
+            all the frames are read by this process).
+        :returns: The mean, or None if the frames are not a 3D stack.
+        :rtype: np.ndarray
+        """
+        if not len(frames) or len(source.shape) != 3:
+            return None
+        part = np.array_split(frames, comm.size)[comm.rank] if comm else \
+            frames
+
+        shape = list(source.shape)
+        del shape[self.proj_dim]
+        total = np.zeros(shape, dtype=np.float64)
+        if len(part):
+            index = [slice(None)]*len(source.shape)
+            index[self.proj_dim] = part
+            total += self._read_projections(index, data=source).sum(
+                axis=self.proj_dim, dtype=np.float64)
+        if comm:
+            comm.Allreduce(MPI.IN_PLACE, total, op=MPI.SUM)
+        return total/len(frames)
+
+    def __get_mean_crop(self):
+        """ Get the crop (due to previewing) to apply to the mean, or None if
+        the crop is not compatible with the mean. """
+        if not self.dark_flat_slice_list:
+            return (Ellipsis,)
+        crop = list(self.dark_flat_slice_list)
+        if len(crop) != 3:
+            return None
+        del crop[self.proj_dim]
+        return tuple(crop)
+
     def get_index(self, key, full=False):
         """ Get the projection index of a specific image key value.
 
@@ -155,7 +303,7 @@ class DataWithDarksAndFlats(BaseType):
     def __get_data(self, key):
         index = [slice(None)]*self.nDims
         index[self.proj_dim] = self.get_index(key)
-        data = self.data[tuple(index)]
+        data = self._read_projections(index)
 
         if not self.dark_flat_slice_list:
             return data
@@ -179,13 +327,19 @@ class DataWithDarksAndFlats(BaseType):
     def update_dark(self, data):
         self.dark_updated = data
         self.dscale = 1
+        self.__clear_means('dark')
         self.data_obj.meta_data.set('dark', self._calc_mean(data))
 
     def update_flat(self, data):
         self.flat_updated = data
         self.fscale = 1
+        self.__clear_means('flat')
         self.data_obj.meta_data.set('flat', self._calc_mean(data))
 
+    def __clear_means(self, name):
+        for key in [k for k in self.means.keys() if k[0] == name]:
+            del self.means[key]
+
 
 class ImageKey(DataWithDarksAndFlats):
     """ This class is used to get data from a dataset with an image key. """
@@ -225,6 +379,7 @@ class ImageKey(DataWithDarksAndFlats):
         slice_list = self.data_obj._preview._get_preview_slice_list()
         if slice_list:
             self.dark_flat_slice_list = tuple(self.get_dark_flat_slice_list())
+        self._reduce_means()
         if len(self.get_index(2)):
             self.data_obj.meta_data.set('dark', self.dark_mean())
         if len(self.get_index(1)):
@@ -261,6 +416,20 @@ class NoImageKey(DataWithDarksAndFlats):
         new_obj.dark_image_key = self.dark_image_key
         self._copy_base(new_obj)
 
+    def _get_file_frames(self, name):
+        image_key = self.dark_image_key if name == 'dark' else \
+            self.flat_image_key
+        if image_key is not False:
+            self.image_key = image_key
+            frames = super(NoImageKey, self)._get_file_frames(name)
+            self.image_key = self.orig_image_key
+            return frames
+        path = self.dark_path if name == 'dark' else self.flat_path
+        if path is None:
+            return None, []
+        return path, np.arange(path.shape[self.proj_dim]) if \
+            len(path.shape) == 3 else []
+
     def _set_flat_path(self, path, imagekey=False):
         self.flat_image_key = imagekey
         self.flat_path = path
@@ -307,5 +476,6 @@ class NoImageKey(DataWithDarksAndFlats):
             # change dimensions here
 
         self.dark_flat_slice_list = tuple(self.dark_flat_slice_list)
+        self._reduce_means()
         self.data_obj.meta_data.set('dark', self.dark_mean())
         self.data_obj.meta_data.set('flat', self.flat_mean())
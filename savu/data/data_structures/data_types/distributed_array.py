@@ -0,0 +1,184 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: distributed_array
+   :platform: Unix
+   :synopsis: An array that is distributed between MPI processes and \
+       redistributed in memory when the access pattern changes.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import numpy as np
+from mpi4py import MPI
+
+from savu.data.data_structures.data_types.base_type import BaseType
+
+
+class DistributedArray(BaseType):
+    """ An array distributed between MPI processes.  Each process holds a
+    box of the array (a start and stop value in each dimension), which is
+    accessed with global indices.  When the boxes change, the data is
+    exchanged between processes with a single MPI_Alltoallv.
+
+    The boxes written by the processes are disjoint and each process keeps
+    the box it owns.  The boxes that are read may overlap (e.g. due to
+    padding), so the data is always sent from the owned boxes.
+    """
+
+    def __init__(self, shape, dtype, comm=MPI.COMM_WORLD):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.comm = comm
+        self.box = None
+        self.local = None
+        self.owned = None
+        self.owned_local = None
+
+    def get_shape(self):
+        return self.shape
+
+    def __getitem__(self, idx):
+        return self.local[self.__get_local_index(idx)]
+
+    def __setitem__(self, idx, value):
+        self.local[self.__get_local_index(idx)] = value
+
+    def __get_local_index(self, idx):
+        """ Convert a global index to an index into the local box. """
+        idx = idx if isinstance(idx, tuple) else (idx,)
+        if self.box is None:
+            raise IndexError("No data is held by process %i." %
+                             self.comm.rank)
+        local = []
+        for dim, sl in enumerate(idx):
+            start, stop = self.box[dim]
+            if isinstance(sl, slice):
+                first = 0 if sl.start is None else sl.start
+                last = self.shape[dim] if sl.stop is None else sl.stop
+                local.append(slice(first - start, last - start, sl.step))
+            else:
+                first, last = sl, sl + 1
+                local.append(sl - start)
+            if first < start or last > stop:
+                raise IndexError("Index %s is outside the box %s held by "
+                                 "process %i." % (idx, self.box,
+                                                  self.comm.rank))
+        return tuple(local)
+
+    def _get_box(self, slice_list):
+        """ Get the box that contains every entry in a slice list, clipped to
+        the array shape.
+
+        :returns: A (start, stop) pair for each dimension, or None if the \
+            slice list is empty.
+        """
+        starts = list(self.shape)
+        stops = [0]*len(self.shape)
+        for entry in slice_list:
+            for dim, sl in enumerate(entry):
+                start = 0 if sl.start is None else max(sl.start, 0)
+                stop = self.shape[dim] if sl.stop is None else \
+                    min(sl.stop, self.shape[dim])
+                starts[dim] = min(starts[dim], start)
+                stops[dim] = max(stops[dim], stop)
+        if any(b >= e for b, e in zip(starts, stops)):
+            return None
+        return tuple(zip(starts, stops))
+
+    def _allocate(self, slice_list):
+        """ Allocate the local box that will be written with the entries of
+        the slice list.  The boxes of all processes must be disjoint.
+        """
+        self.box = self._get_box(slice_list)
+        if not self.__disjoint(self.comm.allgather(self.box)):
+            raise Exception("The data written by each process overlaps: use "
+                            "the hdf5 transport.")
+        self.local = np.empty(self.__box_shape(self.box), dtype=self.dtype)
+        self.owned, self.owned_local = self.box, self.local
+
+    def _redistribute(self, slice_list):
+        """ Exchange data between processes so that each process holds the
+        box required by the entries in the slice list.  No data is moved if
+        the boxes have not changed.
+        """
+        new_box = self._get_box(slice_list)
+        new_boxes = self.comm.allgather(new_box)
+        if self.comm.allgather(self.box) == new_boxes:
+            return
+        owned_boxes = self.comm.allgather(self.owned)
+
+        send = [self.__intersect(self.owned, b) for b in new_boxes]
+        blocks = [self.owned_local[self.__to_local(s, self.owned)].ravel()
+                  for s in send if s is not None]
+        sendbuf = np.concatenate(blocks) if blocks else \
+            np.empty(0, dtype=self.dtype)
+        scounts = [self.__box_size(s) for s in send]
+
+        recv = [self.__intersect(b, new_box) for b in owned_boxes]
+        rcounts = [self.__box_size(r) for r in recv]
+        missing = sum(rcounts) != self.__box_size(new_box)
+        if self.comm.allreduce(missing, op=MPI.LOR):
+            raise Exception("A process requires data that has not been "
+                            "written.")
+        recvbuf = np.empty(sum(rcounts), dtype=self.dtype)
+
+        self.comm.Alltoallv(
+            [sendbuf, (scounts, self.__displacements(scounts))],
+            [recvbuf, (rcounts, self.__displacements(rcounts))])
+
+        new_local = np.empty(self.__box_shape(new_box), dtype=self.dtype)
+        pos = 0
+        for r, count in zip(recv, rcounts):
+            if r is not None:
+                new_local[self.__to_local(r, new_box)] = \
+                    recvbuf[pos:pos+count].reshape(self.__box_shape(r))
+            pos += count
+        self.box, self.local = new_box, new_local
+        # the new boxes become the owned boxes if they do not overlap
+        if self.__disjoint(new_boxes):
+            self.owned, self.owned_local = new_box, new_local
+
+    def _free(self):
+        self.box = self.owned = None
+        self.local = self.owned_local = None
+
+    def __disjoint(self, boxes):
+        for i in range(len(boxes)):
+            for j in range(i+1, len(boxes)):
+                if self.__intersect(boxes[i], boxes[j]) is not None:
+                    return False
+        return True
+
+    def __intersect(self, box1, box2):
+        if box1 is None or box2 is None:
+            return None
+        box = tuple((max(a[0], b[0]), min(a[1], b[1]))
+                    for a, b in zip(box1, box2))
+        return None if any(b >= e for b, e in box) else box
+
+    def __to_local(self, box, outer):
+        return tuple(slice(b[0] - o[0], b[1] - o[0])
+                     for b, o in zip(box, outer))
+
+    def __box_shape(self, box):
+        return (0,) if box is None else tuple(e - b for b, e in box)
+
+    def __box_size(self, box):
+        return 0 if box is None else int(np.prod(self.__box_shape(box)))
+
+    def __displacements(self, counts):
+        return [0] + [int(c) for c in np.cumsum(counts[:-1])]
@@ -22,23 +22,111 @@
 
 """
 
+import os
+import struct
+import threading
+import collections
 import numpy as np
 import fabio
-import os
+from mpi4py import MPI
+from fabio.fabioutils import jump_filename
 
+import savu.data.data_structures.utils as dsu
 from savu.data.data_structures.data_types.base_type import BaseType
 
+# TIFF tag numbers and field type sizes required to map an image
+_TIFF_TAGS = {256: 'width', 257: 'length', 258: 'bits', 259: 'compression',
+              273: 'offsets', 277: 'samples', 279: 'counts', 284: 'planar',
+              339: 'format'}
+_TIFF_TYPES = {1: 'B', 3: 'H', 4: 'I', 16: 'Q'}
+_TIFF_FORMATS = {1: 'u', 2: 'i', 3: 'f'}
+
+
+def _get_tiff_layout(fname):
+    """ Find the position of the image in an uncompressed, single image
+    TIFF file, with the image held in contiguous strips.
+
+    :returns: The offset of the image in the file and the dtype and shape of \
+        the image, or None if the image cannot be memory-mapped.
+    :rtype: tuple(int, np.dtype, tuple) or None
+    """
+    if os.path.splitext(fname)[1].lower() not in ['.tif', '.tiff']:
+        return None
+    with open(fname, 'rb') as f:
+        header = f.read(8)
+        if header[:4] not in [b'II*\x00', b'MM\x00*']:
+            return None
+        endian = '<' if header[:2] == b'II' else '>'
+        f.seek(struct.unpack(endian + 'I', header[4:])[0])
+        nTags = struct.unpack(endian + 'H', f.read(2))[0]
+        entries = f.read(12*nTags)
+        next_ifd = struct.unpack(endian + 'I', f.read(4))[0]
+        tags = {}
+        for i in range(nTags):
+            tag, ftype, count = \
+                struct.unpack(endian + 'HHI', entries[12*i:12*i+8])
+            if tag not in _TIFF_TAGS or ftype not in _TIFF_TYPES:
+                continue
+            fmt = endian + _TIFF_TYPES[ftype]*count
+            size = struct.calcsize(fmt)
+            if size > 4:
+                f.seek(struct.unpack(endian + 'I',
+                                     entries[12*i+8:12*i+12])[0])
+                value = f.read(size)
+            else:
+                value = entries[12*i+8:12*i+8+size]
+            tags[_TIFF_TAGS[tag]] = struct.unpack(fmt, value)
+
+    get = lambda key, default: tags.get(key, (default,))[0]
+    if next_ifd or get('compression', 1) != 1 or get('samples', 1) != 1 \
+            or get('planar', 1) != 1 or get('format', 1) not in _TIFF_FORMATS:
+        return None
+    if 'offsets' not in tags or 'counts' not in tags:
+        return None
+    offsets, counts = tags['offsets'], tags['counts']
+    if any(o + c != n for o, c, n in zip(offsets, counts, offsets[1:])):
+        return None
+    bits = get('bits', 1)
+    if bits not in [8, 16, 32, 64]:
+        return None
+    dtype = np.dtype('%s%s%i' % (endian, _TIFF_FORMATS[get('format', 1)],
+                                 bits/8))
+    shape = (get('length', 0), get('width', 0))
+    if sum(counts) != shape[0]*shape[1]*dtype.itemsize:
+        return None
+    return offsets[0], dtype, shape
+
 
 class FabIO(BaseType):
     """ This class loads any of the FabIO python module supported image
-    formats. """
+    formats.  The images in a slice are read in a pool of threads, and
+    uncompressed TIFF images are memory-mapped, so that only the requested
+    part of each image is read.  A limited number of the memory-maps are
+    kept open for repeated access (e.g. when reading sinograms).
+
+    Other images can be decoded once and stored in sinogram order
+    (_create_sinogram_store), after which all reads are from the store.  The
+    store is removed when the dataset is terminated.
+    """
+
+    # reading is limited by file latency, so use at least this many threads
+    read_threads = 4
+    # the maximum number of memory-mapped images that are kept open
+    max_open_files = 256
 
     def __init__(self, folder, Data, dim, shape=None, data_prefix=None):
         self._data_obj = Data
+        self.open_files = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.handles = threading.local()
+        self.stores = None
+        self.store_starts = None
+        self.store_file = None
         self.nFrames = None
         self.start_file = fabio.open(self.__get_file_name(folder, data_prefix))
         self.frame_dim = dim
         self.image_shape = (self.start_file.dim2, self.start_file.dim1)
+        self.dtype = self.start_file.data.dtype
         if shape is None:
             self.shape = (self.nFrames,)
         else:
@@ -46,23 +134,144 @@ class FabIO(BaseType):
 
     def __getitem__(self, index):
         size = [len(np.arange(i.start, i.stop, i.step)) for i in index]
-        data = np.empty(size)
+        data = np.empty(size, dtype=self.dtype)
         tiffidx = [i for i in range(len(index)) if i not in self.frame_dim]
         tiff_slices = [index[i] for i in tiffidx]
 
-        # shift tiff dims to start from 0
+        # the image dims of the output array hold the whole selection
         index = list(index)
         for i in tiffidx:
-            if index[i].start is not 0:
-                index[i] = slice(0, index[i].stop - index[i].start)
+            index[i] = slice(0, size[i])
 
         index, frameidx = self.__get_indices(index, size)
 
-        for i in range(len(frameidx)):
-            data[index[i]] = self.start_file.getframe(
-                self.start_no + frameidx[i]).data[tiff_slices]
+        if self.stores is not None:
+            block = self.__read_stores(frameidx, tiff_slices)
+            for i in range(len(frameidx)):
+                data[tuple(index[i])] = block[:, i]
+            return data
+
+        def read(i):
+            data[tuple(index[i])] = \
+                self.__read_frame(self.start_no + frameidx[i], tiff_slices)
+
+        self.__map(read, len(frameidx))
         return data
 
+    def __map(self, func, n):
+        """ Call func(i) for i in range(n) in a pool of threads. """
+        nThreads = dsu._get_n_read_threads(
+            self._data_obj.exp, minimum=self.read_threads)
+        dsu._thread_map(func, n, nThreads)
+
+    def __read_frame(self, num, tiff_slices):
+        """ Read the requested part of an image, from a memory-map if
+        possible. """
+        if self.start_file.nframes > 1:
+            image = self.__get_handle().getframe(num)
+            return image.data[tuple(tiff_slices)]
+        fname = jump_filename(self.start_file.filename, num)
+        image = self.__get_memmap(fname)
+        if image is None:
+            image = fabio.open(fname).data
+        return image[tuple(tiff_slices)]
+
+    def __get_handle(self):
+        """ Get a fabio image of the start file for the current thread, as
+        the images are not thread safe. """
+        handle = getattr(self.handles, 'image', None)
+        if handle is None:
+            handle = fabio.open(self.start_file.filename)
+            self.handles.image = handle
+        return handle
+
+    def __get_memmap(self, fname):
+        with self.lock:
+            if fname in self.open_files:
+                return self.open_files[fname]
+        layout = _get_tiff_layout(fname)
+        image = None if layout is None else np.memmap(
+            fname, dtype=layout[1], mode='r', offset=layout[0],
+            shape=layout[2])
+        with self.lock:
+            self.open_files[fname] = image
+            while len(self.open_files) > self.max_open_files:
+                self.open_files.popitem(last=False)
+        return image
+
+    def _create_sinogram_store(self, folder, name):
+        """ Decode each image once and store the images in sinogram order
+        (image rows, frames, image columns), so that reading part of every
+        image (e.g. a block of sinograms) does not decode every image.  The
+        frames are split between the processes, which each write a file in
+        'folder'.  This must be called by all processes.
+
+        :param str folder: The folder for the store files.
+        :param str name: The prefix of the store file names.
+        """
+        comm = MPI.COMM_WORLD
+        nFrames = int(np.prod(self.shape))
+        frames = np.array_split(np.arange(nFrames), comm.size)
+        fname = lambda r: \
+            os.path.join(folder, '%s_sinograms_%i.npy' % (name, r))
+
+        mine = frames[comm.rank]
+        shape = (self.image_shape[0], len(mine), self.image_shape[1])
+        self.store_file = fname(comm.rank) if len(mine) else None
+        if len(mine) and not self.__valid_store(fname(comm.rank), shape):
+            store = np.lib.format.open_memmap(
+                fname(comm.rank), mode='w+', dtype=self.dtype, shape=shape)
+
+            def read(i):
+                store[:, i, :] = self.__read_frame(
+                    self.start_no + mine[i], [slice(None), slice(None)])
+
+            self.__map(read, len(mine))
+            store.flush()
+        self._data_obj.exp._barrier()
+
+        ranks = [r for r in range(comm.size) if len(frames[r])]
+        self.stores = [np.load(fname(r), mmap_mode='r') for r in ranks]
+        self.store_starts = np.array([frames[r][0] for r in ranks])
+
+    def _close(self):
+        """ Remove the sinogram store files.  This must be called by all
+        processes. """
+        if self.stores is None:
+            return
+        self._data_obj.exp._barrier()
+        self.stores = None
+        self.store_starts = None
+        if self.store_file is not None and os.path.exists(self.store_file):
+            os.remove(self.store_file)
+        self.store_file = None
+
+    def __valid_store(self, fname, shape):
+        """ Check if a store already exists (from an earlier setup). """
+        if not os.path.exists(fname) or os.path.getmtime(fname) < \
+                os.path.getmtime(self.start_file.filename):
+            return False
+        store = np.load(fname, mmap_mode='r')
+        return store.shape == shape and store.dtype == self.dtype
+
+    def __read_stores(self, frameidx, tiff_slices):
+        """ Read the requested part of the images from the stores.
+
+        :returns: The images, with dimensions (rows, frames, columns).
+        """
+        rows, cols = tiff_slices
+        which = np.searchsorted(self.store_starts, frameidx, side='right') - 1
+        block = None
+        for s in np.unique(which):
+            sel = np.where(which == s)[0]
+            local = frameidx[sel] - self.store_starts[s]
+            part = self.stores[s][rows][:, local][:, :, cols]
+            if block is None:
+                block = np.empty((part.shape[0], len(frameidx),
+                                  part.shape[2]), dtype=self.dtype)
+            block[:, sel] = part
+        return block
+
     def __get_file_name(self, folder, prefix):
         import re
         import glob
@@ -103,7 +312,9 @@ class FabIO(BaseType):
 
         for dim in range(len(sub_idx)):
             start = index[0][self.frame_dim[dim]].start
+            step = index[0][self.frame_dim[dim]].step or 1
+            pos = (idx_list[dim] - start)//step
             index[:, self.frame_dim[dim]] = \
-                [slice(i-start, i-start+1, 1) for i in idx_list[dim]]
+                [slice(i, i+1, 1) for i in pos]
             frameidx[:] += idx_list[dim]*np.prod(self.shape[dim+1:])
         return index.tolist(), frameidx.astype(int)
@@ -28,7 +28,13 @@ from savu.data.data_structures.data_types.base_type import BaseType
 
 
 class Map3dto4dh5(BaseType):
-    """ This class converts a 3D dataset to a 4D dataset. """
+    """ This class converts a 3D dataset to a 4D dataset.  Each scan is a
+    contiguous block of n_angles frames in the 3D dataset.
+    """
+
+    # read the frames of all requested scans in one block if at least this
+    # fraction of the frames in the block are required
+    min_block_fraction = 0.5
 
     def __init__(self, data, n_angles):
         shape = data.shape
@@ -38,19 +44,39 @@ class Map3dto4dh5(BaseType):
             self.add_base_class_with_instance(type(data), data)
 
         self.data = data
-        new_shape = (n_angles, shape[1], shape[2], shape[0]/n_angles)
+        new_shape = (n_angles, shape[1], shape[2], shape[0]//n_angles)
         self.shape = new_shape
 
     def __getitem__(self, idx):
+        n_angles = self.shape[0]
+        scans = np.arange(idx[3].start, idx[3].stop, idx[3].step)
+        nAngles = len(np.arange(idx[0].start, idx[0].stop, idx[0].step))
+        nFrames = (scans[-1] - scans[0] + 1)*n_angles
+        if len(scans)*nAngles >= nFrames*self.min_block_fraction:
+            return self.__get_block(idx, scans)
+        return self.__get_frames(idx)
+
+    def __get_block(self, idx, scans):
+        """ Read all frames of the requested scans with a single hyperslab
+        and return the requested 4D section as a view of the block. """
+        n_angles = self.shape[0]
+        start, stop = scans[0]*n_angles, (scans[-1] + 1)*n_angles
+        block = self.data[start:stop, idx[1], idx[2]]
+        block = block.reshape((-1, n_angles) + block.shape[1:])
+        block = block[::idx[3].step, idx[0]]
+        return block.transpose(1, 2, 3, 0)
+
+    def __get_frames(self, idx):
+        """ Read the requested frames of each scan separately. """
         n_angles = self.shape[0]
         idx_dim3 = np.arange(idx[3].start, idx[3].stop, idx[3].step)
         idx_dim0 = np.arange(idx[0].start, idx[0].stop, idx[0].step)
         idx_dim0 = np.ravel(idx_dim3.reshape(-1, 1)*n_angles + idx_dim0)
 
         size = [len(np.arange(i.start, i.stop, i.step)) for i in idx]
-        data = np.empty(size)
+        data = np.empty(size, dtype=self.data.dtype)
 
-        change = np.where(idx_dim0[:-1]/n_angles != idx_dim0[1:]/n_angles)[0]
+        change = np.where(idx_dim0[:-1]//n_angles != idx_dim0[1:]//n_angles)[0]
         start = idx_dim0[np.append(0, change+1)]
         stop = idx_dim0[np.append(change, len(idx_dim0)-1)] + 1
         length = stop - start
@@ -0,0 +1,55 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+.. module:: memmap
+   :platform: Unix
+   :synopsis: A module to access binary data through a numpy memory-map.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import numpy as np
+
+from savu.data.data_structures.data_types.base_type import BaseType
+
+
+class Memmap(BaseType):
+    """ Binary data accessed through a numpy memory-map.  The data is only
+    read from file when it is accessed, and slices of the data are views into
+    the map, so the data is not copied on transfer.
+
+    :param Data Data: The dataset.
+    :param str filename: The binary file.
+    :param tuple shape: The shape of the data.
+    :param dtype: The data type, including the byte order.
+    :param int offset: The position of the first data entry in the file.
+    :param str order: The memory layout of the data, 'C' or 'F'.
+    """
+
+    def __init__(self, Data, filename, shape, dtype, offset=0, order='C'):
+        self._data_obj = Data
+        self.filename = filename
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.data = np.memmap(filename, dtype=self.dtype, order=order,
+                              mode='r', offset=offset, shape=self.shape)
+
+    def __getitem__(self, idx):
+        return self.data[tuple(idx) if isinstance(idx, list) else idx]
+
+    def get_shape(self):
+        return self.shape
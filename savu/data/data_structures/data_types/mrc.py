@@ -13,7 +13,7 @@
 # limitations under the License.
 
 """
-.. module:: base_type
+.. module:: mrc
    :platform: Unix
    :synopsis: A module to load MRC image data.
 
@@ -24,30 +24,25 @@
 import numpy as np
 
 import savu.plugins.loaders.utils.mrc_header as header_format
-from savu.data.data_structures.data_types.base_type import BaseType
+from savu.data.data_structures.data_types.memmap import Memmap
 
 
-class MRC(BaseType):
+class MRC(Memmap):
 
     def __init__(self, Data, filename, stats=None):
-        self._data_obj = Data
         self.yz_swapped = False
         header_size = 1024
-        self.file = open(filename, 'rb')
         # get the header information and file pointer position of first data
         # entry
-        header, first = self.__get_header(self.file, header_size)
+        with open(filename, 'rb') as f:
+            header, first = self.__get_header(f, header_size)
         self.header_dict = self.__get_header_dict(header)
         self.format = self.__set_data_format(header)
-        self.shape = self.__set_shape(header)
+        shape = self.__set_shape(header)
         if self.format['mode'] == 16:
-            self.shape = self.shape + (3,)
-
-        self.data = np.memmap(filename, dtype=self.format['dtype'], order='F',
-                              mode='r', offset=first, shape=self.shape)
-
-    def __getitem__(self, idx):
-        return self.data[idx]
+            shape = shape + (3,)
+        super(MRC, self).__init__(Data, filename, shape, self.format['dtype'],
+                                  offset=first, order='F')
 
     def __get_header(self, fd, size):
         rec_header_dtype = np.dtype(header_format.rec_header_dtd)
@@ -66,10 +61,10 @@ class MRC(BaseType):
         return header_dict
 
     def __set_data_format(self, header):
-        mode = header['mode']
+        mode = int(header['mode'][0])
         # BitOrder: little or big endian
         bo = "<" if header['stamp'][0, 0] == 68 and \
-             header['stamp'][0, 1] == 65 else "<"
+             header['stamp'][0, 1] == 65 else ">"
         sign = "i1" if header['imodFlags'] == 1 else "u1"  # signed or unsigned
         dtype = [sign, "i2", "f",  "c4", "c8", None, "u2", None, None, None,
                  None, None, None, None, None, None, "u1"][mode]
@@ -83,8 +78,4 @@ class MRC(BaseType):
             nx = nx[0]
             ny = ny[0]
             nz = nz[0]
-        return (nx, ny, nz)
-
-    def get_shape(self):
-        return self.shape
-
+        return (int(nx), int(ny), int(nz))
@@ -23,11 +23,14 @@
 
 import numpy as np
 
+import savu.data.data_structures.utils as dsu
 from savu.data.data_structures.data_types.base_type import BaseType
 
 
 class StitchData(BaseType):
-    """ This class is used to combine multiple data objects. """
+    """ This class is used to combine multiple data objects.  The sections
+    of a slice held by each data object are read in a pool of threads,
+    directly into the output array where possible. """
 
     def __init__(self, data_obj_list, stack_or_cat, dim):
         self.obj_list = data_obj_list
@@ -35,6 +38,8 @@ class StitchData(BaseType):
         self.dim = dim
         self.shape = None
         self._set_shape()
+        self.dtype = np.result_type(
+            *[getattr(obj.data, 'dtype', np.float32) for obj in self.obj_list])
         if self.stack_or_cat == 'stack':
             self.inc = 1
             self._getitem = self._getitem_stack
@@ -47,13 +52,25 @@ class StitchData(BaseType):
     def __getitem__(self, idx):
         size = [len(np.arange(s.start, s.stop, s.step)) for s in idx]
         obj_list, in_slice_list, out_slice_list = self._get_lists(idx)
-        data = np.empty(size)
+        data = np.empty(size, dtype=self.dtype)
 
-        for i in range(len(obj_list)):
-            data[tuple(out_slice_list[i])] = \
-                self._getitem(obj_list[i], in_slice_list[i])
+        def read(i):
+            self.__read(obj_list[i], tuple(in_slice_list[i]), data,
+                        tuple(out_slice_list[i]))
+
+        nThreads = dsu._get_n_read_threads(self.obj_list[0].exp)
+        dsu._thread_map(read, len(obj_list), nThreads)
         return data
 
+    def __read(self, obj, in_sl, data, out_sl):
+        """ Read a section of a data object into a section of the output
+        array, without an intermediate copy for concatenated hdf5 datasets.
+        """
+        if self.stack_or_cat == 'cat' and hasattr(obj.data, 'read_direct'):
+            obj.data.read_direct(data, in_sl, out_sl)
+        else:
+            data[out_sl] = self._getitem(obj, in_sl)
+
     def _getitem_stack(self, obj, sl):
         return np.expand_dims(obj.data[tuple(sl)], self.dim)
 
@@ -87,7 +104,7 @@ class StitchData(BaseType):
         index = np.where(np.diff(array) < 0)[0] + 1
 
         val_list = np.array_split(array, index)
-        obj_vals = init_vals[np.append(0, index)]/inc
+        obj_vals = init_vals[np.append(0, index)]//inc
         active_obj_list = []
         for i in obj_vals:
             active_obj_list.append(self.obj_list[i])
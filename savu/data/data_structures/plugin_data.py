@@ -386,6 +386,7 @@ class PluginData(object):
             return int(mft)
 
         mfp = nFrames if isinstance(nFrames, int) else min(mft, shape[sdir[0]])
+        mfp = self.__split_between_threads(nFrames, mfp)
         multi = self.__find_multiples_of_b_that_divide_a(mft, mfp)
         possible = sorted(list(set(set(multi).intersection(set(fchoices)))))
 
@@ -405,6 +406,16 @@ class PluginData(object):
             self.__set_no_squeeze()
         return int(mft)
 
+    def __split_between_threads(self, nFrames, mfp):
+        """ Reduce the max frames process of a 'multiple' frames plugin so
+        that each block of transfer data is shared between the threads of the
+        frame pool. """
+        nThreads = self._plugin._get_n_threads() if \
+            hasattr(self._plugin, '_get_n_threads') else 1
+        if nFrames != 'multiple' or nThreads < 2:
+            return mfp
+        return int(np.ceil(mfp/float(nThreads)))
+
     def __check_distribution(self, mft, nframes, nprocs):
         warn_threshold = 0.85
         temp = (((nframes/mft)/nprocs) % 1)
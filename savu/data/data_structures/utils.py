@@ -21,6 +21,9 @@
 """
 
 import copy
+import numpy as np
+from multiprocessing.pool import ThreadPool
+
 import savu.core.utils as cu
 
 # A dictionary of available patterns (and ranks, needed for dawn)
@@ -67,3 +70,55 @@ def get_available_pattern_types():
 
 def get_pattern_rank(pattern):
     return pattern_list[pattern]
+
+
+def _apply_precision(exp, dtype):
+    """ Apply the precision policy of the experiment (set with --precision)
+    to the type of a dataset.  Floating point types are reduced to the policy
+    precision if they are larger, and all other types are unchanged.
+
+    :param Experiment exp: The experiment object.
+    :param type dtype: The type of the dataset.
+    :returns: The type to use for the dataset.
+    :rtype: np.dtype
+    """
+    dtype = np.dtype(dtype)
+    precision = exp.meta_data.get_dictionary().get('precision', 'auto')
+    if precision == 'auto' or dtype.kind != 'f':
+        return dtype
+    precision = np.dtype(precision)
+    return precision if dtype.itemsize > precision.itemsize else dtype
+
+
+def _get_n_read_threads(exp, minimum=4):
+    """ Get the number of threads used to read data from several files at
+    once.  Reading is limited by file latency rather than by the processor,
+    so at least 'minimum' threads are used, or --threads if it is larger.
+
+    :param Experiment exp: The experiment object.
+    :param int minimum: The minimum number of threads.
+    :rtype: int
+    """
+    threads = exp.meta_data.get_dictionary().get('threads', 1)
+    return max(minimum, int(threads))
+
+
+def _thread_map(func, n, nThreads):
+    """ Call func(i) for i in range(n) in a pool of threads, or serially if
+    only one thread is required.
+
+    :param function func: The function to call.
+    :param int n: The number of calls.
+    :param int nThreads: The maximum number of threads.
+    """
+    nThreads = min(nThreads, n)
+    if nThreads < 2:
+        for i in range(n):
+            func(i)
+        return
+    pool = ThreadPool(nThreads)
+    try:
+        pool.map(func, range(n))
+    finally:
+        pool.close()
+        pool.join()
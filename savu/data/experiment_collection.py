@@ -158,8 +158,11 @@ class Experiment(object):
             current_pattern = current_data['pattern']
             next_pattern = self.__find_next_pattern(datasets_lists[1:],
                                                     current_name)
+            future = self.__find_future_patterns(datasets_lists[1:],
+                                                 current_name)
             patterns_list.append({'current': current_pattern,
-                                  'next': next_pattern})
+                                  'next': next_pattern,
+                                  'future': future})
         self.meta_data.set('current_and_next', patterns_list)
 
     def __find_next_pattern(self, datasets_lists, current_name):
@@ -171,6 +174,20 @@ class Experiment(object):
                     return next_pattern
         return next_pattern
 
+    def __find_future_patterns(self, datasets_lists, current_name):
+        """ Find all patterns that read the dataset before it is replaced
+        by a later plugin.
+        """
+        future = []
+        for next_data_list in datasets_lists:
+            for next_data in next_data_list['in_datasets']:
+                if next_data['name'] == current_name:
+                    future.append(next_data['pattern'])
+            out_names = [d['name'] for d in next_data_list['out_datasets']]
+            if current_name in out_names:
+                break
+        return future
+
     def _set_nxs_filename(self):
         folder = self.meta_data.get('out_path')
         fname = self.meta_data.get('datafile_name') + '_processed.nxs'
@@ -26,6 +26,7 @@ import numpy as np
 
 from savu.data.data_structures.data_add_ons import Padding
 from savu.data.transport_data.base_transport_data import BaseTransportData
+from savu.data.transport_data.slice_list import SliceList
 
 NX_CLASS = 'NX_class'
 
@@ -43,61 +44,35 @@ class Hdf5TransportData(BaseTransportData):
     def _get_process_data(self):
         return self.process_data
 
-    def _single_slice_list(self, nSlices, nDims, core_slice, core_dirs,
-                           slice_dirs, fix, index):
+    def _single_slice_list(self, nDims, core_slice, core_dirs, slice_dirs,
+                           fix, index):
+        """ Create a slice list with one entry per frame.
 
+        :returns: A compact slice list
+        :rtype: SliceList
+        """
         fix_dirs, value = fix
-        slice_list = []
-        for i in range(nSlices):
-            getitem = np.array([slice(None)]*nDims)
-            getitem[core_dirs] = core_slice[np.arange(len(core_dirs))]
-            for f in range(len(fix_dirs)):
-                getitem[fix_dirs[f]] = slice(value[f], value[f] + 1, 1)
-            for sdir in range(len(slice_dirs)):
-                getitem[slice_dirs[sdir]] = slice(index[sdir, i],
-                                                  index[sdir, i] + 1, 1)
-            slice_list.append(tuple(getitem))
-        return slice_list
+        constant = dict(zip(core_dirs, core_slice))
+        for f in range(len(fix_dirs)):
+            constant[fix_dirs[f]] = slice(value[f], value[f] + 1, 1)
+        return SliceList(nDims, slice_dirs, index, constant=constant)
 
-    def _get_slice_dirs_index(self, slice_dirs, shape, value):
+    def _get_slice_dirs_index(self, slice_dirs, values):
         """
         returns a list of arrays for each slice dimension, where each array
         gives the indices for that slice dimension.
-        """
-        # create the indexing array
-        chunk, length, repeat = self.__chunk_length_repeat(slice_dirs, shape)
-        values = None
-        idx_list = []
-        for i in range(len(slice_dirs)):
-            c = chunk[i]
-            r = repeat[i]
-            exec('values = ' + value)
-            idx = np.ravel(np.kron(values, np.ones((r, c))))
-            idx_list.append(idx.astype(int))
-        return np.array(idx_list)
-
-    def __chunk_length_repeat(self, slice_dirs, shape):
-        """
-        For each slice dimension, determine 3 values relevant to the slicing.
 
-        :returns: chunk, length, repeat
-            chunk: how many repeats of the same index value before an increment
-            length: the slice dimension length (sequence length)
-            repeat: how many times does the sequence of chunked numbers repeat
-        :rtype: [int, int, int]
+        :param function values: returns the index values for the i'th slice \
+            dimension, given i.
         """
-        sshape = self.__get_shape_of_slice_dirs(slice_dirs, shape)
-        if not slice_dirs:
-            return [1], [1], [1]
-
-        chunk = []
-        length = []
-        repeat = []
-        for dim in range(len(slice_dirs)):
-            chunk.append(int(np.prod(sshape[0:dim])))
-            length.append(sshape[dim])
-            repeat.append(int(np.prod(sshape[dim+1:])))
-        return chunk, length, repeat
+        return [np.atleast_1d(values(i)).astype(int)
+                for i in range(len(slice_dirs))]
+
+    def _get_bank_length(self):
+        """ The length of the fastest changing slice dimension. """
+        shape = self.get_shape()
+        slice_dirs = self.get_slice_dimensions()
+        return self.__get_shape_of_slice_dirs(slice_dirs, shape)[0]
 
     def __get_shape_of_slice_dirs(self, slice_dirs, shape):
         sshape = [shape[sslice] for sslice in slice_dirs]
@@ -162,70 +137,7 @@ class Hdf5TransportData(BaseTransportData):
                                     "multiple chunks.")
             else:
                 core_slice.append(slice(starts[c], stops[c], steps[c]))
-        return np.array(core_slice)
-
-    def _banked_list(self, slice_list):
-        shape = self.get_shape()
-        slice_dirs = self.get_slice_dimensions()
-        chunk, length, repeat = self.__chunk_length_repeat(slice_dirs, shape)
-        banked = self._split_list(slice_list, length[0])
-        return banked, length, slice_dirs
-
-    def _group_dimension(self, sl, dim, step):
-        start = sl[0][dim].start
-        stop = sl[-1][dim].stop
-        working_slice = list(sl[0])
-        working_slice[dim] = slice(start, stop, step)
-        return tuple(working_slice)
-
-    def _split_list(self, the_list, size):
-            return [the_list[x:x+size] for x in xrange(0, len(the_list), size)]
-
-    # This method only works if the split dimensions in the slice list contain
-    # slice objects
-    def __split_frames(self, slice_list, split_list):
-        split = [map(int, a.split('.')) for a in split_list]
-        dims = [s[0] for s in split]
-        length = [s[1] for s in split]
-        replace = self.__get_split_frame_entries(slice_list, dims, length)
-        # now replace each slice list entry with multiple entries
-        array_list = []
-        for sl in slice_list:
-            new_list = np.array([sl for i in range(len(replace[0]))])
-            for d, i in zip(dims, range(len(dims))):
-                new_list[:, d] = replace[i]
-            array_list += [tuple(a) for a in new_list]
-
-        return tuple(array_list)
-
-    def __get_split_frame_entries(self, slice_list, dims, length):
-        shape = self.get_shape
-        replace = []
-        seq_len = []
-
-        # get the new entries
-        for d, l in zip(dims, length):
-            sl = slice_list[0][d]
-            start = 0 if sl.start is None else sl.start
-            stop = shape[d] if sl.stop is None else sl.stop
-            inc = l*sl.step if sl.step else l
-            temp_list = [slice(a, a+inc) for a in np.arange(start, stop, inc)]
-            if temp_list[-1].stop > stop:
-                temp = temp_list[-1]
-                temp_list[-1] = slice(temp.start, stop, temp.step)
-            replace.append(temp_list)
-            seq_len.append(len(temp_list))
-
-        # calculate the permutations
-        length = np.array(seq_len)
-        chunk = [int(np.prod(length[0:dim])) for dim in range(len(dims))]
-        repeat = [int(np.prod(length[dim+1:])) for dim in range(len(dims))]
-        full_replace = []
-        for d in range(len(dims)):
-            temp = [[replace[d][i]]*chunk[d] for x in range(repeat[d]) for i
-                    in range(len(replace[d]))]
-            full_replace.append([t for sub in temp for t in sub])
-        return full_replace
+        return core_slice
 
     def __combine_dicts(self, d1, d2):
         for key, value in d2.iteritems():
@@ -241,19 +153,24 @@ class Hdf5TransportData(BaseTransportData):
         return self.__combine_dicts(trans_dict, proc_dict)
 
     def _get_frames_per_process(self, slice_list):
-        processes = self.exp.meta_data.get("processes")
+        """ Split the slice list between the processes (in the same way as
+        np.array_split). """
+        nProcs = len(self.exp.meta_data.get("processes"))
         process = self.exp.meta_data.get("process")
-        frame_idx = np.arange(len(slice_list))
-        try:
-            frames = np.array_split(frame_idx, len(processes))[process]
-            slice_list = slice_list[frames[0]:frames[-1]+1]
-        except IndexError:
-            slice_list = []
-        return slice_list, frames
-
-    def _pad_slice_list(self, slice_list, inc_start_str, inc_stop_str):
+        size, extra = divmod(len(slice_list), nProcs)
+        start = process*size + min(process, extra)
+        stop = start + size + (1 if process < extra else 0)
+        return slice_list[start:stop], np.arange(start, stop)
+
+    def _pad_slice_list(self, slice_list, inc_start, inc_stop):
         """ Amend the slice lists to include padding.  Includes variations for
-        transfer and process slice lists. """
+        transfer and process slice lists.
+
+        :param function inc_start: the increment at the start of a padded \
+            dimension, given the padding dictionary entry.
+        :param function inc_stop: the increment at the end of a padded \
+            dimension, given the padding dictionary entry.
+        """
         if not self._get_plugin_data().padding:
             return slice_list
 
@@ -261,26 +178,18 @@ class Hdf5TransportData(BaseTransportData):
 
         shape = self.get_shape()
         for ddir, value in pad_dict.iteritems():
-            exec('inc_start = ' + inc_start_str)
-            exec('inc_stop = ' + inc_stop_str)
-            for i in range(len(slice_list)):
-                slice_list[i] = list(slice_list[i])
-                sl = slice_list[i][ddir]
-                if sl.start is None:
-                    sl = slice(0, shape[ddir], 1)
-                slice_list[i][ddir] = \
-                    slice(sl.start + inc_start, sl.stop + inc_stop, sl.step)
-                slice_list[i] = tuple(slice_list[i])
+            slice_list._pad(ddir, inc_start(value), inc_stop(value), shape)
         return slice_list
 
-    def _fix_list_length(self, sl, length):
+    def _fix_list_length(self, slice_list, length, last=False):
+        """ Ensure the entries in a slice list have at least length values in
+        the first slice dimension.
+
+        :keyword bool last: Only amend the final entry in the list.
+        """
         sdir = self.get_slice_dimensions()[0]
-        sl = list(sl)
-        e = sl[sdir]
-        if (e.stop - e.start) < length:
-            diff = length - (e.stop - e.start)
-            sl[sdir] = slice(e.start, e.stop + diff, e.step)
-        return tuple(sl)
+        slice_list._fix_length(sdir, length, last=last)
+        return slice_list
 
     def __set_padding_dict(self):
         pData = self._get_plugin_data()
@@ -318,15 +227,14 @@ class TransferData(object):
             self._get_slice_list(self.shape, current_sl=True)
 
         if self.pData._get_boundary_padding():
-            for i in range(len(sl)):
-                sl[i] = self.data._fix_list_length(sl[i], mfp)
+            sl = self.data._fix_list_length(sl, mfp)
         else:
-            sl[-1] = self.data._fix_list_length(sl[-1], mft)
+            sl = self.data._fix_list_length(sl, mft, last=True)
 
         sl, sl_dict['frames'] = self.data._get_frames_per_process(sl)
         if self.data.pad:
             sl = self.data._pad_slice_list(
-                sl, "-value['before']", "value['after']")
+                sl, lambda v: -v['before'], lambda v: v['after'])
         sl_dict['transfer'] = sl
         return sl_dict
 
@@ -350,7 +258,7 @@ class TransferData(object):
             self.__grouped_slice_list(transfer_ssl, mft, slice_dir)
 
         split_list = self.pData.split
-        transfer_gsl = self.__split_frames(transfer_gsl, split_list) if \
+        transfer_gsl = transfer_gsl._split_frames(split_list, shape) if \
             split_list else transfer_gsl
 
         if current_sl:
@@ -366,28 +274,19 @@ class TransferData(object):
         core_dirs = np.array(self.data.get_core_dimensions())
         fix = pData._get_fixed_dimensions()
         core_slice = self.data._get_core_slices(core_dirs)
-        values = 'self._get_slice_dir_index(slice_dirs[i])'
-        index = self.data._get_slice_dirs_index(slice_dirs, shape, values)
-        nSlices = index.shape[1] if index.size else len(fix[0])
+        index = self.data._get_slice_dirs_index(
+            slice_dirs, lambda i: self.data._get_slice_dir_index(slice_dirs[i]))
         nDims = len(shape)
         ssl = self.data._single_slice_list(
-            nSlices, nDims, core_slice, core_dirs, slice_dirs, fix, index)
+            nDims, core_slice, core_dirs, slice_dirs, fix, index)
         return ssl
 
     def __grouped_slice_list(self, slice_list, max_frames, group_dim):
         if group_dim is None:
             return slice_list
         steps = self.data.get_preview().get_starts_stops_steps('steps')
-        sub_groups = self.data._split_list(slice_list, max_frames)
-        grouped = []
-
-        for sub in sub_groups:
-            temp = list(sub[0])
-            for dim in group_dim:
-                temp[dim] = \
-                    self.data._group_dimension(sub, dim, steps[dim])[dim]
-            grouped.append(tuple(temp))
-        return grouped
+        return slice_list._grouped(
+            max_frames, group_dim, [steps[dim] for dim in group_dim])
 
     def _get_padded_data(self, slice_list, end=False):
 #        if not self.pad and not end:
@@ -448,9 +347,10 @@ class ProcessData(object):
 
         # does this do anything?
         if self.sdir:
-            sl[-1] = self.data._fix_list_length(sl[-1], mfp)
+            sl = self.data._fix_list_length(sl, mfp, last=True)
 
-        sl = self.data._pad_slice_list(sl, '0', 'sum(value.values())')
+        sl = self.data._pad_slice_list(
+            sl, lambda v: 0, lambda v: sum(v.values()))
         sl_dict['process'] = sl
         return sl_dict
 
@@ -476,18 +376,16 @@ class ProcessData(object):
         slice_dirs = self.data.get_slice_dimensions()
         core_dirs = np.array(self.data.get_core_dimensions())
         fix = [[]]*2
-        core_slice = np.array([slice(None)]*len(core_dirs))
+        core_slice = [slice(None)]*len(core_dirs)
         shape = tuple([shape[i] for i in range(len(shape)) if i not in
                        self.remove_dims])
-        values = 'np.arange(shape[slice_dirs[i]])'
-        index = self.data._get_slice_dirs_index(slice_dirs, shape, values)
-        # there may be no slice dirs if process is True
-        index = index if index.size else np.array([[0]])
-        nSlices = index.shape[1] if index.size else len(fix[0])
+        # there may be no slice dirs if process is True, giving a single entry
+        index = self.data._get_slice_dirs_index(
+            slice_dirs, lambda i: np.arange(shape[slice_dirs[i]]))
         nDims = len(shape)
 
         ssl = self.data._single_slice_list(
-            nSlices, nDims, core_slice, core_dirs, slice_dirs, fix, index)
+            nDims, core_slice, core_dirs, slice_dirs, fix, index)
         self.sdir = slice_dirs[0] if len(slice_dirs) > 0 else None
         return ssl
 
@@ -495,13 +393,8 @@ class ProcessData(object):
         if group_dim is None:
             return slice_list
 
-        banked, length, slice_dir = self.data._banked_list(slice_list)
-        grouped = []
-        for group in banked:
-            sub_groups = self.data._split_list(group, max_frames)
-            for sub in sub_groups:
-                grouped.append(self.data._group_dimension(sub, group_dim, 1))
-        return grouped
+        bank = self.data._get_bank_length()
+        return slice_list._grouped(max_frames, [group_dim], [1], bank=bank)
 
     def __get_unpad_slice_list(self, reps):
         sl = [slice(None)]*len(self.pData.get_shape_transfer())
@@ -0,0 +1,34 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: mpi_transport_data
+   :platform: Unix
+   :synopsis: A data transport class that is inherited by Data class at \
+   runtime, when using the mpi transport.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+from savu.data.transport_data.hdf5_transport_data import Hdf5TransportData
+
+
+class MpiTransportData(Hdf5TransportData):
+    """
+    The slice lists are organised in the same way as the hdf5 transport.
+    """
+
+    def __init__(self, name='MpiTransportData'):
+        super(MpiTransportData, self).__init__(name=name)
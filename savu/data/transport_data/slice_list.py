@@ -0,0 +1,229 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: slice_list
+   :platform: Unix
+   :synopsis: A compact slice list that creates each entry on demand.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+import copy
+import numpy as np
+
+
+class SliceList(object):
+    """
+    A compact representation of a list of slice tuples.
+
+    The frames of a dataset are ordered with the first slice dimension
+    changing fastest.  Each entry in the list covers a group of consecutive
+    frames.  Rather than holding a tuple of slice objects for every entry, the
+    SliceList stores only the index values along each slice dimension and
+    a constant slice for every other dimension.  Entries are converted to
+    tuples on request, so the memory and setup cost does not depend on the
+    number of frames.
+    """
+
+    def __init__(self, nDims, slice_dirs, index, constant=None):
+        """
+        :param int nDims: The number of data dimensions.
+        :param list(int) slice_dirs: The slice dimensions (fastest first).
+        :param list(np.ndarray) index: The index values of each slice
+            dimension.
+        :param dict constant: A slice for each remaining dimension that is \
+            not ``slice(None)``.
+        """
+        self.nDims = nDims
+        self.slice_dirs = list(slice_dirs)
+        self.index = [np.atleast_1d(np.asarray(i, dtype=int)) for i in index]
+        self.sshape = tuple(len(i) for i in self.index)
+        self.nFrames = int(np.prod(self.sshape)) if self.sshape else 1
+
+        self.starts = np.zeros(nDims, dtype=int)
+        self.stops = np.zeros(nDims, dtype=int)
+        self.steps = np.ones(nDims, dtype=int)
+        self.full = np.ones(nDims, dtype=bool)
+        constant = constant if constant else {}
+        for dim, sl in constant.iteritems():
+            self.__set_constant(dim, sl)
+
+        # grouping of frames into entries
+        self.bank = self.nFrames
+        self.group = 1
+        self.group_steps = {}
+        # frame splitting
+        self.split = []
+        self.nSplit = 1
+        # entry amendments
+        self.fix = []
+        self.pad_start = np.zeros(nDims, dtype=int)
+        self.pad_stop = np.zeros(nDims, dtype=int)
+        self.window = [0, self.__get_n_entries()]
+
+    def __set_constant(self, dim, sl):
+        if sl.start is None and sl.stop is None:
+            return
+        self.full[dim] = False
+        self.starts[dim] = sl.start
+        self.stops[dim] = sl.stop
+        self.steps[dim] = sl.step if sl.step else 1
+
+    def __len__(self):
+        return self.window[1] - self.window[0]
+
+    def __iter__(self):
+        for v in range(self.window[0], self.window[1]):
+            yield self._get_entry(v)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(len(self))
+            if step != 1:
+                raise Exception("A SliceList cannot be sliced with a step.")
+            new_list = self._copy()
+            new_list.window = \
+                [self.window[0] + start, self.window[0] + max(start, stop)]
+            return new_list
+        n = len(self)
+        if idx < 0:
+            idx += n
+        if idx < 0 or idx >= n:
+            raise IndexError("SliceList index out of range")
+        return self._get_entry(self.window[0] + idx)
+
+    def _copy(self):
+        return copy.deepcopy(self)
+
+    def __get_n_entries(self):
+        if not self.nFrames:
+            return 0
+        full_banks, rem = divmod(self.nFrames, self.bank)
+        per_bank = -(-self.bank // self.group)
+        return (full_banks*per_bank + -(-rem // self.group))*self.nSplit
+
+    def __get_frame_range(self, entry):
+        """ Get the first and last frame covered by a (pre-split) entry. """
+        per_bank = -(-self.bank // self.group)
+        bank, group = divmod(entry, per_bank)
+        first = bank*self.bank + group*self.group
+        bank_end = min((bank+1)*self.bank, self.nFrames)
+        last = min(first + self.group, bank_end) - 1
+        return first, last
+
+    def __get_frame_index(self, frame):
+        if not self.sshape:
+            return ()
+        return np.unravel_index(frame, self.sshape, order='F')
+
+    def _get_entry(self, v):
+        """ Create the slice tuple associated with the (unwindowed) entry v.
+        """
+        outer, inner = divmod(v, self.nSplit)
+        first, last = self.__get_frame_range(outer)
+        f_idx = self.__get_frame_index(first)
+        l_idx = self.__get_frame_index(last)
+
+        sl = [slice(None) if self.full[d] else
+              slice(self.starts[d], self.stops[d], self.steps[d])
+              for d in range(self.nDims)]
+
+        for i, dim in enumerate(self.slice_dirs):
+            start = self.index[i][f_idx[i]]
+            if dim in self.group_steps:
+                stop = self.index[i][l_idx[i]] + 1
+                sl[dim] = slice(start, stop, self.group_steps[dim])
+            else:
+                sl[dim] = slice(start, start + 1, 1)
+
+        for dim, entries, chunk in self.split:
+            sl[dim] = slice(*entries[(inner // chunk) % len(entries)])
+
+        for dim, length, entry in self.fix:
+            if entry is None or entry == v:
+                e = sl[dim]
+                if (e.stop - e.start) < length:
+                    sl[dim] = slice(e.start, e.start + length, e.step)
+
+        for dim in np.nonzero(self.pad_start | self.pad_stop)[0]:
+            e = sl[dim]
+            sl[dim] = slice(e.start + self.pad_start[dim],
+                            e.stop + self.pad_stop[dim], e.step)
+        return tuple(int_slice(s) for s in sl)
+
+    def _grouped(self, max_frames, group_dims, steps, bank=None):
+        """ Group consecutive frames, max_frames at a time, without crossing
+        a bank boundary.
+
+        :param int max_frames: The maximum number of frames in a group.
+        :param list(int) group_dims: Dimensions that span the whole group.
+        :param list(int) steps: The step associated with each group dim.
+        :keyword int bank: The number of frames in each bank (default all).
+        :returns: A new SliceList
+        :rtype: SliceList
+        """
+        new_list = self._copy()
+        new_list.group = max_frames
+        new_list.bank = bank if bank else max(self.nFrames, 1)
+        new_list.group_steps = dict(zip(group_dims, steps))
+        new_list.window = [0, new_list.__get_n_entries()]
+        return new_list
+
+    def _split_frames(self, split_list, shape):
+        """ Replace each entry with multiple entries, splitting the dimensions
+        in split_list (of the form 'dim.length') into sections.
+
+        :returns: A new SliceList
+        :rtype: SliceList
+        """
+        split = [map(int, a.split('.')) for a in split_list]
+        first = self[0]
+        new_list = self._copy()
+        chunk = 1
+        for dim, length in split:
+            sl = first[dim]
+            start = 0 if sl.start is None else sl.start
+            stop = shape[dim] if sl.stop is None else sl.stop
+            inc = length*sl.step if sl.step else length
+            entries = [(a, min(a+inc, stop)) for a in range(start, stop, inc)]
+            new_list.split.append((dim, entries, chunk))
+            chunk *= len(entries)
+        new_list.nSplit = chunk
+        new_list.window = [0, new_list.__get_n_entries()]
+        return new_list
+
+    def _fix_length(self, dim, length, last=False):
+        """ Ensure the entries have at least length values in dimension dim.
+
+        :keyword bool last: Only amend the final entry in the list.
+        """
+        entry = self.window[1] - 1 if last else None
+        self.fix.append((dim, length, entry))
+
+    def _pad(self, dim, inc_start, inc_stop, shape):
+        """ Increase the slice in dimension dim by inc_start at the start and
+        inc_stop at the end, for every entry. """
+        if self.full[dim] and dim not in self.slice_dirs:
+            self.__set_constant(dim, slice(0, shape[dim], 1))
+        self.pad_start[dim] += inc_start
+        self.pad_stop[dim] += inc_stop
+
+
+def int_slice(sl):
+    """ Convert numpy integer slice values to python ints. """
+    if sl.start is None and sl.stop is None:
+        return sl
+    step = sl.step if sl.step is None else int(sl.step)
+    return slice(int(sl.start), int(sl.stop), step)
@@ -19,12 +19,12 @@
 """
 from savu.plugins.driver.cpu_plugin import CpuPlugin
 
-import scipy.ndimage as ndi
 import math
 import logging
 import numpy as np
-import pyfftw.interfaces.scipy_fftpack as fft
+import pyfftw
 import scipy.ndimage.filters as filter
+from mpi4py import MPI
 
 from savu.plugins.utils import register_plugin
 from savu.plugins.filters.base_filter import BaseFilter
@@ -52,10 +52,27 @@ class VoCentering(BaseFilter, CpuPlugin):
         value from .nxs file else set to image centre. Default: None.
     :u*param search_area: Search area from horizontal approximate centre of \
         the image. Default: (-50, 50).
+    :param fit_order: The order of the polynomial, in the detector row, \
+        fitted to the centre values (0 for a constant centre, 1 for a tilted \
+        rotation axis). Default: 0.
+    :param outlier_threshold: Centre values that are further than this \
+        many (robust) standard deviations from the fit are rejected. \
+        Default: 3.0.
     """
 
     def __init__(self):
         super(VoCentering, self).__init__("VoCentering")
+        # the maximum size (bytes) of a batch of candidate sinograms
+        self.batch_bytes = 2**27
+
+    def pre_process(self):
+        self.mask_cache = {}
+        self.fft_cache = {}
+        self.fft_threads = \
+            int(self.exp.meta_data.get_dictionary().get('threads', 1))
+        self.slice_dirs = self.get_in_datasets()[0].get_slice_dimensions()
+        # the centre and metric sharpness of each frame, keyed on position
+        self.frame_info = {}
 
     def _create_mask(self, Nrow, Ncol, obj_radius):
         du = 1.0/Ncol
@@ -63,12 +80,12 @@ class VoCentering(BaseFilter, CpuPlugin):
         cen_row = int(np.ceil(Nrow/2)-1)
         cen_col = int(np.ceil(Ncol/2)-1)
         drop = self.parameters['row_drop']
-        mask = np.zeros((Nrow, Ncol), dtype=np.float32)
-        for i in range(Nrow):
-            num1 = np.round(((i-cen_row)*dv/obj_radius)/du)
-            p1, p2 = (np.clip(np.sort((-num1+cen_col, num1+cen_col)),
-                              0, Ncol-1)).astype(int)
-            mask[i, p1:p2+1] = np.ones(p2-p1+1, dtype=np.float32)
+        num1 = np.round(((np.arange(Nrow)-cen_row)*dv/obj_radius)/du)
+        p1 = np.clip(np.minimum(-num1+cen_col, num1+cen_col), 0, Ncol-1)
+        p2 = np.clip(np.maximum(-num1+cen_col, num1+cen_col), 0, Ncol-1)
+        cols = np.arange(Ncol)
+        mask = ((cols >= p1.astype(int)[:, None]) &
+                (cols <= p2.astype(int)[:, None])).astype(np.float32)
 
         if drop < cen_row:
             mask[cen_row-drop:cen_row+drop+1, :] = \
@@ -76,6 +93,71 @@ class VoCentering(BaseFilter, CpuPlugin):
         mask[:, cen_col-1:cen_col+2] = np.zeros((Nrow, 3), dtype=np.float32)
         return mask
 
+    def _get_weights(self, Nrow, Ncol, obj_radius):
+        """ Get the mask, in the layout of the output of a real 2D FFT, that
+        gives the metric sum(abs(fftshift(fft2(sino)))*mask) of a real
+        sinogram.  The masks are cached for each sinogram shape.
+
+        The spectrum of a real sinogram is conjugate symmetric, so the
+        missing half of the spectrum is accounted for by adding the mask
+        value at the mirrored frequency.
+        """
+        key = (Nrow, Ncol, obj_radius)
+        if key not in self.mask_cache:
+            mask = np.fft.ifftshift(self._create_mask(Nrow, Ncol, obj_radius))
+            nCols = Ncol//2 + 1
+            mirror = np.roll(np.roll(mask[::-1, ::-1], 1, 0), 1, 1)[:, :nCols]
+            weights = mask[:, :nCols].copy()
+            # columns 0 and Ncol/2 (for even Ncol) are their own mirror
+            paired = slice(1, nCols - 1 if Ncol % 2 == 0 else nCols)
+            weights[:, paired] += mirror[:, paired]
+            self.mask_cache[key] = weights
+        return self.mask_cache[key]
+
+    def _get_fft(self, kind, shape, dtype, **kwargs):
+        """ Get a (cached) pyFFTW object, so the FFTW plan is only created
+        once for each transform shape. """
+        key = (kind, shape)
+        if key not in self.fft_cache:
+            array = pyfftw.n_byte_align_empty(shape, 16, dtype)
+            self.fft_cache[key] = getattr(pyfftw.builders, kind)(
+                array, threads=self.fft_threads, **kwargs)
+        return self.fft_cache[key]
+
+    def _get_batch_size(self, n_candidates, frame_shape):
+        frame_bytes = np.prod(frame_shape)*np.dtype(np.float32).itemsize
+        return int(max(1, min(n_candidates, self.batch_bytes//frame_bytes)))
+
+    def _get_metrics(self, n_candidates, Nrow, Ncol, obj_radius, fill):
+        """ Calculate the metric of each candidate sinogram, in batches that
+        are transformed together with a single real 2D FFT.
+
+        :param int n_candidates: The number of candidate sinograms.
+        :param int Nrow: The number of rows in the sinogram.
+        :param int Ncol: The number of columns in the (joined) sinogram.
+        :param float obj_radius: The radius used to create the mask.
+        :param fill: A function fill(batch, start, stop) that populates the \
+            flipped (lower) half of the joined sinograms for the candidates \
+            start to stop.
+        :returns: The metric of each candidate.
+        :rtype: np.ndarray
+        """
+        shape = (2*Nrow-1, Ncol)
+        weights = self._get_weights(shape[0], shape[1], obj_radius)
+        nBatch = self._get_batch_size(n_candidates, shape)
+        rfft2 = self._get_fft('rfftn', (nBatch,) + shape, np.float32,
+                              axes=(1, 2))
+        metrics = np.zeros(n_candidates, dtype=np.float32)
+        for start in range(0, n_candidates, nBatch):
+            stop = min(start + nBatch, n_candidates)
+            batch = rfft2.input_array
+            fill(batch, start, stop)
+            batch[stop-start:] = 0
+            spectrum = np.abs(rfft2())
+            metrics[start:stop] = \
+                np.sum(spectrum[:stop-start]*weights, axis=(1, 2))
+        return metrics
+
     def _get_start_shift(self, centre):
         in_mData = self.get_in_meta_data()[0]
         if self.parameters['start_pixel'] is not None:
@@ -97,26 +179,24 @@ class VoCentering(BaseFilter, CpuPlugin):
         # Copy the sinogram and flip left right, the purpose is to make a full
         # [0;2Pi] sinogram
         sino2 = np.fliplr(sino[1:])
-        # This image is used for compensating the shift of sino2
-        compensateimage = np.zeros((Nrow-1, Ncol), dtype=np.float32)
-        # Start coarse search in which the shift step is 1
-        compensateimage[:] = sino[-1]
         start_shift = self._get_start_shift(centre_fliplr)*2
         list_shift = np.arange(smin, smax + 1)*2 - start_shift
-        list_metric = np.zeros(len(list_shift), dtype=np.float32)
-        mask = self._create_mask(2*Nrow-1, Ncol,
-                                 0.5*self.parameters['ratio']*Ncol)
-
-        count = 0
-        for i in list_shift:
-            sino2a = np.roll(sino2, i, axis=1)
-            if i >= 0:
-                sino2a[:, 0:i] = compensateimage[:, 0:i]
-            else:
-                sino2a[:, i:] = compensateimage[:, i:]
-            list_metric[count] = np.sum(
-                np.abs(fft.fftshift(fft.fft2(np.vstack((sino, sino2a)))))*mask)
-            count += 1
+        cols = np.arange(Ncol)
+
+        def fill(batch, start, stop):
+            # sino2 rolled by each shift, with the columns that wrap around
+            # replaced by the last row of the sinogram
+            idx = cols - list_shift[start:stop, None]
+            valid = (idx >= 0) & (idx < Ncol)
+            batch[:stop-start, :Nrow] = sino
+            batch[:stop-start, Nrow:] = np.where(
+                valid[:, None, :],
+                np.transpose(sino2[:, np.clip(idx, 0, Ncol-1)], (1, 0, 2)),
+                sino[-1])
+
+        list_metric = self._get_metrics(
+            len(list_shift), Nrow, Ncol, 0.5*self.parameters['ratio']*Ncol,
+            fill)
         minpos = np.argmin(list_metric)
         rot_centre = centre_fliplr + list_shift[minpos]/2.0
         return rot_centre, list_metric
@@ -136,22 +216,36 @@ class VoCentering(BaseFilter, CpuPlugin):
         else:
             lefttake = np.ceil(raw_cor-(Ncol-1-raw_cor)+search_rad+1)
             righttake = np.floor(Ncol-1-search_rad-1)
-        Ncol1 = int(righttake-lefttake + 1)
-        mask = self._create_mask(2*Nrow-1, Ncol1,
-                                 0.5*self.parameters['ratio']*Ncol)
+        lefttake, righttake = int(lefttake), int(righttake)
+        Ncol1 = righttake - lefttake + 1
         numshift = np.int16((2*search_rad)/self.parameters['step'])+1
         listshift = np.linspace(-search_rad, search_rad, num=numshift)
-        listmetric = np.zeros(len(listshift), dtype=np.float32)
-        num1 = 0
-        factor1 = np.mean(sino[-1,lefttake:righttake])
-        for i in listshift:
-            sino2a = ndi.interpolation.shift(sino2, (0, i), prefilter=False)
-            factor2 = np.mean(sino2a[0,lefttake:righttake])
-            sino2a = sino2a*factor1/factor2
-            sinojoin = np.vstack((sino, sino2a))
-            listmetric[num1] = np.sum(np.abs(fft.fftshift(
-                fft.fft2(sinojoin[:, int(lefttake):int(righttake) + 1])))*mask)
-            num1 = num1 + 1
+        factor1 = np.mean(sino[-1, lefttake:righttake])
+
+        # The sub-pixel shifts are applied as phase ramps to the spectrum of
+        # the symmetrically extended (so periodic and continuous) sinogram.
+        sino2_ext = np.hstack((sino2, np.fliplr(sino2))).astype(np.float32)
+        rfft = self._get_fft('rfft', sino2_ext.shape, np.float32)
+        sino2_fft = rfft(sino2_ext).copy()
+        ramp = np.exp(-2j*np.pi*np.fft.rfftfreq(2*Ncol)[None, :] *
+                      listshift[:, None]).astype(np.complex64)
+        nBatch = self._get_batch_size(len(listshift), (2*Nrow-1, Ncol1))
+        irfft = self._get_fft('irfft', (nBatch,) + sino2_fft.shape,
+                              np.complex64, n=2*Ncol)
+        crop = slice(lefttake, righttake + 1)
+
+        def fill(batch, start, stop):
+            n = stop - start
+            irfft.input_array[:n] = sino2_fft*ramp[start:stop, None, :]
+            sino2a = irfft()[:n]
+            factor2 = np.mean(sino2a[:, 0, lefttake:righttake], axis=1)
+            batch[:n, :Nrow] = sino[:, crop]
+            batch[:n, Nrow:] = sino2a[:, :, crop] * \
+                (factor1/factor2)[:, None, None]
+
+        listmetric = self._get_metrics(
+            len(listshift), Nrow, Ncol1, 0.5*self.parameters['ratio']*Ncol,
+            fill)
         minpos = np.argmin(listmetric)
         rotcenter = raw_cor + listshift[minpos]/2.0
         return rotcenter, listmetric
@@ -167,21 +261,114 @@ class VoCentering(BaseFilter, CpuPlugin):
         sino_fs = filter.median_filter(data[0], (2, 2))
         (cor, listmetric) = self._fine_search(sino_fs, raw_cor)
         logging.debug("%d %d", raw_cor, cor)
+        sl = self.get_current_slice_list()[0]
+        # the frames that pad the final transfer block repeat the final
+        # slice, so each position is only recorded once
+        position = tuple(sl[d].start for d in self.slice_dirs)
+        self.frame_info[position] = (cor, self._get_sharpness(raw_metric))
         return [np.array([cor]), np.array([cor])]
 
+    def _get_sharpness(self, metric):
+        """ The depth of the minimum of the coarse metric curve relative to
+        its median: 0 for a flat curve (no reliable minimum), approaching 1
+        for a sharp minimum. """
+        median = np.median(metric)
+        if median <= 0:
+            return 0.0
+        return float(max(0.0, 1.0 - np.min(metric)/median))
+
     def post_process(self):
-        # do some curve fitting here
         in_datasets, out_datasets = self.get_datasets()
-
         cor_raw = np.squeeze(out_datasets[0].data[...])
-        cor_fit = out_datasets[1].data[...]
-        fit = np.zeros(cor_fit.shape)
-        fit[:] = np.mean(cor_raw)
-        cor_fit = fit
-        out_datasets[1].data[:] = cor_fit[:]
+
+        frame_info = self.frame_info
+        if self.exp.meta_data.get('mpi') is True:
+            frame_info = {}
+            for info in MPI.COMM_WORLD.allgather(self.frame_info):
+                frame_info.update(info)
+        position = sorted(frame_info.keys())
+        cor, sharpness = [np.array(v, dtype=np.float64) for v in
+                          zip(*[frame_info[p] for p in position])]
+        position = np.array(position, dtype=np.float64).reshape(len(cor), -1)
+
+        # the detector row (or first slice dimension) of the frames
+        row_idx = self.__get_row_index()
+        rows = position[:, row_idx]
+        inliers = self._reject_outliers(rows, cor, sharpness)
+        all_rows = np.unravel_index(
+            np.arange(self.orig_shape[0]),
+            np.array(self.orig_full_shape)[list(self.slice_dirs)],
+            order='F')[row_idx]
+        cor_fit, cor_error = \
+            self._fit_centre(rows[inliers], cor[inliers],
+                             sharpness[inliers], all_rows)
+        if not np.all(inliers):
+            logging.warn("VoCentering rejected the centre values %s at rows "
+                         "%s", cor[~inliers], rows[~inliers])
+
+        out_datasets[1].data[:] = cor_fit[:, None]
 
         self.populate_meta_data('cor_raw', cor_raw)
+        self.populate_meta_data('cor_sharpness', sharpness)
+        self.populate_meta_data('cor_inliers', inliers)
         self.populate_meta_data('centre_of_rotation', cor_fit)
+        self.populate_meta_data('cor_error', cor_error)
+
+    def __get_row_index(self):
+        in_data = self.get_in_datasets()[0]
+        try:
+            row_dim = in_data.get_data_dimension_by_axis_label('detector_y')
+        except Exception:
+            return 0
+        return list(self.slice_dirs).index(row_dim) if \
+            row_dim in self.slice_dirs else 0
+
+    def _reject_outliers(self, rows, cor, sharpness):
+        """ Iteratively fit the centre values and reject those that are
+        more than outlier_threshold robust standard deviations (from the
+        median absolute deviation) from the fit.  Frames with a flat metric
+        curve are rejected unless every frame is flat.
+
+        :returns: A boolean array that is True for the accepted values.
+        :rtype: np.ndarray
+        """
+        valid = sharpness > 0
+        if not np.any(valid):
+            valid = np.ones(len(cor), dtype=bool)
+        inliers = valid
+        thresh = self.parameters['outlier_threshold']
+        for i in range(10):
+            order = min(self.parameters['fit_order'], np.sum(inliers) - 1)
+            coeffs = np.polyfit(rows[inliers], cor[inliers], order,
+                                w=sharpness[inliers] + 1e-6)
+            resid = np.abs(cor - np.polyval(coeffs, rows))
+            sigma = 1.4826*np.median(resid[inliers])
+            # the step of the fine search limits the precision
+            new = valid & (resid <= max(thresh*sigma, self.parameters['step']))
+            if not np.any(new) or np.array_equal(new, inliers):
+                break
+            inliers = new
+        return inliers
+
+    def _fit_centre(self, rows, cor, sharpness, all_rows):
+        """ Fit a polynomial in the detector row to the centre values,
+        weighted by the sharpness of the metric curve.
+
+        :returns: The fitted centre and its standard error for all rows.
+        :rtype: tuple(np.ndarray, np.ndarray)
+        """
+        order = min(self.parameters['fit_order'], len(cor) - 1)
+        w = sharpness + 1e-6
+        w = w/np.mean(w)
+        A = np.vander(rows, order + 1)*np.sqrt(w)[:, None]
+        coeffs = np.linalg.lstsq(A, cor*np.sqrt(w), rcond=-1)[0]
+        resid = cor - np.polyval(coeffs, rows)
+        dof = len(cor) - order - 1
+        s2 = np.sum(w*resid**2)/dof if dof > 0 else 0.0
+        cov = s2*np.linalg.pinv(np.dot(A.T, A))
+        V = np.vander(np.asarray(all_rows, dtype=np.float64), order + 1)
+        error = np.sqrt(np.sum(np.dot(V, cov)*V, axis=1))
+        return np.polyval(coeffs, all_rows), error
 
     def populate_meta_data(self, key, value):
         datasets = self.parameters['datasets_to_populate']
@@ -42,6 +42,12 @@ class DarkFlatFieldCorrection(BaseCorrection, CpuPlugin):
     :param warn_proportion: Output a warning if this proportion of values, \
         or greater, are below and/or above the lower/upper bounds, \
         e.g enter 0.05 for 5%. Default: 0.05.
+    :param log: Take the -log of the corrected data (as applied by the \
+        reconstruction plugins), so it is only transformed once. \
+        Default: False.
+
+    :config_warn: If 'log' is True, the 'log' parameter in the \
+    reconstruction should be set to FALSE.
     """
 
     def __init__(self):
@@ -57,50 +63,47 @@ class DarkFlatFieldCorrection(BaseCorrection, CpuPlugin):
         self.dark = inData.meta_data.get('dark')
         self.flat = inData.meta_data.get('flat')
 
-        pData_shape = in_pData.get_shape()
-        tile = [1]*len(pData_shape)
         rot_dim = inData.get_data_dimension_by_axis_label('rotation_angle')
         self.slice_dir = in_pData.get_slice_dimension()
 
+        # the reciprocal is calculated once, so the correction is a multiply
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.inv_flat_minus_dark = 1.0/(self.flat - self.dark)
+
         if self.parameters['pattern'] == 'PROJECTION':
-            self._proj_pre_process(inData, pData_shape, tile, rot_dim)
+            self._proj_pre_process(inData, rot_dim)
         elif self.parameters['pattern'] == 'SINOGRAM':
-            self._sino_pre_process(inData, tile, rot_dim)
+            self._sino_pre_process(inData, rot_dim)
 
-        self.flat_minus_dark = self.flat - self.dark
         self.warn = self.parameters['warn_proportion']
         self.low = self.parameters['lower_bound']
         self.high = self.parameters['upper_bound']
 
-    def _proj_pre_process(self, data, shape, tile, dim):
-        tile[dim] = shape[dim]
-        self.convert_size = lambda x: np.tile(x, tile)
+    def _proj_pre_process(self, data, dim):
+        # the dark and flat images broadcast against the projections
+        self.convert_size = lambda x: x
         self.process_frames = self.correct_proj
 
-    def _sino_pre_process(self, data, tile, dim):
+    def _sino_pre_process(self, data, dim):
         full_shape = data.get_shape()
-        tile[dim] = full_shape[dim]
         self.process_frames = self.correct_sino
         self.length = full_shape[self.slice_dir]
         if len(full_shape) is 3:
-            self.convert_size = lambda a, b, x: np.tile(x[a:b], tile)
+            self.convert_size = \
+                lambda a, b, x: np.expand_dims(x[a:b], dim)
         else:
             nSino = \
                 full_shape[data.get_data_dimension_by_axis_label('detector_y')]
             self.convert_size = \
-                lambda a, b, x: np.tile(x[a % nSino:b], tile)
+                lambda a, b, x: np.expand_dims(x[a % nSino:b], dim)
         self.count = 0
 
     def correct_proj(self, data):
-        data = data[0]
         dark = self.convert_size(self.dark)
-        flat_minus_dark = self.convert_size(self.flat_minus_dark)
-        data = np.nan_to_num((data-dark)/flat_minus_dark)
-        self.__data_check(data)
-        return data
+        inv_flat_minus_dark = self.convert_size(self.inv_flat_minus_dark)
+        return self.__correct(data[0], dark, inv_flat_minus_dark)
 
     def correct_sino(self, data):
-        data = data[0]
         sl = self.get_current_slice_list()[0][self.slice_dir]
         nFrames = min(self.get_max_frames(), self.length)
         reps_at = int(np.ceil(self.length/float(nFrames)))
@@ -109,12 +112,35 @@ class DarkFlatFieldCorrection(BaseCorrection, CpuPlugin):
         end = start + len(np.arange(sl.start, sl.stop, sl.step))
 
         dark = self.convert_size(start, end, self.dark)
-        flat_minus_dark = \
-            self.convert_size(start, end, self.flat_minus_dark)
-        data = np.nan_to_num((data-dark)/flat_minus_dark)
-        self.__data_check(data)
+        inv_flat_minus_dark = \
+            self.convert_size(start, end, self.inv_flat_minus_dark)
         self.count += 1
-        return data
+        return self.__correct(data[0], dark, inv_flat_minus_dark)
+
+    def __correct(self, data, dark, inv_flat_minus_dark):
+        """ Apply the correction (data - dark)/(flat - dark), the clipping to
+        the bounds and, optionally, the -log in place in the output array.
+        """
+        out = self.get_output_buffer()
+        if out is None or out.shape != data.shape:
+            out = np.empty(data.shape, dtype=np.float32)
+        with np.errstate(invalid='ignore', over='ignore'):
+            np.subtract(data, dark, out=out, casting='unsafe')
+            np.multiply(out, inv_flat_minus_dark, out=out, casting='unsafe')
+        self.__nan_to_num(out)
+        self.__data_check(out)
+        if self.parameters['log']:
+            out += 1
+            with np.errstate(divide='ignore', invalid='ignore'):
+                np.log(out, out=out)
+            np.negative(out, out=out)
+        return out
+
+    def __nan_to_num(self, data):
+        """ An in place equivalent of np.nan_to_num. """
+        np.copyto(data, 0, where=np.isnan(data))
+        limit = np.finfo(data.dtype).max
+        np.clip(data, -limit, limit, out=data)
 
     def fixed_flag(self):
         if self.parameters['pattern'] == 'PROJECTION':
@@ -129,17 +155,17 @@ class DarkFlatFieldCorrection(BaseCorrection, CpuPlugin):
             return
 
         if self.low:
-            low_crop = data < self.parameters['lower_bound']
-            if ((float(low_crop.sum()) / low_crop.size) > self.warn):
+            n_low = np.count_nonzero(data < self.low)
+            if (float(n_low) / data.size) > self.warn:
                 self.flag_low_warning = True
             # Set all cropped values to the crop level
-            data[low_crop] = self.parameters['lower_bound']
+            np.maximum(data, self.low, out=data)
         if self.high:
-            high_crop = data > self.parameters['upper_bound']
-            if ((float(high_crop.sum()) / high_crop.size) > self.warn):
+            n_high = np.count_nonzero(data > self.high)
+            if (float(n_high) / data.size) > self.warn:
                 self.flag_high_warning = True
             # Set all cropped values to the crop level
-            data[low_crop] = self.parameters['lower_bound']
+            np.minimum(data, self.high, out=data)
 
     def executive_summary(self):
         summary = []
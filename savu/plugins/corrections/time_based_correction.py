@@ -60,6 +60,7 @@ class TimeBasedCorrection(BaseCorrection, CpuPlugin):
 
         inData.meta_data.set('multiple_dark', self.dark)
         inData.meta_data.set('multiple_flat', self.flat)
+        self.field_cache = {}
 
     def calc_average(self, data, key):
         idx = np.where(np.diff(key) > 1)[0]
@@ -76,23 +77,57 @@ class TimeBasedCorrection(BaseCorrection, CpuPlugin):
     def process_frames(self, data):
         data = data[0]
         frames = self._get_frames()
+        flat = self.get_weights(self.flat_idx, frames)
+        dark = self.get_weights(self.dark_idx, frames)
         output = np.empty(data.shape, dtype=np.float32)
-        nSlices = data.shape[self.slice_dir]
-        for i in range(nSlices):
-            self.sslice[self.slice_dir] = i
-            proj = data[tuple(self.sslice)]
-            flat = self.calculate_flat_field(
-                frames[i], proj, *self.find_nearest_frames(
-                    self.flat_idx, frames[i]))
-            dark = self.calculate_dark_field(
-                *self.find_nearest_frames(self.dark_idx, frames[i]))
 
+        # consecutive frames that lie between the same dark and flat fields
+        # are corrected together
+        pairs = np.array([flat[0], flat[1], dark[0], dark[1]])
+        breaks = list(np.where(np.any(np.diff(pairs) != 0, axis=0))[0] + 1)
+        for start, end in zip([0] + breaks, breaks + [len(frames)]):
+            self.sslice[self.slice_dir] = slice(start, end)
+            sl = tuple(self.sslice)
+            proj = data[sl]
+            flat_field = self._get_flat_field(flat, frames, proj, start, end)
+            dark_field = self.__interpolate('dark', dark, start, end)
             if self.parameters['in_range']:
-                proj = self.in_range(proj, flat)
+                proj = np.minimum(proj, flat_field)
             # perform correction
-            output[self.sslice] = np.nan_to_num((proj-dark)/(flat-dark))
+            output[sl] = \
+                np.nan_to_num((proj-dark_field)/(flat_field-dark_field))
         return output
 
+    def _get_flat_field(self, weights, frames, data, start, end):
+        """ Get the flat field for a run of frames that lie between the same
+        two flat fields.
+
+        :param tuple weights: The output of get_weights for the flat fields.
+        :param ndarray frames: Frame indices of the projections.
+        :param ndarray data: The projections in the run.
+        :returns: The flat field, broadcastable against the data.
+        :rtype: ndarray
+        """
+        return self.__interpolate('flat', weights, start, end)
+
+    def __interpolate(self, name, weights, start, end):
+        """ Linearly interpolate the dark or flat fields for a run of frames
+        that lie between the same two fields.  The fields (and the difference
+        between them) are cached for each pair.
+        """
+        lower, upper, weight = \
+            weights[0][start], weights[1][start], weights[2][start:end]
+        key = (name, lower, upper)
+        if key not in self.field_cache:
+            fields = getattr(self, name)
+            self.field_cache[key] = \
+                (np.expand_dims(fields[lower], self.slice_dir),
+                 np.expand_dims(fields[upper] - fields[lower], self.slice_dir))
+        field, diff = self.field_cache[key]
+        shape = [1]*field.ndim
+        shape[self.slice_dir] = end - start
+        return field + weight.reshape(shape)*diff
+
     def in_range(self, data, flat):
         data[data > flat] = flat[data > flat]
         return data
@@ -103,19 +138,34 @@ class TimeBasedCorrection(BaseCorrection, CpuPlugin):
         inData = self.get_in_datasets()[0]
         return inData.data.get_index(0, full=True)[np.array(frames)]
 
+    def get_weights(self, idx_list, frames):
+        """ Find the two entries in 'idx_list' that each frame lies between \
+            and the linear interpolation weight of the second entry.
+
+        :param list idx_list: (start, end) frame indices of each group of \
+            dark or flat fields.
+        :param ndarray frames: Frame indices of the projections.
+        :returns: The indices of the preceding and following groups and \
+            the weights.  Frames outside the range of the groups use the \
+            nearest group only.
+        :rtype: tuple(ndarray, ndarray, ndarray)
+        """
+        bounds = np.array(idx_list)
+        frames = np.asarray(frames)
+        upper = np.searchsorted(bounds[:, 0], frames, side='right')
+        lower = np.clip(upper - 1, 0, len(bounds) - 1)
+        upper = np.clip(upper, 0, len(bounds) - 1)
+        start = bounds[lower, 1] - 1
+        length = np.maximum(bounds[upper, 0] - start, 1).astype(np.float64)
+        weight = np.where(lower == upper, 0.0, (frames - start)/length)
+        return lower, upper, weight
+
     def find_nearest_frames(self, idx_list, value):
         """ Find the index of the two entries that 'value' lies between in \
-            'idx_list' and calculate the distance between each of them.
+            'idx_list' and calculate the interpolation weight of each of them.
         """
-        start_array = np.array([idx_list[i][0] for i in range(len(idx_list))])
-        end_array = np.array([idx_list[i][1] for i in range(len(idx_list))])
-        idx = (np.abs(start_array - value)).argmin()
-        idx2 = idx+1 if start_array[idx] < value else idx-1
-        nearest = list(set([idx, idx2]))
-        rrange = [end_array[nearest[0]]-1, start_array[nearest[1]]]
-        length = float(rrange[1] - rrange[0])
-        distance = [(value - rrange[0])/length, (rrange[1] - value)/length]
-        return nearest, distance
+        lower, upper, weight = self.get_weights(idx_list, [value])
+        return [lower[0], upper[0]], [1 - weight[0], weight[0]]
 
     def calculate_flat_field(self, frame, data, frames, distance):
         return self.flat[frames[0]]*distance[0] + \
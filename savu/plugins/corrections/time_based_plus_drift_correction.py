@@ -52,6 +52,17 @@ class TimeBasedPlusDriftCorrection(TimeBasedCorrection, CpuPlugin):
         #self.template = self.flat[0][10:20, 10:20]
         self.drift = self.calculate_flat_field_drift(self.template)
 
+    def _get_flat_field(self, weights, frames, data, start, end):
+        """ The flat field is matched to each projection individually. """
+        lower, upper, weight = weights
+        flats = []
+        for i in range(start, end):
+            proj = np.take(data, i - start, axis=self.slice_dir)
+            flats.append(self.calculate_flat_field(
+                frames[i], proj, [lower[i], upper[i]],
+                [1 - weight[i], weight[i]]))
+        return np.stack(flats, axis=self.slice_dir)
+
     def calculate_flat_field_drift(self, template):
         drift = []
         for i in range(len(self.flat)-1):
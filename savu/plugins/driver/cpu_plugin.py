@@ -35,3 +35,11 @@ class CpuPlugin(PluginDriver):
     def _run_plugin(self, exp, transport):
         self._run_plugin_instances(transport)
         return
+
+    def _get_n_threads(self):
+        """ Thread-safe plugins process their frames in a pool of threads if
+        requested (--threads), otherwise the frames are processed serially.
+        """
+        if not self.thread_safe():
+            return 1
+        return int(self.exp.meta_data.get_dictionary().get('threads', 1))
@@ -77,6 +77,11 @@ class PluginDriver(object):
         for j in range(len(out_data)):
             out_data[j].set_shape(out_data[j].data.shape)
 
+    def _get_n_threads(self):
+        """ The number of threads used to process the frames of each
+        transfer block on this process. """
+        return 1
+
     def __get_local_dict(self):
         """ Gets the local variables of the class minus those from the Plugin
         class. """
@@ -23,6 +23,7 @@
 
 """
 
+import threading
 import numpy as np
 
 import scipy.signal.signaltools as sig
@@ -45,6 +46,7 @@ class DezingFilter(BaseFilter, CpuPlugin):
     def __init__(self):
         super(DezingFilter, self).__init__("DezingFilter")
         self.zinger_proportion = 0.0
+        self._lock = threading.Lock()
 
     def pre_process(self):
         inData = self.get_in_datasets()[0]
@@ -65,9 +67,9 @@ class DezingFilter(BaseFilter, CpuPlugin):
         median_result = sig.medfilt(data, self._kernel)
         differrence = np.abs(data-median_result)
         replace_mask = differrence > self.parameters['outlier_mu']
-        self.zinger_proportion = \
-            max(self.zinger_proportion, np.sum(replace_mask)/(
-                np.size(replace_mask)*1.0))
+        proportion = np.sum(replace_mask)/(np.size(replace_mask)*1.0)
+        with self._lock:
+            self.zinger_proportion = max(self.zinger_proportion, proportion)
         result[replace_mask] = median_result[replace_mask]
         return result
 
@@ -77,6 +79,9 @@ class DezingFilter(BaseFilter, CpuPlugin):
     def get_max_frames(self):
         return 'multiple'
 
+    def thread_safe(self):
+        return True
+
     def raw_data(self):
         return True
 
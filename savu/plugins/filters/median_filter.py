@@ -60,3 +60,6 @@ class MedianFilter(BaseFilter, CpuPlugin):
 
     def get_plugin_pattern(self):
         return self.parameters['pattern']
+
+    def thread_safe(self):
+        return True
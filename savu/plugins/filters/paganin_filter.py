@@ -122,6 +122,9 @@ class PaganinFilter(BaseFilter, CpuPlugin):
     def get_max_frames(self):
         return 'single'
 
+    def thread_safe(self):
+        return True
+
     def get_citation_information(self):
         cite_info = CitationInformation()
         cite_info.description = \
@@ -20,6 +20,7 @@
 .. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
 """
 import logging
+import threading
 import numpy as np
 import pyfftw
 import pyfftw.interfaces.numpy_fft as fft
@@ -46,6 +47,8 @@ class RavenFilter(BaseFilter, CpuPlugin):
         logging.debug("Starting Raven Filter")
         super(RavenFilter, self).__init__("RavenFilter")
         self.count = 0
+        self._fft_state = threading.local()
+        self._plan_lock = threading.Lock()
 
     def set_filter_padding(self, in_data, out_data):
         self.pad = self.parameters['padFT']
@@ -74,21 +77,31 @@ class RavenFilter(BaseFilter, CpuPlugin):
         filtershapepad2d = np.zeros((self.row2 - self.row1, filtershape.size))
         filtershapepad2d[:] = np.float64(filtershape)
         self.filtercomplex = filtershapepad2d + filtershapepad2d*1j
-
-        a = pyfftw.n_byte_align_empty((height1, width1), 16, 'complex128')
-        b = pyfftw.n_byte_align_empty((height1, width1), 16, 'complex128')
-        c = pyfftw.n_byte_align_empty((height1, width1), 16, 'complex128')
-        d = pyfftw.n_byte_align_empty((height1, width1), 16, 'complex128')
-        self.fft_object = pyfftw.FFTW(a, b, axes=(0, 1))
-        self.ifft_object = pyfftw.FFTW(c, d, axes=(0, 1),
-                                       direction='FFTW_BACKWARD')
+        self.fft_shape = (height1, width1)
+        self._fft_state = threading.local()
+
+    def _get_fft_objects(self):
+        """ Get the FFTW objects for the current thread, creating them on
+        first use.  The FFTW planner is not thread-safe. """
+        state = self._fft_state
+        if not hasattr(state, 'fft_object'):
+            arrays = [pyfftw.n_byte_align_empty(
+                self.fft_shape, 16, 'complex128') for i in range(4)]
+            with self._plan_lock:
+                state.fft_object = pyfftw.FFTW(arrays[0], arrays[1],
+                                               axes=(0, 1))
+                state.ifft_object = pyfftw.FFTW(arrays[2], arrays[3],
+                                                axes=(0, 1),
+                                                direction='FFTW_BACKWARD')
+        return state.fft_object, state.ifft_object
 
     def process_frames(self, data):
-        sino = fft.fftshift(self.fft_object(data[0]))
+        fft_object, ifft_object = self._get_fft_objects()
+        sino = fft.fftshift(fft_object(data[0]))
         sino[self.row1:self.row2] = \
             sino[self.row1:self.row2] * self.filtercomplex
         sino = fft.ifftshift(sino)
-        return self.ifft_object(sino).real
+        return ifft_object(sino).real
 
     def get_plugin_pattern(self):
         return 'SINOGRAM'
@@ -96,6 +109,9 @@ class RavenFilter(BaseFilter, CpuPlugin):
     def get_max_frames(self):
         return 'single'
 
+    def thread_safe(self):
+        return True
+
     def get_citation_information(self):
         cite_info = CitationInformation()
         cite_info.description = \
@@ -66,7 +66,10 @@ class ThresholdFilter(BaseFilter, CpuPlugin):
         logging.debug("Data frame recieved for processing of shape %s",
                       str(data.shape))
 
-        result = numpy.zeros(data.shape, dtype=data.dtype)
+        result = self.get_output_buffer()
+        if result is None or result.shape != data.shape:
+            result = numpy.empty(data.shape, dtype=data.dtype)
+        result[...] = 0
 
         result[data < self.threshold] = self.lowest
         result[data >= self.threshold] = self.highest
@@ -62,6 +62,25 @@ class BaseLoader(Plugin):
         data_obj.get_preview().set_preview(pDict['preview'])
         self.reduction_flag = True
 
+    def _add_patterns(self, data_obj, pattern_list):
+        """ Add patterns to a dataset from a list of pattern strings.
+
+        :param Data data_obj: The dataset.
+        :param list(str) pattern_list: Patterns of the form \
+            'SINOGRAM.0c.1s.2c', where 'c' and 's' represent core and slice \
+            dimensions respectively.
+        """
+        for p in pattern_list:
+            p_split = p.split('.')
+            name = p_split[0]
+            dims = p_split[1:]
+            core_dims = tuple([int(i[0]) for i in [d.split('c') for d in dims]
+                              if len(i) == 2])
+            slice_dims = tuple([int(i[0]) for i in [d.split('s') for d in dims]
+                               if len(i) == 2])
+            data_obj.add_pattern(
+                    name, core_dims=core_dims, slice_dims=slice_dims)
+
     def get_NXapp(self, ltype, nx_file, entry):
         '''
         finds an application definition in a nexus file
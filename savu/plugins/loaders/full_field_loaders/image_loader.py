@@ -43,6 +43,10 @@ class ImageLoader(BaseLoader):
     :param data_prefix: A file prefix for the data file. Default: None.
     :param dark_prefix: A file prefix for the dark field files. Default: None.
     :param flat_prefix: A file prefix for the flat field files. Default: None.
+    :param sinogram_store: Decode the images once and store them in sinogram \
+        order in the intermediate folder, so that processing with the \
+        SINOGRAM pattern does not decode every image for each block of \
+        sinograms. Default: False.
     """
 
     def __init__(self, name='ImageLoader'):
@@ -69,6 +73,10 @@ class ImageLoader(BaseLoader):
         data_prefix = self.parameters['data_prefix']
         data_obj.data = FabIO(path, data_obj, [self.parameters['frame_dim']],
                               None, data_prefix)
+        if self.parameters['sinogram_store']:
+            data_obj.data._create_sinogram_store(
+                exp.meta_data.get('inter_path'),
+                self.parameters['dataset_name'])
 
         self.set_rotation_angles(data_obj)
         # read dark and flat images
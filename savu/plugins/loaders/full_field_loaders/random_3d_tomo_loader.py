@@ -59,13 +59,18 @@ class Random3dTomoLoader(RandomHdf5Loader):
         data_obj.set_shape(data_obj.data.shape)
         self.set_data_reduction_params(data_obj)
         data_obj.data._set_dark_and_flat()
-        data_obj.data.update_dark(np.zeros(data_obj.data.dark().shape))
-        data_obj.data.update_flat(np.ones(data_obj.data.flat().shape))
+        # phantom data is generated with dark and flat fields
+        if self.parameters['generator'] == 'random':
+            data_obj.data.update_dark(np.zeros(data_obj.data.dark().shape))
+            data_obj.data.update_flat(np.ones(data_obj.data.flat().shape))
 
     def __set_image_key(self, data_obj):
         proj_slice = \
             data_obj.get_data_patterns()['PROJECTION']['slice_dims'][0]
-        image_key = np.zeros(data_obj.data.shape[proj_slice], dtype=int)
+        return self._get_image_key(data_obj.data.shape[proj_slice])
+
+    def _get_image_key(self, n_entries):
+        image_key = np.zeros(n_entries, dtype=int)
         dark, flat = self.parameters['image_key']
         image_key[np.array(dark)] = 2
         image_key[np.array(flat)] = 1
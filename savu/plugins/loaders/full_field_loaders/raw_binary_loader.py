@@ -0,0 +1,106 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+.. module:: raw_binary_loader
+   :platform: Unix
+   :synopsis: A class to load raw binary data through a memory-map.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import h5py
+import tempfile
+import numpy as np
+
+from savu.plugins.loaders.base_loader import BaseLoader
+from savu.plugins.utils import register_plugin
+from savu.data.data_structures.data_types.memmap import Memmap
+
+
+@register_plugin
+class RawBinaryLoader(BaseLoader):
+    """
+    Load raw binary data, of a given shape and data type, through a numpy \
+    memory-map.
+
+    :u*param shape: A list of the data dimensions. Default: [].
+    :u*param dtype: A numpy data type. Default: 'float32'.
+    :param byte_order: The byte order of the data, 'little' or \
+        'big'. Default: 'little'.
+    :param offset: The number of bytes before the first data \
+        entry (e.g. the size of a header). Default: 0.
+    :param order: Memory layout of the data, 'C' (last dimension \
+        varies fastest) or 'F' (first dimension varies fastest). Default: 'C'.
+    :param axis_labels: A list of axis labels. Default: ['rotation_angle.degrees', 'detector_y.pixel', 'detector_x.pixel'].
+    :param patterns: A list of data access patterns, where 'c' and 's' \
+        represent core and slice dimensions respectively. Default: ['SINOGRAM.0c.1s.2c', 'PROJECTION.0s.1c.2c'].
+    :param dataset_name: The name assigned to the dataset. Default: 'tomo'.
+    :param angles: A python statement to be evaluated or a file - if the \
+        value is None, values will be in the interval [0, 180]. Default: None.
+    """
+
+    def __init__(self, name='RawBinaryLoader'):
+        super(RawBinaryLoader, self).__init__(name)
+
+    def setup(self):
+        exp = self.exp
+        data_obj = exp.create_data_object('in_data',
+                                          self.parameters['dataset_name'])
+        if not self.parameters['shape']:
+            raise Exception('Please specify the shape of the raw data.')
+
+        path = exp.meta_data.get("data_file")
+        byte_order = {'little': '<', 'big': '>'}[self.parameters['byte_order']]
+        dtype = np.dtype(self.parameters['dtype']).newbyteorder(byte_order)
+        data_obj.data = Memmap(data_obj, path, self.parameters['shape'],
+                               dtype, offset=self.parameters['offset'],
+                               order=self.parameters['order'])
+
+        data_obj.set_axis_labels(*self.parameters['axis_labels'])
+        self._add_patterns(data_obj, self.parameters['patterns'])
+
+        # dummy file
+        filename = path.split('/')[-1] + '.h5'
+        data_obj.backing_file = \
+            h5py.File(tempfile.mkdtemp() + '/' + filename, 'a')
+
+        data_obj.set_shape(data_obj.data.get_shape())
+        labels = [l.keys()[0] for l in data_obj.get_axis_labels()]
+        if 'rotation_angle' in labels:
+            self.__set_rotation_angles(data_obj)
+        return data_obj
+
+    def __set_rotation_angles(self, data_obj):
+        angles = self.parameters['angles']
+        n_entries = data_obj.get_shape()[
+            data_obj.get_data_dimension_by_axis_label('rotation_angle')]
+
+        if angles is None:
+            angles = np.linspace(0, 180, n_entries)
+        else:
+            try:
+                exec("angles = " + angles)
+            except:
+                try:
+                    angles = np.loadtxt(angles)
+                except:
+                    raise Exception('Cannot set angles in loader.')
+
+        if len(angles) != n_entries:
+            raise Exception("The number of angles %s does not match the data "
+                            "dimension length %s", len(angles), n_entries)
+        data_obj.meta_data.set("rotation_angle", angles)
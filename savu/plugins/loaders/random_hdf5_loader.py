@@ -24,9 +24,11 @@
 
 import os
 import h5py
+import itertools
 import numpy as np
 
 from savu.data.chunking import Chunking
+import savu.plugins.loaders.utils.shepp_logan as shepp_logan
 from savu.plugins.utils import register_plugin
 from savu.plugins.loaders.base_loader import BaseLoader
 from savu.plugins.savers.utils.hdf5_utils import Hdf5Utils
@@ -38,7 +40,10 @@ class RandomHdf5Loader(BaseLoader):
     A hdf5 dataset of a specified size is created at runtime using numpy\
     random sampling (numpy.random) and saved to file. This created dataset\
     will be used as the input file, and the input file path passed to Savu\
-    will be ignored (use a dummy).
+    will be ignored (use a dummy).  The dataset is written in blocks of a\
+    fixed size, shared between the processes, and each block has its own\
+    random stream (seeded from the seed and the block number), so the data\
+    does not depend on the number of processes or the chunking.
 
     :u*param size: A list specifiying the required data size. Default: [].
     :u*param axis_labels: A list of the axis labels to be associated with each\
@@ -55,9 +60,18 @@ class RandomHdf5Loader(BaseLoader):
     is None, values will be in the interval [0, 180]. Default: None.
     :param pattern: Pattern used to create and store the hdf5 dataset - \
     default is the first pattern in the pattern dictionary. Default: None.
-    :param range: Set the distribution interval. Default: [1, 10].
+    :param range: Set the distribution interval, or the dark and flat field\
+    levels of a phantom. Default: [1, 10].
+    :param seed: The seed of the random number generator. Default: 0.
+    :param generator: The data content: 'random' values in the range, or\
+    'phantom' for projections of a 3D Shepp-Logan phantom with photon noise\
+    (requires rotation_angle, detector_y and detector_x axes).\
+    Default: 'random'.
     """
 
+    # the maximum number of elements generated at a time
+    block_size = 2**22
+
     def __init__(self, name='RandomHdf5Loader'):
         super(RandomHdf5Loader, self).__init__(name)
 
@@ -67,7 +81,7 @@ class RandomHdf5Loader(BaseLoader):
                                           self.parameters['dataset_name'])
 
         data_obj.set_axis_labels(*self.parameters['axis_labels'])
-        self.__convert_patterns(data_obj)
+        self._add_patterns(data_obj, self.parameters['patterns'])
         self.__parameter_checks(data_obj)
 
         data_obj.backing_file = self.__get_backing_file(data_obj)
@@ -89,77 +103,100 @@ class RandomHdf5Loader(BaseLoader):
         self.hdf5 = Hdf5Utils(self.exp)
 
         size = tuple(self.parameters['size'])
+        dtype = np.dtype(self.parameters['dtype'])
 
         patterns = data_obj.get_data_patterns()
-        p_name = patterns[self.parameters['pattern']] if \
+        p_name = self.parameters['pattern'] if \
             self.parameters['pattern'] is not None else patterns.keys()[0]
-        p_name = patterns.keys()[0]
         p_dict = patterns[p_name]
         p_dict['max_frames_transfer'] = 1
         nnext = {p_name: p_dict}
 
         pattern_idx = {'current': nnext, 'next': nnext}
         chunking = Chunking(self.exp, pattern_idx)
-        chunks = chunking._calculate_chunking(size, np.int16)
+        chunks = chunking._calculate_chunking(size, dtype)
 
         h5file = self.hdf5._open_backing_h5(fname, 'w')
-        dset = h5file.create_dataset('test', size, chunks=chunks)
-
-        slice_dirs = nnext.values()[0]['slice_dims']
-        nDims = len(dset.shape)
-        total_frames = np.prod([dset.shape[i] for i in slice_dirs])
-        sub_size = \
-            [1 if i in slice_dirs else dset.shape[i] for i in range(nDims)]
-
-        # need an mpi barrier after creating the file before populating it
-        idx = 0
-        sl, total_frames = \
-            self.__get_start_slice_list(slice_dirs, dset.shape, total_frames)
-        # calculate the first slice
-        for i in range(total_frames):
-            low, high = self.parameters['range']
-            dset[tuple(sl)] = np.random.randint(
-                low, high=high, size=sub_size, dtype=self.parameters['dtype'])
-            if sl[slice_dirs[idx]].stop == dset.shape[slice_dirs[idx]]:
-                idx += 1
-                if idx == len(slice_dirs):
-                    break
-            tmp = sl[slice_dirs[idx]]
-            sl[slice_dirs[idx]] = slice(tmp.start+1, tmp.stop+1)
+        dset = h5file.create_dataset('test', size, dtype, chunks=chunks)
 
-        h5file.close()
-        return self.hdf5._open_backing_h5(fname, 'r')
-
-    def __get_start_slice_list(self, slice_dirs, shape, n_frames):
+        generate = self.__get_generator(data_obj, dset.shape, dtype)
+        blocks = self.__get_blocks(dset.shape)
         n_processes = len(self.exp.get('processes'))
         rank = self.exp.get('process')
-        frames = np.array_split(np.arange(n_frames), n_processes)[rank]
-        f_range = range(0, frames[0]) if len(frames) else []
-        sl = [slice(0, 1) if i in slice_dirs else slice(None)
-              for i in range(len(shape))]
-        idx = 0
-        for i in f_range:
-            if sl[slice_dirs[idx]] == shape[slice_dirs[idx]]-1:
-                idx += 1
-            tmp = sl[slice_dirs[idx]]
-            sl[slice_dirs[idx]] = slice(tmp.start+1, tmp.stop+1)
-
-        return sl, len(frames)
-
-    def __convert_patterns(self, data_obj):
-        pattern_list = self.parameters['patterns']
-        for p in pattern_list:
-            p_split = p.split('.')
-            name = p_split[0]
-            dims = p_split[1:]
-            core_dims = tuple([int(i[0]) for i in [d.split('c') for d in dims]
-                              if len(i) == 2])
-            slice_dims = tuple([int(i[0]) for i in [d.split('s') for d in dims]
-                               if len(i) == 2])
-            data_obj.add_pattern(
-                    name, core_dims=core_dims, slice_dims=slice_dims)
+        for i in range(rank, len(blocks), n_processes):
+            rng = np.random.RandomState([self.parameters['seed'], i])
+            dset[blocks[i]] = generate(blocks[i], rng)
 
-    def _set_rotation_angles(self, data_obj, n_entries):
+        h5file.close()
+        return self.hdf5._open_backing_h5(fname, 'r')
+
+    def __get_blocks(self, shape):
+        """ Split the dataset into blocks of at most block_size consecutive
+        elements (in C order).  The blocks depend only on the shape of the
+        data, and not on the chunks, which vary with the number of processes
+        and the pattern. """
+        nDims = len(shape)
+        step = list(shape)
+        inner = 1
+        for d in reversed(range(nDims)):
+            if inner*shape[d] > self.block_size:
+                step[d] = max(1, self.block_size//inner)
+                step[:d] = [1]*d
+                break
+            inner *= shape[d]
+        starts = [range(0, shape[d], step[d]) for d in range(nDims)]
+        return [tuple(slice(s, min(s + step[d], shape[d]))
+                      for d, s in enumerate(start))
+                for start in itertools.product(*starts)]
+
+    def __get_generator(self, data_obj, shape, dtype):
+        """ Get a function that generates the data for a block. """
+        low, high = self.parameters['range']
+        if self.parameters['generator'] == 'random':
+            return lambda sl, rng: rng.randint(
+                low, high=high, size=self.__block_shape(sl)).astype(dtype)
+        elif self.parameters['generator'] == 'phantom':
+            return self.__get_phantom_generator(data_obj, shape, dtype)
+        raise Exception("Unknown generator %s." % self.parameters['generator'])
+
+    def __get_phantom_generator(self, data_obj, shape, dtype):
+        """ Projections of a Shepp-Logan phantom between the dark (lower) and
+        flat (upper) field levels of the range, with Poisson noise.  Entries
+        with an image key of 2 or 1 are dark or flat fields. """
+        try:
+            dims = [data_obj.get_data_dimension_by_axis_label(label) for
+                    label in ['rotation_angle', 'detector_y', 'detector_x']]
+        except Exception:
+            raise Exception("The phantom generator requires rotation_angle, "
+                            "detector_y and detector_x axes.")
+        rot, detY, detX = dims
+        dark, flat = self.parameters['range']
+        key = self._get_image_key(shape[rot])
+        angles = np.zeros(shape[rot])
+        angles[key == 0] = np.deg2rad(self._get_angles(np.sum(key == 0)))
+        z = np.linspace(-1, 1, shape[detY])
+        t = np.linspace(-1, 1, shape[detX])
+        limits = np.iinfo(dtype) if dtype.kind in 'iu' else np.finfo(dtype)
+
+        def generate(sl, rng):
+            proj = shepp_logan.get_projections(
+                angles[sl[rot]], z[sl[detY]], t[sl[detX]])
+            frames = dark + (flat - dark)*np.exp(-proj)
+            frames[key[sl[rot]] == 2] = dark
+            frames[key[sl[rot]] == 1] = flat
+            frames = rng.poisson(frames).clip(limits.min, limits.max)
+            return np.transpose(frames, np.argsort(dims)).astype(dtype)
+        return generate
+
+    def __block_shape(self, sl):
+        return tuple(s.stop - s.start for s in sl)
+
+    def _get_image_key(self, n_entries):
+        """ Get the image key of the entries in the rotation dimension (0 for
+        projections, 1 for flat fields and 2 for dark fields). """
+        return np.zeros(n_entries, dtype=int)
+
+    def _get_angles(self, n_entries):
         angles = self.parameters['angles']
 
         if angles is None:
@@ -169,6 +206,10 @@ class RandomHdf5Loader(BaseLoader):
                 exec("angles = " + angles)
             except:
                 raise Exception('Cannot set angles in loader.')
+        return np.asarray(angles)
+
+    def _set_rotation_angles(self, data_obj, n_entries):
+        angles = self._get_angles(n_entries)
 
         n_angles = len(angles)
         data_angles = n_entries
@@ -0,0 +1,70 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+.. module:: shepp_logan
+   :platform: Unix
+   :synopsis: Analytic parallel beam projections of a 3D Shepp-Logan phantom.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import numpy as np
+
+# The modified 3D Shepp-Logan phantom: the density, the semi-axes (x, y, z),
+# the centre (x, y, z) and the rotation angle about the z axis (degrees) of
+# each ellipsoid, in a field of view of [-1, 1] in each direction.
+ellipsoids = [
+    [1.0, 0.6900, 0.920, 0.810, 0.00, 0.0000, 0.00, 0],
+    [-0.8, 0.6624, 0.874, 0.780, 0.00, -0.0184, 0.00, 0],
+    [-0.2, 0.1100, 0.310, 0.220, 0.22, 0.0000, 0.00, -18],
+    [-0.2, 0.1600, 0.410, 0.280, -0.22, 0.0000, 0.00, 18],
+    [0.1, 0.2100, 0.250, 0.410, 0.00, 0.3500, -0.15, 0],
+    [0.1, 0.0460, 0.046, 0.050, 0.00, 0.1000, 0.25, 0],
+    [0.1, 0.0460, 0.046, 0.050, 0.00, -0.1000, 0.25, 0],
+    [0.1, 0.0460, 0.023, 0.050, -0.08, -0.6050, 0.00, 0],
+    [0.1, 0.0230, 0.023, 0.020, 0.00, -0.6060, 0.00, 0],
+    [0.1, 0.0230, 0.046, 0.020, 0.06, -0.6050, 0.00, 0]]
+
+
+def get_projections(angles, z, t):
+    """ Calculate the line integrals through the phantom for a parallel beam
+    rotating about the z axis.  Each slice of an ellipsoid at height z is an
+    ellipse, with an analytic projection.
+
+    :param ndarray angles: The rotation angles in radians.
+    :param ndarray z: The heights of the detector rows, in [-1, 1].
+    :param ndarray t: The positions of the detector columns, in [-1, 1].
+    :returns: The projections, with dimensions (angles, z, t).
+    :rtype: ndarray
+    """
+    theta = np.asarray(angles, dtype=np.float64).reshape(-1, 1, 1)
+    z = np.asarray(z, dtype=np.float64).reshape(1, -1, 1)
+    t = np.asarray(t, dtype=np.float64).reshape(1, 1, -1)
+    proj = np.zeros((theta.shape[0], z.shape[1], t.shape[2]))
+    for rho, a, b, c, x0, y0, z0, phi in ellipsoids:
+        # the semi-axes of the ellipse in the slice at each height
+        scale = 1 - ((z - z0)/c)**2
+        scale = np.sqrt(np.clip(scale, 0, None))
+        A, B = a*scale, b*scale
+        alpha = theta - np.deg2rad(phi)
+        s2 = (A*np.cos(alpha))**2 + (B*np.sin(alpha))**2
+        tt = t - (x0*np.cos(theta) + y0*np.sin(theta))
+        inside = np.clip(s2 - tt**2, 0, None)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            p = np.where(s2 > 0, 2*rho*A*B*np.sqrt(inside)/s2, 0)
+        proj += p
+    return proj
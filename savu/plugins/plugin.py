@@ -24,6 +24,7 @@
 import logging
 import inspect
 import copy
+import threading
 import numpy as np
 
 import savu.plugins.docstring_parser as doc
@@ -49,6 +50,7 @@ class Plugin(PluginDatasets):
         self.parameters_user = []
         self.chunk = False
         self.docstring_info = {}
+        self._frame_state = threading.local()
         self.slice_list = None
         self.global_index = None
 
@@ -331,6 +333,16 @@ class Plugin(PluginDatasets):
         index of frames. """
         return self.global_index
 
+    @property
+    def slice_list(self):
+        """ The slice list of the current frame, which is held per thread
+        when frames are processed in a thread pool. """
+        return getattr(self._frame_state, 'slice_list', None)
+
+    @slice_list.setter
+    def slice_list(self, sl):
+        self._frame_state.slice_list = sl
+
     def set_current_slice_list(self, sl):
         self.slice_list = sl
 
@@ -338,6 +350,22 @@ class Plugin(PluginDatasets):
         """ Get the slice list of the current frame being processed. """
         return self.slice_list
 
+    def _set_output_buffers(self, buffers):
+        self._frame_state.out_buffers = buffers
+
+    def get_output_buffer(self, nData=0):
+        """ Get a preallocated array, of the output dataset type, for the
+        result of the current call to process_frames.  If process_frames fills
+        and returns this array, the result is not copied.
+
+        :params int nData: The number of the output dataset in the list.
+        :returns: A view of the transfer buffer, or None if the output dataset \
+            is padded.
+        :rtype: np.ndarray
+        """
+        buffers = getattr(self._frame_state, 'out_buffers', None)
+        return buffers[nData] if buffers else None
+
     def get_slice_dir_reps(self, nData):
         """ Return the periodicity of the main slice direction.
 
@@ -372,6 +400,14 @@ class Plugin(PluginDatasets):
         """
         return 1
 
+    def thread_safe(self):
+        """ Return True if process_frames can be called concurrently from
+        several threads.  Any state shared between calls must then be
+        protected by the plugin.  Thread-safe plugins may have their frames
+        processed in a thread pool (see the --threads option).
+        """
+        return False
+
     def get_citation_information(self):
         """
         Gets the Citation Information for a plugin
@@ -29,7 +29,9 @@ from savu.plugins.utils import register_plugin
 @register_plugin
 class AstraReconCpu(BaseAstraRecon, CpuPlugin):
     """
-    A Plugin to run the astra reconstruction
+    A Plugin to run the astra reconstruction.  The sinograms in a block of\
+    transfer data can be reconstructed in parallel by several threads (see\
+    the --threads option), which share the reconstruction geometry.
 
     :u*param reconstruction_type: Reconstruction type \
         (FBP|SIRT|SART|ART|CGLS|FP|BP|). Default: 'FBP'.
@@ -46,3 +48,10 @@ class AstraReconCpu(BaseAstraRecon, CpuPlugin):
 
     def set_options(self, cfg):
         return cfg
+
+    def thread_safe(self):
+        # each thread holds its own astra data objects and the algorithms
+        # that keep state between runs are created for each sinogram, so the
+        # result does not depend on the frames a thread has processed.  The
+        # astra cpu algorithms release the GIL while running.
+        return True
@@ -81,7 +81,7 @@ class AstraReconGpu(BaseAstraRecon, GpuPlugin):
         c = np.linspace(-l/2.0, l/2.0, l)
         x, y = np.meshgrid(c, c)
         self.mask_id = False
-        mask = np.array((x**2 + y**2 < (l/2.0)**2), dtype=np.float)
+        mask = np.array((x**2 + y**2 < (l/2.0)**2), dtype=np.float32)
         self.mask = np.transpose(
             np.tile(mask, (self.get_max_frames(), 1, 1)), (1, 0, 2))
         self.manual_mask = True if not self.parameters['sino_pad'] else False
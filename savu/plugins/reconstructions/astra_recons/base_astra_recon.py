@@ -22,6 +22,7 @@ import astra
 import numpy as np
 import math
 import copy
+import threading
 
 from savu.plugins.reconstructions.base_recon import BaseRecon
 from savu.data.plugin_list import CitationInformation
@@ -38,6 +39,10 @@ class BaseAstraRecon(BaseRecon):
     :u*param n_iterations: Number of Iterations if an iterative method\
         is used . Default: 1.
     """
+    # algorithms that keep no state between runs, so a single algorithm
+    # object can reconstruct every sinogram (CGLS keeps its residual and
+    # search direction and SART its projection order)
+    reusable_algorithms = ['FBP', 'SIRT']
 
     def __init__(self, name='BaseAstraRecon'):
         super(BaseAstraRecon, self).__init__(name)
@@ -92,60 +97,123 @@ class BaseAstraRecon(BaseRecon):
         l = self.sino_shape[self.dim_detX]
         c = np.linspace(-l/2.0, l/2.0, l)
         x, y = np.meshgrid(c, c)
-        self.mask = np.array((x**2 + y**2 < (l/2.0)**2), dtype=np.float)
-        self.mask_id = True if not self.parameters['sino_pad'] and 'FBP' not \
-            in self.alg else False
+        self.mask = np.array((x**2 + y**2 < (l/2.0)**2), dtype=np.float32)
+        self.use_mask = True if not self.parameters['sino_pad'] and 'FBP' \
+            not in self.alg else False
+        self.mask_id = False
         if not self.parameters['sino_pad']:
             self.manual_mask = copy.copy(self.mask)
             self.manual_mask[self.manual_mask == 0] = np.nan
         else:
             self.manual_mask = False
+        # the astra objects are reused until the geometry changes, with a set
+        # of objects for each thread that processes frames
+        self._astra_state = threading.local()
+        self.astra_ids = []
+        self.astra_lock = threading.Lock()
 
     def astra_2D_recon(self, data):
         sino = data[0]
         cor, angles, vol_shape, init = self.get_frame_params()
         angles = np.deg2rad(angles)
-        if self.res:
-            res = np.zeros(self.iters)
-        # create volume geom
-        vol_geom = astra.create_vol_geom(vol_shape)
-        # create projection geom
         pad_sino = self.pad_sino(sino, cor[0])
         det_width = pad_sino.shape[self.dim_detX]
-        proj_geom = astra.create_proj_geom('parallel', 1.0, det_width, angles)
         pad_sino = np.transpose(pad_sino, (self.dim_rot, self.dim_detX))
-        # create sinogram id
-        sino_id = astra.data2d.create("-sino", proj_geom, pad_sino)
-        # create reconstruction id
-        if init:
-            rec_id = astra.data2d.create('-vol', vol_geom, init)
-        else:
-            rec_id = astra.data2d.create('-vol', vol_geom)
-
-        if self.mask_id:
-            self.mask_id = astra.data2d.create('-vol', vol_geom, self.mask)
-        # setup configuration options
-        cfg = self.set_config(rec_id, sino_id, proj_geom, vol_geom)
-        # create algorithm id
-        alg_id = astra.algorithm.create(cfg)
+        alg_id, sino_id, rec_id = \
+            self.get_astra_objects(det_width, angles, vol_shape)
+        # only the data is updated for each sinogram
+        astra.data2d.store(sino_id, pad_sino)
+        astra.data2d.store(rec_id, init if init is not None else 0)
+        # algorithms that keep state between runs are new for each sinogram
+        new_alg = alg_id is False
+        if new_alg:
+            alg_id = astra.algorithm.create(self._astra_state.cfg)
         # run algorithm
         if self.res:
+            res = np.zeros(self.iters)
             for j in range(self.iters):
                 # Run a single iteration
                 astra.algorithm.run(alg_id, 1)
                 res[j] = astra.algorithm.get_res_norm(alg_id)
         else:
             astra.algorithm.run(alg_id, self.iters)
+        if new_alg:
+            astra.algorithm.delete(alg_id)
         # get reconstruction matrix
         if self.manual_mask is not False:
             recon = self.manual_mask*astra.data2d.get(rec_id)
         else:
             recon = astra.data2d.get(rec_id)
-        # delete geometry
-        self.delete(alg_id, sino_id, rec_id, False)
         return [recon, res] if self.res else recon
 
-    def set_config(self, rec_id, sino_id, proj_geom, vol_geom):
+    def get_astra_objects(self, det_width, angles, vol_shape):
+        """ Get the astra algorithm, sinogram and reconstruction ids for the
+        2D geometry.  The geometry, data, mask and projector objects are
+        created for the first sinogram processed by each thread and only
+        recreated if the geometry changes (e.g. a different padding for a new
+        centre of rotation).  The algorithm is only reused if it keeps no
+        state between runs (see reusable_algorithms), otherwise the algorithm
+        id is False and an algorithm is created from the cached configuration
+        for each sinogram.
+
+        :returns: The algorithm (or False), sinogram and reconstruction ids.
+        :rtype: tuple(int)
+        """
+        state = self._astra_state
+        key = (det_width, tuple(angles), tuple(vol_shape))
+        if getattr(state, 'key', None) == key:
+            return state.ids[:3]
+        if getattr(state, 'ids', None) is not None:
+            self.__delete_astra_ids(state.ids)
+        # create volume geom
+        vol_geom = astra.create_vol_geom(vol_shape)
+        # create projection geom
+        proj_geom = astra.create_proj_geom('parallel', 1.0, det_width, angles)
+        # create sinogram and reconstruction ids
+        sino_id = astra.data2d.create("-sino", proj_geom, 0)
+        rec_id = astra.data2d.create('-vol', vol_geom)
+        mask_id = astra.data2d.create('-vol', vol_geom, self.mask) if \
+            self.use_mask else False
+        # setup configuration options
+        cfg = self.set_config(rec_id, sino_id, proj_geom, vol_geom,
+                              mask_id=mask_id)
+        # create algorithm id
+        alg_id = astra.algorithm.create(cfg) if \
+            self.alg in self.reusable_algorithms else False
+        state.cfg = cfg
+        state.ids = (alg_id, sino_id, rec_id, cfg.get('ProjectorId', False),
+                     mask_id)
+        state.key = key
+        with self.astra_lock:
+            self.astra_ids.append(state.ids)
+        return state.ids[:3]
+
+    def __delete_astra_ids(self, ids):
+        alg_id, sino_id, rec_id, proj_id, mask_id = ids
+        if alg_id is not False:
+            astra.algorithm.delete(alg_id)
+        astra.data2d.delete(sino_id)
+        astra.data2d.delete(rec_id)
+        if proj_id:
+            astra.projector.delete(proj_id)
+        if mask_id:
+            astra.data2d.delete(mask_id)
+        with self.astra_lock:
+            self.astra_ids.remove(ids)
+
+    def delete_astra_objects(self):
+        """ Delete the astra objects that are reused between sinograms. """
+        for ids in list(self.astra_ids):
+            self.__delete_astra_ids(ids)
+        self._astra_state = threading.local()
+
+    def post_process(self):
+        # the astra objects are only created by the 2D reconstruction
+        if getattr(self, 'astra_ids', None):
+            self.delete_astra_objects()
+
+    def set_config(self, rec_id, sino_id, proj_geom, vol_geom,
+                   mask_id=False):
         cfg = astra.astra_dict(self.alg)
         cfg['ReconstructionDataId'] = rec_id
         cfg['ProjectionDataId'] = sino_id
@@ -157,9 +225,9 @@ class BaseAstraRecon(BaseRecon):
             cfg['ProjectorId'] = proj_id
         # mask not currently working correctly for SIRT or SART algorithms
         sirt_or_sart = [a for a in ['SIRT', 'SART'] if a in self.alg]
-        if self.mask_id and not sirt_or_sart:
+        if mask_id and not sirt_or_sart:
             cfg['option'] = {}
-            cfg['option']['ReconstructionMaskId'] = self.mask_id
+            cfg['option']['ReconstructionMaskId'] = mask_id
         cfg = self.set_options(cfg)
         return cfg
 
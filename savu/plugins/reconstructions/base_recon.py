@@ -50,9 +50,6 @@ class BaseRecon(Plugin):
         self.scan_dim = None
         self.rep_dim = None
         self.br_vol_shape = None
-        self.frame_angles = None
-        self.frame_cors = None
-        self.frame_init_data = None
         self.centre = None
 
     def base_dynamic_data_info(self):
@@ -132,18 +129,19 @@ class BaseRecon(Plugin):
         init = data[1] if len(data) is 2 else None
         angles = \
             self.angles[:, sl[self.scan_dim]] if self.scan_dim else self.angles
-        self.frame_angles = angles
 
         dim_sl = sl[self.main_dir]
-        self.frame_cors = self.cor_func(self.cor[dim_sl])
-        if not self.frame_cors.shape:
-            self.frame_cors = np.array([self.centre])
+        cors = self.cor_func(self.cor[dim_sl])
+        if not cors.shape:
+            cors = np.array([self.centre])
         len_data = len(np.arange(dim_sl.start, dim_sl.stop, dim_sl.step))
 
-        missing = [self.centre]*(len(self.frame_cors) - len_data)
-        self.frame_cors = np.append(self.frame_cors, missing)
+        missing = [self.centre]*(len(cors) - len_data)
 
-        self.frame_init_data = init
+        # the frame parameters are held per thread
+        self._frame_state.angles = angles
+        self._frame_state.cors = np.append(cors, missing)
+        self._frame_state.init_data = init
         data[0] = self.sino_func(data[0])
         return data
 
@@ -153,7 +151,7 @@ class BaseRecon(Plugin):
         :returns: Angles of the current frames.
         :rtype: np.ndarray
         """
-        return self.frame_angles
+        return getattr(self._frame_state, 'angles', None)
 
     def get_cors(self):
         """
@@ -162,7 +160,7 @@ class BaseRecon(Plugin):
         :returns: Centre of rotation values for the current frames.
         :rtype: np.ndarray
         """
-        return self.frame_cors
+        return getattr(self._frame_state, 'cors', None)
 
     def get_initial_data(self):
         """
@@ -173,7 +171,7 @@ class BaseRecon(Plugin):
             current frames.
         :rtype: np.ndarray or None
         """
-        return self.frame_init_data
+        return getattr(self._frame_state, 'init_data', None)
 
     def get_frame_params(self):
         params = [self.get_cors(), self.get_angles(), self.get_vol_shape(),
@@ -33,57 +33,123 @@ from savu.plugins.utils import register_plugin
 @register_plugin
 class SimpleRecon(BaseRecon, CpuPlugin):
     """
-    A Plugin to apply a simple reconstruction with no dependancies
+    A Plugin to apply a simple filtered back-projection reconstruction \
+    (Ram-Lak filter, linear interpolation) with no dependancies.
     """
 
     def __init__(self):
         super(SimpleRecon, self).__init__("SimpleRecon")
+        # the maximum size (bytes) of the cached back-projection maps
+        self.map_bytes = 2**28
 
-    def _filter(self, sinogram):
-        ff = np.arange(sinogram.shape[0])
-        ff -= sinogram.shape[0]/2
-        ff = np.abs(ff)
-        fs = np.fft.fft(sinogram)
-        ffs = fs*ff
-        return np.fft.ifft(ffs).real
+    def pre_process(self):
+        self.geometry = None
+        self.filters = {}
+        self.maps = {}
 
-    def _back_project(self, mapping, sino_element, centre):
-        mapping_array = mapping+centre
-        return sino_element[mapping_array.astype('int')]
+    def _get_filter(self, nDet):
+        """ Get the (cached) Ram-Lak filter, in the frequency domain, for
+        projections of nDet pixels zero-padded to avoid wrap-around. """
+        if nDet not in self.filters:
+            n_fft = int(2**np.ceil(np.log2(2*nDet)))
+            # the band-limited ramp filter in real space (Kak & Slaney)
+            n = np.fft.fftfreq(n_fft)*n_fft
+            h = np.zeros(n_fft)
+            h[0] = 0.25
+            odd = n % 2 == 1
+            h[odd] = -1.0/(np.pi*n[odd])**2
+            self.filters[nDet] = \
+                (n_fft, np.real(np.fft.rfft(h)).astype(np.float32))
+        return self.filters[nDet]
 
-    def _mapping_array(self, shape, center, theta):
-        x, y = np.meshgrid(np.arange(-center[0], shape[0] - center[0]),
-                           np.arange(-center[1], shape[1] - center[1]))
-        return x*np.cos(theta) - y*np.sin(theta)
+    def _filter(self, sinograms):
+        """ Filter all the projections of a block of sinograms with a single
+        batched real FFT along the detector axis. """
+        nDet = sinograms.shape[-1]
+        n_fft, filt = self._get_filter(nDet)
+        fsino = np.fft.rfft(sinograms, n=n_fft, axis=-1)
+        fsino *= filt
+        return np.fft.irfft(fsino, n=n_fft, axis=-1)[..., :nDet]
+
+    def _set_geometry(self, angles, vol_shape, nDet):
+        """ Precompute the angle-dependent terms of the detector position of
+        each voxel, x*cos(theta) - y*sin(theta), which are reused by every
+        slice until the geometry changes. """
+        geometry = (tuple(angles), tuple(vol_shape), nDet)
+        if geometry == self.geometry:
+            return
+        theta = np.deg2rad(np.asarray(angles, dtype=np.float64))
+        nRows, nCols = vol_shape[0], vol_shape[-1]
+        x = np.arange(nCols) - nCols//2
+        y = np.arange(nRows) - nRows//2
+        self.xcos = np.cos(theta)[:, None]*x[None, :]
+        self.ysin = np.sin(theta)[:, None]*y[None, :]
+        self.geometry = geometry
+        self.maps = {}
+
+    def _get_maps(self, cor):
+        """ Get the index and interpolation weight maps for each angle for a
+        centre of rotation.  The maps are cached if they fit in map_bytes,
+        otherwise they are calculated as they are used.
+
+        :returns: A list, or generator, of (index, weight) for each angle.
+        """
+        if cor in self.maps:
+            return self.maps[cor]
+        nAngles = len(self.xcos)
+        maps = (self.__get_map(a, cor) for a in range(nAngles))
+        nbytes = nAngles*self.xcos.shape[1]*self.ysin.shape[1]*8
+        if nbytes <= self.map_bytes:
+            # only keep the maps for one centre of rotation
+            self.maps = {cor: list(maps)}
+            return self.maps[cor]
+        return maps
+
+    def __get_map(self, a, cor):
+        nDet = self.geometry[2]
+        # positions are offset by 1 for the zero padding at each end
+        t = self.xcos[a][None, :] - self.ysin[a][:, None] + (cor + 1)
+        t = np.clip(t.ravel(), 0, nDet + 1)
+        idx = np.minimum(t.astype(np.int32), nDet)
+        return idx, (t - idx).astype(np.float32)
+
+    def _back_project(self, filtered, cor):
+        """ Back-project a block of filtered sinograms (angles, slices,
+        detector) that share a centre of rotation, with linear
+        interpolation. """
+        nAngles, nSlices, nDet = filtered.shape
+        padded = np.zeros((nAngles, nSlices, nDet + 2), dtype=np.float32)
+        padded[..., 1:-1] = filtered
+        result = np.zeros((nSlices, self.ysin.shape[1]*self.xcos.shape[1]),
+                          dtype=np.float32)
+        for a, (idx, w) in enumerate(self._get_maps(cor)):
+            lower = np.take(padded[a], idx, axis=1)
+            upper = np.take(padded[a], idx + 1, axis=1)
+            upper -= lower
+            upper *= w
+            result += lower
+            result += upper
+        return result*(np.pi/nAngles)
 
     def process_frames(self, data):
         sino = data[0]
         centre_of_rotations, angles, vol_shape, init = self.get_frame_params()
-        sinogram = sino[:, np.newaxis, :]
-        try:
-            centre = self.kwargs['centre']
-        except:
-            centre = (vol_shape[0]/2, vol_shape[1]/2)
-
-        results = []
-        for j in range(sinogram.shape[1]):
-            result = np.zeros(vol_shape, dtype=np.float32)
-            for i in range(sinogram.shape[0]):
-                theta = i*(np.pi/sinogram.shape[0])
-                mapping_array = self._mapping_array(vol_shape, centre, theta)
-                filt = np.zeros(sinogram.shape[2]*3, dtype=np.float32)
-                filt[sinogram.shape[2]:sinogram.shape[2]*2] = \
-                    self._filter(np.log(np.nan_to_num(sinogram[i, j, :])+1))
-                result += \
-                    self._back_project(mapping_array, filt,
-                                       (centre_of_rotations +
-                                           sinogram.shape[2]))
-            results.append(result[:, np.newaxis, :])
-        result = np.hstack(results)
-        return result
+        sinograms = sino[:, np.newaxis, :] if sino.ndim == 2 else sino
+        nSlices, nDet = sinograms.shape[1:]
+        self._set_geometry(angles, vol_shape, nDet)
+        filtered = self._filter(sinograms)
+
+        nRows, nCols = vol_shape[0], vol_shape[-1]
+        result = np.empty((nSlices, nRows*nCols), dtype=np.float32)
+        cors = np.asarray(centre_of_rotations, dtype=np.float64)[:nSlices]
+        for cor in np.unique(cors):
+            sl = np.nonzero(cors == cor)[0]
+            result[sl] = self._back_project(filtered[:, sl], float(cor))
+        result = np.transpose(result.reshape(nSlices, nRows, nCols), (1, 0, 2))
+        return result[:, 0] if sino.ndim == 2 else result
 
     def get_max_frames(self):
-        return 'single'
+        return 'multiple'
 
     def get_citation_information(self):
         cite_info = CitationInformation()
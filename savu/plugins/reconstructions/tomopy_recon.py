@@ -80,6 +80,9 @@ class TomopyRecon(BaseRecon, CpuPlugin):
     def get_max_frames(self):
         return 'multiple'
 
+    def thread_safe(self):
+        return True
+
     def get_allowed_kwargs(self):
         return {
             'art': ['num_gridx', 'num_gridy', 'num_iter'],
@@ -21,6 +21,7 @@
 
 """
 
+import os
 import h5py
 
 from savu.plugins.plugin import Plugin
@@ -60,8 +61,30 @@ class BaseSaver(Plugin):
             self.exp._get_experiment_collection()['plugin_dict'][nPlugin]
         return "%i-%s-%s" % (nPlugin, plugin_dict['name'], name)
 
+    def _get_file_name(self, name, ext):
+        """ Get the output file name for a dataset.
+
+        :param str name: The dataset name.
+        :param str ext: The file extension.
+        """
+        nPlugin = self.exp.meta_data.get('nPlugin')
+        plugin_dict = \
+            self.exp._get_experiment_collection()['plugin_dict'][nPlugin]
+        fname = name + '_p' + str(nPlugin) + '_' + \
+            plugin_dict['id'].split('.')[-1] + ext
+        out_path = self.exp.meta_data.get('out_path')
+        return os.path.join(out_path, fname)
+
     def get_pattern(self):
-        return self.parameters['pattern']
+        """ Get the pattern used to save the data: 'optimum' chooses the
+        output pattern from the previous plugin, if it exists, else the first
+        pattern. """
+        if self.parameters['pattern'] != 'optimum':
+            return self.parameters['pattern']
+        previous_pattern = self.get_in_datasets()[0].get_previous_pattern()
+        if previous_pattern:
+            return previous_pattern.keys()[0]
+        return self.get_in_datasets()[0].get_data_patterns().keys()[0]
 
     def get_frame(self):
         return self.frame
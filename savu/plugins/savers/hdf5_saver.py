@@ -22,7 +22,6 @@
 """
 
 import logging
-import os
 import copy
 
 from savu.plugins.savers.utils.hdf5_utils import Hdf5Utils
@@ -30,6 +29,7 @@ from savu.plugins.savers.base_saver import BaseSaver
 from savu.plugins.driver.cpu_plugin import CpuPlugin
 from savu.plugins.utils import register_plugin
 from savu.data.chunking import Chunking
+import savu.data.data_structures.utils as dsu
 
 
 @register_plugin
@@ -59,7 +59,7 @@ class Hdf5Saver(BaseSaver, CpuPlugin):
         current_pattern = self.__set_current_pattern()
         pattern_idx = {'current': current_pattern, 'next': []}
 
-        self.filename = self.__get_file_name()
+        self.filename = self._get_file_name(self.data_name, '.h5')
         self.group_name = self._get_group_name(self.data_name)
         logging.debug("creating the backing file %s", self.filename)
         self.backing_file = self.hdf5._open_backing_h5(self.filename, 'w')
@@ -69,7 +69,7 @@ class Hdf5Saver(BaseSaver, CpuPlugin):
         self.exp._barrier()
         shape = self.in_data.get_shape()
         chunking = Chunking(self.exp, pattern_idx)
-        dtype = self.in_data.data.dtype
+        dtype = dsu._apply_precision(self.exp, self.in_data.data.dtype)
         chunks = chunking._calculate_chunking(shape, dtype)
         self.exp._barrier()
         self.out_data = \
@@ -87,20 +87,3 @@ class Hdf5Saver(BaseSaver, CpuPlugin):
         pattern = copy.deepcopy(self.in_data._get_plugin_data().get_pattern())
         pattern[pattern.keys()[0]]['max_frames'] = self.get_max_frames()
         return pattern
-
-    def get_pattern(self):
-        if self.parameters['pattern'] != 'optimum':
-            return self.parameters['pattern']
-        previous_pattern = self.get_in_datasets()[0].get_previous_pattern()
-        if previous_pattern:
-            return previous_pattern.keys()[0]
-        return self.get_in_datasets()[0].get_data_patterns().keys()[0]
-
-    def __get_file_name(self):
-        nPlugin = self.exp.meta_data.get('nPlugin')
-        plugin_dict = \
-            self.exp._get_experiment_collection()['plugin_dict'][nPlugin]
-        fname = self.data_name + '_p' + str(nPlugin) + '_' + \
-            plugin_dict['id'].split('.')[-1] + '.h5'
-        out_path = self.exp.meta_data.get('out_path')
-        return os.path.join(out_path, fname)
@@ -0,0 +1,142 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+.. module:: memmap_saver
+   :platform: Unix
+   :synopsis: A class to save data to a raw binary or MRC file through a \
+       memory-map.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import logging
+import numpy as np
+from mpi4py import MPI
+
+import savu.plugins.loaders.utils.mrc_header as header_format
+from savu.plugins.savers.base_saver import BaseSaver
+from savu.plugins.driver.cpu_plugin import CpuPlugin
+from savu.plugins.utils import register_plugin
+import savu.data.data_structures.utils as dsu
+
+
+@register_plugin
+class MemmapSaver(BaseSaver, CpuPlugin):
+    """
+    A class to save data to a raw binary or MRC file.  The file is created \
+    at its full size and each process writes its frames directly into the \
+    file through a numpy memory-map.
+
+    :param pattern: Save the data with this access pattern: 'optimum' will \
+        choose the output pattern from the previous plugin, if it exists, \
+        else the first pattern. Default: 'optimum'.
+    :param format: The file format, 'raw' or 'mrc' (3D data only, with the \
+        first dimension varying fastest). Default: 'raw'.
+    :param byte_order: The byte order of raw data, 'little' or \
+        'big'. Default: 'little'.
+    """
+
+    # MRC modes for each data type, other types are saved as float32
+    mrc_modes = {'int8': 0, 'uint8': 0, 'int16': 1, 'float32': 2,
+                 'uint16': 6}
+
+    def __init__(self, name='MemmapSaver'):
+        super(MemmapSaver, self).__init__(name)
+        self.in_data = None
+        self.out_data = None
+        self.filename = None
+        self.mrc = None
+        self.stats = None
+
+    def pre_process(self):
+        self.in_data = self.get_in_datasets()[0]
+        shape = self.in_data.get_shape()
+        dtype = np.dtype(
+            dsu._apply_precision(self.exp, self.in_data.data.dtype))
+        self.mrc = self.parameters['format'] == 'mrc'
+        if self.mrc:
+            dtype = self.__get_mrc_dtype(dtype, shape)
+            offset, order, ext = 1024, 'F', '.mrc'
+        else:
+            byte_order = \
+                {'little': '<', 'big': '>'}[self.parameters['byte_order']]
+            dtype = dtype.newbyteorder(byte_order)
+            offset, order, ext = 0, 'C', '.raw'
+        self.filename = self._get_file_name(self.in_data.get_name(), ext)
+
+        logging.debug("creating the output file %s", self.filename)
+        if MPI.COMM_WORLD.rank == 0:
+            with open(self.filename, 'wb') as f:
+                if self.mrc:
+                    self.__get_mrc_header(shape, dtype).tofile(f)
+                f.truncate(offset + int(np.prod(shape))*dtype.itemsize)
+        self.exp._barrier()
+        self.out_data = np.memmap(self.filename, dtype=dtype, mode='r+',
+                                  offset=offset, shape=shape, order=order)
+        self.stats = [np.inf, -np.inf, 0.0]
+
+    def process_frames(self, data):
+        self.out_data[tuple(self.get_current_slice_list()[0])] = data[0]
+        if self.mrc:
+            self.stats = [min(self.stats[0], np.min(data[0])),
+                          max(self.stats[1], np.max(data[0])),
+                          self.stats[2] + np.sum(data[0], dtype=np.float64)]
+
+    def post_process(self):
+        self.out_data.flush()
+        shape = self.out_data.shape
+        dtype = self.out_data.dtype
+        self.out_data = None
+        if self.mrc:
+            self.__write_mrc_stats(shape, dtype)
+
+    def __get_mrc_dtype(self, dtype, shape):
+        if len(shape) != 3:
+            raise Exception("Only 3D data can be saved in MRC format.")
+        if dtype.name not in self.mrc_modes:
+            logging.warning("%s data is saved as float32 in MRC format.",
+                            dtype.name)
+            dtype = np.dtype(np.float32)
+        return dtype.newbyteorder('<')
+
+    def __get_mrc_header(self, shape, dtype, stats=(0, 0, 0)):
+        header = np.zeros(
+            1, dtype=np.dtype(header_format.rec_header_dtd).newbyteorder('<'))
+        header['nx'], header['ny'], header['nz'] = shape
+        header['mx'], header['my'], header['mz'] = shape
+        header['xlen'], header['ylen'], header['zlen'] = shape
+        header['mapc'], header['mapr'], header['maps'] = 1, 2, 3
+        header['amin'], header['amax'], header['amean'] = stats
+        header['mode'] = self.mrc_modes[dtype.name]
+        header['imodFlags'] = 1 if dtype.name == 'int8' else 0
+        header['cmap'] = 'MAP '
+        header['stamp'] = [68, 65, 0, 0]  # little-endian
+        return header
+
+    def __write_mrc_stats(self, shape, dtype):
+        """ Add the minimum, maximum and mean values to the MRC header. """
+        low, high, total = self.stats
+        if self.exp.meta_data.get('mpi') is True:
+            comm = MPI.COMM_WORLD
+            low = comm.allreduce(low, op=MPI.MIN)
+            high = comm.allreduce(high, op=MPI.MAX)
+            total = comm.allreduce(total, op=MPI.SUM)
+        if MPI.COMM_WORLD.rank == 0:
+            stats = (low, high, total/np.prod(shape))
+            with open(self.filename, 'r+b') as f:
+                self.__get_mrc_header(shape, dtype, stats).tofile(f)
+        self.exp._barrier()
@@ -112,13 +112,62 @@ class Hdf5Utils(object):
             self.exp._barrier()
             chunking = Chunking(self.exp, current_and_next)
             chunks = chunking._calculate_chunking(shape, data.dtype)
+            filters = self._get_filters(key, data.backing_file)
             self.exp._barrier()
             data.data = group.create_dataset("data", shape, data.dtype,
-                                             chunks=chunks)
+                                             chunks=chunks, **filters)
+            if chunks is not True:
+                data.data_info.set('chunk_cache', chunking._get_chunk_cache(
+                    shape, chunks, data.dtype))
+                data.data = self._open_dataset(data.backing_file,
+                                               data.data.name, data)
         self.exp._barrier()
 
         return group_name, group
 
+    def _get_filters(self, key, backing_file):
+        """
+        Get the hdf5 filters for an output dataset from the compression
+        option of its link type ('none', 'lzf', 'gzip' or 'gzip:<level>').
+        The shuffle filter is applied with any compression.  Parallel hdf5
+        only supports filters with collective writes, and the data is
+        written independently, so no filters are applied to files opened
+        with the mpio driver.
+        """
+        link_type = self.exp.meta_data.get(['link_type', key])
+        compression = self.exp.meta_data.get_dictionary().get(
+            'compression', {}).get(link_type, 'none')
+        if not compression or compression == 'none':
+            return {}
+
+        if backing_file.driver == 'mpio':
+            logging.warning("Filters require collective writes in parallel "
+                            "hdf5: %s data will not be compressed.",
+                            link_type)
+            return {}
+
+        name = compression.split(':')[0]
+        if name not in ['gzip', 'lzf']:
+            raise ValueError("Unknown compression filter %s" % compression)
+        filters = {'compression': name, 'shuffle': True, 'fletcher32': False}
+        if name == 'gzip' and ':' in compression:
+            filters['compression_opts'] = int(compression.split(':')[1])
+        return filters
+
+    def _open_dataset(self, backing_file, entry, data):
+        """
+        Open a dataset with its chunk cache, if one has been set.
+        """
+        try:
+            nslots, nbytes = data.data_info.get('chunk_cache')
+        except KeyError:
+            return backing_file[entry]
+        dapl = h5py.h5p.create(h5py.h5p.DATASET_ACCESS)
+        # evict chunks that have been fully read or written first
+        dapl.set_chunk_cache(nslots, nbytes, 1.0)
+        logging.debug("Opening %s with a %i byte chunk cache", entry, nbytes)
+        return h5py.Dataset(h5py.h5d.open(backing_file.id, entry, dapl=dapl))
+
     def _close_file(self, data):
         """
         Closes the backing file
@@ -142,4 +191,4 @@ class Hdf5Utils(object):
         self._close_file(data)
         logging.debug("Re-opening the backing file %s in read only", filename)
         data.backing_file = self._open_backing_h5(filename, 'r')
-        data.data = data.backing_file[entry]
+        data.data = self._open_dataset(data.backing_file, entry, data)
@@ -0,0 +1,162 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: memory_utils
+   :platform: Unix
+   :synopsis: A class to hold intermediate datasets in memory in place of \
+       hdf5 backing files.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import logging
+import numpy as np
+from mpi4py import MPI
+
+from savu.data.data_structures.data_types.distributed_array import \
+    DistributedArray
+
+
+class MemoryUtils(object):
+    """
+    A class to hold intermediate datasets in memory.  With a single process
+    the data is held in a numpy array, and with multiple processes in an MPI
+    shared memory window.  Shared memory is only available if all processes
+    are on the same node.
+    """
+
+    def __init__(self, exp):
+        self.exp = exp
+        self.budget = \
+            int(exp.meta_data.get_dictionary().get('memory_budget', 0))
+        self.used = 0
+        self.comm = None
+        self.windows = {}
+        if self.budget and exp.meta_data.get("mpi") is True:
+            self.__set_shared_comm()
+
+    def __set_shared_comm(self):
+        comm = MPI.COMM_WORLD.Split_type(MPI.COMM_TYPE_SHARED)
+        if comm.size == MPI.COMM_WORLD.size:
+            self.comm = comm
+        else:
+            logging.info("Processes span more than one node: intermediate "
+                         "datasets will be written to file.")
+            self.budget = 0
+
+    def _in_memory(self, data, key):
+        """
+        Reserve memory for an intermediate dataset if it fits in the memory
+        budget.
+
+        :returns: True if the dataset should be held in memory.
+        :rtype: bool
+        """
+        if self.exp.meta_data.get(['link_type', key]) != 'intermediate':
+            return False
+        nbytes = self._get_nbytes(data)
+        if self.used + nbytes > self.budget:
+            return False
+        self.used += nbytes
+        data.data_info.set('memory_bytes', nbytes)
+        return True
+
+    def _get_nbytes(self, data):
+        """ The number of bytes of a dataset held by this process. """
+        return int(np.prod(data.get_shape()))*np.dtype(data.dtype).itemsize
+
+    def _release(self, data):
+        """ Return the memory reserved for a dataset to the budget. """
+        self.used -= data.data_info.get_dictionary().get('memory_bytes', 0)
+        data.data_info.set('memory_bytes', 0)
+
+    def _create_entries(self, data):
+        """
+        Allocate the in-memory array for a dataset.
+        """
+        shape = data.get_shape()
+        dtype = np.dtype(data.dtype)
+        logging.debug("Holding dataset %s %s in memory", data.get_name(),
+                      shape)
+        if self.comm is None:
+            data.data = np.empty(shape, dtype=dtype)
+        else:
+            nbytes = int(np.prod(shape))*dtype.itemsize \
+                if self.comm.rank == 0 else 0
+            win = MPI.Win.Allocate_shared(nbytes, dtype.itemsize,
+                                          comm=self.comm)
+            buf, itemsize = win.Shared_query(0)
+            data.data = np.ndarray(buffer=buf, dtype=dtype, shape=shape)
+            self.windows[id(data.data)] = win
+        data.data_info.set('in_memory', True)
+
+    def _is_in_memory(self, data):
+        return data.data_info.get_dictionary().get('in_memory', False)
+
+    def _close(self, data):
+        """
+        Release the memory associated with a dataset.
+        """
+        if not self._is_in_memory(data) or data.data is None:
+            return
+        self.exp._barrier()
+        win = self.windows.pop(id(data.data), None)
+        data.data = None
+        if win is not None:
+            win.Free()
+        self._release(data)
+        self.exp._barrier()
+
+
+class DistributedUtils(MemoryUtils):
+    """
+    A class to hold intermediate datasets in memory, distributed between the
+    processes.  Each process only holds the section of the data it accesses,
+    so the processes can be on any number of nodes.  If a memory budget is
+    set, it applies to the data held by each process.
+    """
+
+    def __init__(self, exp):
+        self.exp = exp
+        self.budget = \
+            int(exp.meta_data.get_dictionary().get('memory_budget', 0))
+        self.used = 0
+        self.nProcs = len(exp.meta_data.get('processes'))
+
+    def _in_memory(self, data, key):
+        if self.exp.meta_data.get(['link_type', key]) != 'intermediate':
+            return False
+        nbytes = self._get_nbytes(data)
+        if self.budget and self.used + nbytes > self.budget:
+            return False
+        self.used += nbytes
+        data.data_info.set('memory_bytes', nbytes)
+        return True
+
+    def _get_nbytes(self, data):
+        return super(DistributedUtils, self)._get_nbytes(data)/self.nProcs
+
+    def _create_entries(self, data):
+        logging.debug("Distributing dataset %s %s between processes",
+                      data.get_name(), data.get_shape())
+        data.data = DistributedArray(data.get_shape(), data.dtype)
+        data.data_info.set('in_memory', True)
+
+    def _close(self, data):
+        if self._is_in_memory(data) and data.data is not None:
+            data.data._free()
+            data.data = None
+            self._release(data)
@@ -25,6 +25,7 @@ import inspect
 import tempfile
 import os
 import copy
+import h5py
 
 from savu.core.plugin_runner import PluginRunner
 from savu.data.experiment_collection import Experiment
@@ -166,6 +167,8 @@ def set_options(path, **kwargs):
     options['run_type'] = 'test'
     options['verbose'] = 'True'
     options['link_type'] = 'final_result'
+    options['pipeline'] = kwargs.get('pipeline', 0)
+    options['threads'] = kwargs.get('threads', 1)
     return options
 
 
@@ -201,6 +204,22 @@ def get_data_object(exp):
     return data, pData
 
 
+def get_final_results(exp):
+    """ Read the final results of a plugin run from the output nexus file.
+
+    :returns: The final result datasets, keyed on the dataset name.
+    :rtype: dict(np.ndarray)
+    """
+    results = {}
+    prefix = 'final_result_'
+    with h5py.File(exp.meta_data.get('nxs_filename'), 'r') as nxs_file:
+        for key in nxs_file['entry'].keys():
+            if key.startswith(prefix):
+                results[key[len(prefix):]] = \
+                    nxs_file['entry'][key]['data'][...]
+    return results
+
+
 def set_process(exp, process, processes):
     exp.meta_data.set('process', process)
     exp.meta_data.set('processes', processes)
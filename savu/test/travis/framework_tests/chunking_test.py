@@ -41,16 +41,20 @@ class ChunkingTests(unittest.TestCase):
 #            }
 #        run_protected_plugin_runner(options)
 
-    def create_chunking_instance(self, current_list, nnext_list, nProcs):
+    def create_chunking_instance(self, current_list, nnext_list, nProcs,
+                                 future_lists=[], cache=None):
         current = self.create_pattern('a', current_list)
         nnext = self.create_pattern('b', nnext_list)
+        future = [self.create_pattern('b', f) for f in future_lists]
         options = tu.set_experiment('tomoRaw')
         options['processes'] = range(nProcs)
+        if cache:
+            options['chunk_cache'] = cache
         # set a dummy process list
         options['process_file'] = \
             tu.get_test_process_path('basic_tomo_process.nxs')
         exp = Experiment(options)
-        test_dict = {'current': current, 'next': nnext}
+        test_dict = {'current': current, 'next': nnext, 'future': future}
         chunking = Chunking(exp, test_dict)
         return chunking
 
@@ -102,12 +106,12 @@ class ChunkingTests(unittest.TestCase):
         shape = (5000, 5000, 5000)
         chunking = self.create_chunking_instance(current, nnext, nProcs)
         chunks = chunking._calculate_chunking(shape, np.float32)
-        self.assertEqual(self.amend_chunks(chunks), (1, 625, 313))
+        self.assertEqual(self.amend_chunks(chunks), (1, 40, 5000))
 
         shape = (5000, 5000, 5000)
         chunking = self.create_chunking_instance(current, nnext, nProcs)
         chunks = chunking._calculate_chunking(shape, np.float32)
-        self.assertEqual(self.amend_chunks(chunks), (1, 625, 313))
+        self.assertEqual(self.amend_chunks(chunks), (1, 40, 5000))
 
         shape = (1, 800, 500)
         chunking = self.create_chunking_instance(current, nnext, nProcs)
@@ -121,13 +125,13 @@ class ChunkingTests(unittest.TestCase):
         nProcs = 1
         chunking = self.create_chunking_instance(current, nnext, nProcs)
         chunks = chunking._calculate_chunking(shape, np.float32)
-        self.assertEqual(self.amend_chunks(chunks), (50, 50, 100))
+        self.assertEqual(self.amend_chunks(chunks), (8, 38, 100))
 
         current = [8, (0,), (1, 2)]
         nnext = [4, (1,), (0, 2)]
         chunking = self.create_chunking_instance(current, nnext, nProcs)
         chunks = chunking._calculate_chunking(shape, np.float32)
-        self.assertEqual(self.amend_chunks(chunks), (48, 52, 100))
+        self.assertEqual(self.amend_chunks(chunks), (8, 38, 100))
 
         nProcs = 10
         chunking = self.create_chunking_instance(current, nnext, nProcs)
@@ -147,26 +151,71 @@ class ChunkingTests(unittest.TestCase):
         nnext = [1, (2, 3), (0, 1)]
         chunking = self.create_chunking_instance(current, nnext, nProcs)
         chunks = chunking._calculate_chunking(shape, np.float32)
-        self.assertEqual(self.amend_chunks(chunks), (23, 22, 22, 22))
+        self.assertEqual(self.amend_chunks(chunks), (25, 11, 1, 250))
 
         current = [1, (0,), (1, 2, 3)]
         nnext = [1, (0,), (1, 2, 3)]
         chunking = self.create_chunking_instance(current, nnext, nProcs)
         chunks = chunking._calculate_chunking(shape, np.float32)
-        self.assertEqual(self.amend_chunks(chunks), (1, 44, 75, 63))
+        self.assertEqual(self.amend_chunks(chunks), (1, 1, 300, 500))
 
         current = [4, (0,), (1, 2, 3)]
         nnext = [8, (1, 2), (0, 3)]
         chunking = self.create_chunking_instance(current, nnext, nProcs)
         chunks = chunking._calculate_chunking(shape, np.float32)
-        self.assertEqual(self.amend_chunks(chunks), (8, 8, 7, 500))
+        self.assertEqual(self.amend_chunks(chunks), (8, 8, 2, 500))
 
         nProcs = 200
         current = [4, (0,), (1, 2, 3)]
         nnext = [8, (1, 2), (0, 3)]
         chunking = self.create_chunking_instance(current, nnext, nProcs)
         chunks = chunking._calculate_chunking(shape, np.float32)
-        self.assertEqual(self.amend_chunks(chunks), (4, 8, 15, 500))
+        self.assertEqual(self.amend_chunks(chunks), (4, 8, 10, 500))
+
+    def test_chunks_future_patterns(self):
+        proj = [1, (0,), (1, 2)]
+        sino = [1, (1,), (0, 2)]
+        shape = (1800, 2160, 2560)
+        nProcs = 1
+        chunking = self.create_chunking_instance(proj, sino, nProcs)
+        chunks = chunking._calculate_chunking(shape, np.float32)
+        self.assertEqual(self.amend_chunks(chunks), (4, 5, 2560))
+
+        # the dataset is read three times as a sinogram
+        chunking = self.create_chunking_instance(
+            proj, sino, nProcs, future_lists=[sino, sino, sino])
+        chunks = chunking._calculate_chunking(shape, np.float32)
+        self.assertEqual(self.amend_chunks(chunks), (8, 3, 2560))
+
+    def test_chunks_cache_size(self):
+        proj = [1, (0,), (1, 2)]
+        sino = [1, (1,), (0, 2)]
+        shape = (300, 200, 250)
+        nProcs = 1
+        chunking = self.create_chunking_instance(proj, sino, nProcs)
+        chunks = chunking._calculate_chunking(shape, np.float32)
+        self.assertEqual(self.amend_chunks(chunks), (5, 2, 250))
+        self.assertLessEqual(np.prod(chunks)*4, 1000000)
+
+        # the chunks touched by one block now fit in the cache
+        chunking = self.create_chunking_instance(proj, sino, nProcs,
+                                                 cache=20000000)
+        chunks = chunking._calculate_chunking(shape, np.float32)
+        self.assertEqual(self.amend_chunks(chunks), (75, 50, 250))
+
+    def test_chunk_cache(self):
+        proj = [1, (0,), (1, 2)]
+        sino = [1, (1,), (0, 2)]
+        chunking = self.create_chunking_instance(proj, sino, 1)
+        # 450 chunks are read per sinogram
+        cache = chunking._get_chunk_cache(
+            (1800, 2160, 2560), (4, 5, 2560), np.float32)
+        self.assertEqual(cache, (45007, 92160000))
+
+        # never smaller than the default cache
+        cache = chunking._get_chunk_cache(
+            (300, 200, 250), (5, 2, 250), np.float32)
+        self.assertEqual(cache, (10007, 1000000))
 
 if __name__ == "__main__":
     unittest.main()
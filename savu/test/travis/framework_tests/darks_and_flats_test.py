@@ -0,0 +1,154 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: darks_and_flats_test
+   :platform: Unix
+   :synopsis: Test the reading of data with associated darks and flats.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import sys
+import h5py
+import tempfile
+import unittest
+import subprocess
+import numpy as np
+from mpi4py import MPI
+from distutils.spawn import find_executable
+
+from savu.data.meta_data import MetaData
+from savu.data.data_structures.data_types.data_plus_darks_and_flats import \
+    DataWithDarksAndFlats, ImageKey
+
+
+class DummyExperiment(object):
+
+    def __init__(self, mpi):
+        self.meta_data = MetaData()
+        self.meta_data.set('mpi', mpi)
+
+
+class DummyData(object):
+
+    def __init__(self, data, mpi=False):
+        self.data = data
+        self.exp = DummyExperiment(mpi)
+
+
+def create_image_key_data(mpi):
+    image_key = np.array([2]*3 + [1]*4 + [0]*10 + [1]*5)
+    array = np.random.RandomState(0).rand(4, len(image_key), 6)
+    data = ImageKey(DummyData(array, mpi=mpi), image_key, 1)
+    dark = array[:, image_key == 2].mean(axis=1)
+    flat = array[:, image_key == 1].mean(axis=1)
+    return data, dark, flat
+
+
+def reduce_means_mpi():
+    """ Reduce the means on all processes and access them on one process only
+    (run with mpirun). """
+    data, dark, flat = create_image_key_data(True)
+    data._reduce_means()
+    if MPI.COMM_WORLD.rank == 0:
+        np.testing.assert_allclose(data.dark_mean(), dark, rtol=1e-6)
+        np.testing.assert_allclose(data.flat_mean(), flat, rtol=1e-6)
+    MPI.COMM_WORLD.barrier()
+
+
+class DarksAndFlatsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.array = np.arange(20*4*6, dtype=np.float32).reshape(4, 20, 6)
+        self.fname = os.path.join(tempfile.mkdtemp(), 'data.h5')
+        self.h5file = h5py.File(self.fname, 'w')
+        self.dset = self.h5file.create_dataset('data', data=self.array)
+
+    def tearDown(self):
+        self.h5file.close()
+
+    def get_runs(self, index):
+        data = DataWithDarksAndFlats(DummyData(self.dset), 1, None)
+        return data._DataWithDarksAndFlats__get_runs(np.asarray(index))
+
+    def read(self, proj_idx, data=None):
+        data = self.dset if data is None else data
+        dobj = DataWithDarksAndFlats(DummyData(data), 1, None)
+        index = [slice(1, 3), np.asarray(proj_idx), slice(None, None, 2)]
+        result = dobj._read_projections(index)
+        np.testing.assert_array_equal(
+            result, self.array[1:3, :, ::2][:, proj_idx])
+        return result
+
+    def test_runs(self):
+        self.assertEqual(self.get_runs([3]), [(0, 1, slice(3, 4, 1))])
+        self.assertEqual(self.get_runs([2, 3, 4, 5]),
+                         [(0, 4, slice(2, 6, 1))])
+        self.assertEqual(self.get_runs([0, 3, 6, 9]),
+                         [(0, 4, slice(0, 10, 3))])
+        self.assertEqual(self.get_runs([0, 1, 2, 10, 11, 15]),
+                         [(0, 3, slice(0, 3, 1)), (3, 5, slice(10, 12, 1)),
+                          (5, 6, slice(15, 16, 1))])
+        # a decreasing index is read one entry at a time
+        self.assertEqual(self.get_runs([5, 4]),
+                         [(0, 1, slice(5, 6, 1)), (1, 2, slice(4, 5, 1))])
+
+    def test_read_single_index(self):
+        self.read([7])
+        index = [slice(1, 3), 7, slice(None, None, 2)]
+        dobj = DataWithDarksAndFlats(DummyData(self.dset), 1, None)
+        np.testing.assert_array_equal(dobj._read_projections(index),
+                                      self.array[1:3, 7, ::2])
+
+    def test_read_contiguous(self):
+        self.read(range(3, 12))
+
+    def test_read_stepped(self):
+        self.read(range(1, 20, 4))
+
+    def test_read_non_contiguous(self):
+        self.read([0, 1, 2, 5, 6, 10, 13, 16, 19])
+        self.read([8, 2, 3])
+
+    def test_read_array(self):
+        # arrays without read_direct are indexed in the same runs
+        self.read([0, 1, 2, 5, 6, 10, 13, 16, 19], data=self.array)
+
+    def test_means(self):
+        data, dark, flat = create_image_key_data(False)
+        data._reduce_means()
+        self.assertEqual(len(data.means), 2)
+        np.testing.assert_allclose(data.dark_mean(), dark, rtol=1e-6)
+        np.testing.assert_allclose(data.flat_mean(), flat, rtol=1e-6)
+
+    def test_means_not_reduced(self):
+        data, dark, flat = create_image_key_data(False)
+        np.testing.assert_allclose(data.dark_mean(), dark, rtol=1e-6)
+        np.testing.assert_allclose(data.flat_mean(), flat, rtol=1e-6)
+
+    def test_means_mpi(self):
+        if find_executable('mpirun') is None:
+            self.skipTest("mpirun is not available.")
+        cmd = ['mpirun', '-np', '2', sys.executable,
+               os.path.abspath(__file__.replace('.pyc', '.py')), 'means']
+        self.assertEqual(subprocess.call(cmd), 0)
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['means']:
+        reduce_means_mpi()
+    else:
+        unittest.main()
@@ -22,6 +22,7 @@
 """
 
 import unittest
+import numpy as np
 
 import savu.test.test_utils as tu
 from savu.core.plugin_runner import PluginRunner
@@ -41,5 +42,18 @@ class Test(unittest.TestCase):
         self.assertEqual(exp.index['in_data'][out_data_name].get_shape(),
                          (91, 68, 80))
 
+    def test_precision_policy(self):
+        options = tu.set_experiment('tomo')
+        options['precision'] = 'float16'
+        plugin = 'savu.plugins.reshape.downsample_filter'
+        tu.set_plugin_list(options, plugin)
+
+        out_data_name = options['plugin_list'][1]['data']['out_datasets'][0]
+        plugin_runner = PluginRunner(options)
+        exp = plugin_runner._run_plugin_list()
+
+        self.assertEqual(exp.index['in_data'][out_data_name].dtype,
+                         np.dtype(np.float16))
+
 if __name__ == "__main__":
     unittest.main()
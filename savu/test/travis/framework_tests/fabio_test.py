@@ -0,0 +1,127 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: fabio_test
+   :platform: Unix
+   :synopsis: Test the reading of images with the FabIO data type.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import glob
+import fabio
+import tempfile
+import unittest
+import numpy as np
+
+import savu.test.test_utils as tu
+from savu.data.meta_data import MetaData
+from savu.data.data_structures.data_types.fabIO import FabIO, \
+    _get_tiff_layout
+
+
+class DummyExperiment(object):
+
+    def __init__(self, threads):
+        self.meta_data = MetaData()
+        self.meta_data.set('threads', threads)
+
+    def _barrier(self):
+        pass
+
+
+class DummyData(object):
+
+    def __init__(self, threads=1):
+        self.exp = DummyExperiment(threads)
+
+
+class FabIOTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tu.get_test_data_path('image_test/tiffs')
+        self.files = sorted(glob.glob(os.path.join(self.folder, 'raw_*')))
+        self.images = np.array([fabio.open(f).data for f in self.files])
+
+    def test_tiff_layout(self):
+        for fname, image in zip(self.files, self.images):
+            offset, dtype, shape = _get_tiff_layout(fname)
+            mapped = np.memmap(fname, dtype=dtype, mode='r', offset=offset,
+                               shape=shape)
+            np.testing.assert_array_equal(mapped, image)
+
+    def test_not_tiff(self):
+        fname = tu.get_test_data_path('image_test/angles.txt')
+        self.assertIsNone(_get_tiff_layout(fname))
+
+    def read(self, data, index):
+        result = data[index]
+        np.testing.assert_array_equal(result, self.images[index])
+        return result
+
+    def test_read(self):
+        data = FabIO(self.folder, DummyData(), [0], data_prefix='raw_')
+        self.assertEqual(data.get_shape(), self.images.shape)
+        # projections
+        self.read(data, (slice(0, 4, 1), slice(0, 135, 1), slice(0, 160, 1)))
+        # a block of sinograms from every image
+        self.read(data, (slice(0, 91, 1), slice(10, 13, 1), slice(0, 160, 1)))
+        # a stepped selection
+        self.read(data, (slice(5, 90, 7), slice(3, 130, 5), slice(2, 99, 3)))
+        # every image has been memory-mapped and cached
+        self.assertEqual(len(data.open_files), len(self.files))
+        for image in data.open_files.values():
+            self.assertIsInstance(image, np.memmap)
+
+    def test_read_threads(self):
+        index = (slice(0, 91, 1), slice(20, 40, 1), slice(0, 160, 1))
+        serial = FabIO(self.folder, DummyData(), [0], data_prefix='raw_')
+        serial.read_threads = 1
+        threaded = FabIO(self.folder, DummyData(threads=8), [0],
+                         data_prefix='raw_')
+        np.testing.assert_array_equal(self.read(serial, index),
+                                      self.read(threaded, index))
+
+    def test_max_open_files(self):
+        data = FabIO(self.folder, DummyData(), [0], data_prefix='raw_')
+        data.max_open_files = 10
+        data.read_threads = 1
+        self.read(data, (slice(0, 91, 1), slice(0, 5, 1), slice(0, 160, 1)))
+        self.assertEqual(len(data.open_files), 10)
+        # the most recently read images are kept
+        self.assertEqual(list(data.open_files.keys()), self.files[-10:])
+
+    def test_sinogram_store(self):
+        folder = tempfile.mkdtemp()
+        frames = FabIO(self.folder, DummyData(), [0], data_prefix='raw_')
+        data = FabIO(self.folder, DummyData(), [0], data_prefix='raw_')
+        data._create_sinogram_store(folder, 'tomo')
+        self.assertEqual(os.listdir(folder), ['tomo_sinograms_0.npy'])
+        # sinograms, and a stepped selection, read from the store and frame
+        # by frame from the images
+        for index in [(slice(0, 91, 1), slice(10, 13, 1), slice(0, 160, 1)),
+                      (slice(3, 88, 4), slice(0, 135, 9), slice(7, 150, 2))]:
+            np.testing.assert_array_equal(self.read(data, index),
+                                          self.read(frames, index))
+
+        # the store is removed with the dataset
+        data._close()
+        self.assertEqual(os.listdir(folder), [])
+        self.assertIsNone(data.stores)
+
+if __name__ == "__main__":
+    unittest.main()
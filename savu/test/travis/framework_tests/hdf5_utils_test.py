@@ -0,0 +1,105 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: hdf5_utils_test
+   :platform: Unix
+   :synopsis: Test the hdf5 filters and chunk cache of output datasets.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import h5py
+import unittest
+import numpy as np
+
+import savu.test.test_utils as tu
+from savu.data.meta_data import MetaData
+from savu.data.experiment_collection import Experiment
+from savu.plugins.savers.utils.hdf5_utils import Hdf5Utils
+
+
+class DummyData(object):
+
+    def __init__(self):
+        self.data_info = MetaData()
+
+
+class Hdf5UtilsTest(unittest.TestCase):
+
+    def create_hdf5_utils(self, mpi, compression):
+        options = tu.set_experiment('tomoRaw')
+        options['process_file'] = \
+            tu.get_test_process_path('basic_tomo_process.nxs')
+        exp = Experiment(options)
+        exp.meta_data.set('mpi', mpi)
+        exp.meta_data.set(['link_type', 'tomo'], 'intermediate')
+        exp.meta_data.set('compression', {'intermediate': compression})
+        return Hdf5Utils(exp), options['out_path']
+
+    def write_and_read(self, hdf5, path, filters):
+        fname = os.path.join(path, 'test.h5')
+        data = np.arange(8*10*12, dtype=np.float32).reshape(8, 10, 12)
+        backing_file = hdf5._open_backing_h5(fname, 'w')
+        dset = backing_file.create_dataset(
+            'data', data.shape, data.dtype, chunks=(1, 10, 12), **filters)
+        dobj = DummyData()
+        dobj.data_info.set('chunk_cache', (101, 2**20))
+        dset = hdf5._open_dataset(backing_file, dset.name, dobj)
+        self.assertEqual(dset.id.get_access_plist().get_chunk_cache()[:2],
+                         (101, 2**20))
+        # independent writes, as in the transport
+        for i in range(data.shape[0]):
+            dset[i] = data[i]
+        backing_file.close()
+
+        backing_file = hdf5._open_backing_h5(fname, 'r')
+        dset = hdf5._open_dataset(backing_file, 'data', DummyData())
+        np.testing.assert_array_equal(dset[...], data)
+        compression = dset.compression
+        backing_file.close()
+        return compression
+
+    def test_serial(self):
+        hdf5, path = self.create_hdf5_utils(False, 'gzip:4')
+        backing_file = h5py.File(os.path.join(path, 'filters.h5'), 'w')
+        filters = hdf5._get_filters('tomo', backing_file)
+        backing_file.close()
+        self.assertEqual(filters, {'compression': 'gzip', 'shuffle': True,
+                                   'fletcher32': False,
+                                   'compression_opts': 4})
+        self.assertEqual(self.write_and_read(hdf5, path, filters), 'gzip')
+
+    def test_no_compression(self):
+        hdf5, path = self.create_hdf5_utils(False, 'none')
+        backing_file = h5py.File(os.path.join(path, 'filters.h5'), 'w')
+        self.assertEqual(hdf5._get_filters('tomo', backing_file), {})
+        backing_file.close()
+
+    def test_mpi(self):
+        if not h5py.get_config().mpi:
+            self.skipTest("h5py is not built with parallel hdf5")
+        hdf5, path = self.create_hdf5_utils(True, 'lzf')
+        backing_file = \
+            hdf5._open_backing_h5(os.path.join(path, 'filters.h5'), 'w')
+        self.assertEqual(backing_file.driver, 'mpio')
+        filters = hdf5._get_filters('tomo', backing_file)
+        backing_file.close()
+        self.assertEqual(filters, {})
+        self.assertEqual(self.write_and_read(hdf5, path, filters), None)
+
+if __name__ == "__main__":
+    unittest.main()
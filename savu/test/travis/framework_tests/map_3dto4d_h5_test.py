@@ -0,0 +1,131 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: map_3dto4d_h5_test
+   :platform: Unix
+   :synopsis: Test the reading of a 3D hdf5 dataset as a set of 4D scans.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import h5py
+import tempfile
+import unittest
+import numpy as np
+
+from savu.data.data_structures.data_types.map_3dto4d_h5 import Map3dto4dh5
+
+
+class RecordedDataset(object):
+    """ An hdf5 dataset that records the selections read from it. """
+
+    def __init__(self, dset):
+        self.dset = dset
+        self.shape = dset.shape
+        self.dtype = dset.dtype
+        self.reads = []
+
+    def __getitem__(self, idx):
+        self.reads.append(idx)
+        return self.dset[idx]
+
+
+class Map3dto4dh5Test(unittest.TestCase):
+
+    def setUp(self):
+        self.n_angles, self.n_scans = 6, 5
+        self.array = np.random.rand(
+            self.n_angles*self.n_scans, 4, 7).astype(np.float32)
+        fname = os.path.join(tempfile.mkdtemp(), 'map.h5')
+        self.h5file = h5py.File(fname, 'w')
+        self.dset = RecordedDataset(
+            self.h5file.create_dataset('data', data=self.array))
+        self.data = Map3dto4dh5(self.dset, self.n_angles)
+        # (angles, y, x, scans)
+        self.expected = self.array.reshape(
+            (self.n_scans, self.n_angles) + self.array.shape[1:])
+        self.expected = self.expected.transpose(1, 2, 3, 0)
+
+    def tearDown(self):
+        self.h5file.close()
+
+    def read(self, idx, nReads):
+        self.dset.reads = []
+        result = self.data[idx]
+        np.testing.assert_array_equal(result, self.expected[idx])
+        self.assertEqual(len(self.dset.reads), nReads)
+        return result
+
+    def test_shape(self):
+        self.assertEqual(self.data.get_shape(), self.expected.shape)
+
+    def test_block(self):
+        # all angles of three scans in a single hyperslab
+        idx = (slice(0, 6, 1), slice(0, 4, 1), slice(2, 5, 1),
+               slice(1, 4, 1))
+        self.read(idx, 1)
+        self.assertEqual(self.dset.reads[0][0], slice(6, 24))
+        # every other scan and five of the six angles
+        idx = (slice(1, 6, 1), slice(1, 3, 1), slice(0, 7, 1),
+               slice(0, 5, 2))
+        self.read(idx, 1)
+        self.assertEqual(self.dset.reads[0][0], slice(0, 30))
+        # stepped angles
+        idx = (slice(0, 6, 2), slice(0, 4, 1), slice(0, 7, 1),
+               slice(2, 4, 1))
+        self.read(idx, 1)
+
+    def test_transposed_view(self):
+        idx = (slice(0, 6, 1), slice(0, 4, 1), slice(0, 7, 1),
+               slice(0, 5, 1))
+        result = self.read(idx, 1)
+        # the 4D section is a view of the block that was read
+        self.assertFalse(result.flags['OWNDATA'])
+        self.assertFalse(result.flags['C_CONTIGUOUS'])
+        block = result.base
+        while block.base is not None:
+            block = block.base
+        self.assertEqual(block.shape, (30, 4, 7))
+        self.assertTrue(np.may_share_memory(result, block))
+
+    def test_frames(self):
+        # a single angle of every scan is read one scan at a time
+        idx = (slice(2, 3, 1), slice(0, 4, 1), slice(0, 7, 1),
+               slice(0, 5, 1))
+        result = self.read(idx, 5)
+        self.assertTrue(result.flags['OWNDATA'])
+        self.assertEqual(self.dset.reads[3][0], slice(20, 21, 1))
+        # two angles of two distant scans
+        idx = (slice(3, 5, 1), slice(0, 4, 1), slice(1, 6, 1),
+               slice(0, 5, 4))
+        self.read(idx, 2)
+
+    def test_min_block_fraction(self):
+        idx = (slice(2, 3, 1), slice(0, 4, 1), slice(0, 7, 1),
+               slice(0, 5, 1))
+        self.data.min_block_fraction = 0
+        self.read(idx, 1)
+        idx = (slice(0, 6, 1), slice(0, 4, 1), slice(0, 7, 1),
+               slice(1, 4, 1))
+        self.data.min_block_fraction = 1.1
+        self.read(idx, 3)
+        idx = (slice(0, 6, 2), slice(0, 4, 1), slice(0, 7, 1),
+               slice(1, 3, 1))
+        self.read(idx, 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+.. module:: memory_test
+   :platform: Unix
+   :synopsis: Run plugin lists with intermediate datasets held in memory.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import glob
+import unittest
+import numpy as np
+
+import savu.test.test_utils as tu
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner
+
+
+class MemoryTest(unittest.TestCase):
+
+    def __run(self, process_list, budget):
+        data_file = tu.get_test_data_path('24737.nxs')
+        process_file = tu.get_test_process_path(process_list)
+        options = tu.set_options(data_file, process_file=process_file)
+        options['memory_budget'] = budget
+        return run_protected_plugin_runner(options)
+
+    def __get_datasets(self, exp):
+        """ The tomo dataset created by each processing plugin. """
+        datasets = exp._get_experiment_collection()['datasets']
+        return [d['tomo'] for d in datasets]
+
+    def __in_memory(self, exp):
+        return [d.data_info.get_dictionary().get('in_memory', False)
+                for d in self.__get_datasets(exp)]
+
+    def __files(self, exp):
+        return glob.glob(os.path.join(exp.meta_data.get('out_path'),
+                                      'tomo_p*.h5'))
+
+    def test_intermediates_in_memory(self):
+        exp = self.__run('basic_tomo_process.nxs', 1e9)
+        # the final result is always written to file
+        self.assertEqual(self.__in_memory(exp), [True, True, True, False])
+        self.assertEqual(len(self.__files(exp)), 1)
+
+    def test_budget_exceeded(self):
+        exp = self.__run('basic_tomo_process.nxs', 1)
+        self.assertEqual(self.__in_memory(exp), [False]*4)
+        self.assertEqual(len(self.__files(exp)), 4)
+
+    def test_budget_released(self):
+        exp = self.__run('basic_tomo_process.nxs', 1e9)
+        data = self.__get_datasets(exp)[0]
+        nbytes = np.prod(data.get_shape())*np.dtype(data.dtype).itemsize
+
+        # the output of the second plugin does not fit alongside its input,
+        # but the input is released in time for the output of the third
+        exp = self.__run('basic_tomo_process.nxs', nbytes)
+        self.assertEqual(self.__in_memory(exp), [True, False, True, False])
+        self.assertEqual(len(self.__files(exp)), 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+.. module:: mpi_transport_test
+   :platform: Unix
+   :synopsis: Test the in-memory distribution of data in the mpi transport.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import sys
+import h5py
+import tempfile
+import unittest
+import subprocess
+import numpy as np
+from mpi4py import MPI
+from distutils.spawn import find_executable
+
+import savu.test.test_utils as tu
+from savu.data.data_structures.data_types.distributed_array import \
+    DistributedArray
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner
+
+
+def redistribute_mpi():
+    """ Write projections and redistribute to padded sinograms between all
+    the processes (run with mpirun). """
+    rank, size = MPI.COMM_WORLD.rank, MPI.COMM_WORLD.size
+    data = np.arange(4*size*5*6, dtype=np.float32).reshape(4*size, 5, 6)
+    darray = DistributedArray(data.shape, data.dtype)
+    proj = [(slice(i, i+2), slice(None), slice(None))
+            for i in range(4*rank, 4*(rank+1), 2)]
+    darray._allocate(proj)
+    for sl in proj:
+        darray[sl] = data[sl]
+    sino = [(slice(None), slice(i-1, i+2), slice(None))
+            for i in range(rank, 5, size)]
+    darray._redistribute(sino)
+    for sl in sino:
+        sl = (sl[0], slice(max(sl[1].start, 0), min(sl[1].stop, 5)), sl[2])
+        np.testing.assert_array_equal(darray[sl], data[sl])
+
+
+def run_mpi_transport(out_path):
+    """ Run a process list that changes pattern with the mpi transport on all
+    the processes (run with mpirun). """
+    options = MpiTransportTest().get_options('mpi', out_path=out_path)
+    options['process_names'] = \
+        ','.join('CPU%i' % i for i in range(MPI.COMM_WORLD.size))
+    exp = run_protected_plugin_runner(options)
+    if MPI.COMM_WORLD.rank == 0:
+        np.savez(os.path.join(out_path, 'results.npz'),
+                 **tu.get_final_results(exp))
+
+
+class MpiTransportTest(unittest.TestCase):
+
+    def get_options(self, transport, **kwargs):
+        data_file = tu.get_test_data_path('24737.nxs')
+        process_file = tu.get_test_process_path('basic_tomo_process.nxs')
+        return tu.set_options(data_file, process_file=process_file,
+                              transport=transport, **kwargs)
+
+    def mpirun(self, *args):
+        if find_executable('mpirun') is None:
+            self.skipTest("mpirun is not available.")
+        cmd = ['mpirun', '-np', '2', sys.executable,
+               os.path.abspath(__file__.replace('.pyc', '.py'))] + list(args)
+        self.assertEqual(subprocess.call(cmd), 0)
+
+    def create_array(self):
+        data = np.arange(4*5*6, dtype=np.float32).reshape(4, 5, 6)
+        darray = DistributedArray(data.shape, data.dtype)
+        # projections written two at a time
+        proj = [(slice(0, 2), slice(None), slice(None)),
+                (slice(2, 4), slice(None), slice(None))]
+        darray._allocate(proj)
+        for sl in proj:
+            darray[sl] = data[sl]
+        return data, darray
+
+    def test_allocate(self):
+        data, darray = self.create_array()
+        self.assertEqual(darray.box, ((0, 4), (0, 5), (0, 6)))
+        np.testing.assert_array_equal(darray[1:3, :, 2:4], data[1:3, :, 2:4])
+
+    def test_redistribute(self):
+        data, darray = self.create_array()
+        # padded sinograms
+        sino = [(slice(None), slice(-1, 2), slice(None)),
+                (slice(None), slice(1, 4), slice(None))]
+        darray._redistribute(sino)
+        self.assertEqual(darray.box, ((0, 4), (0, 4), (0, 6)))
+        np.testing.assert_array_equal(darray[:, 1:4, :], data[:, 1:4, :])
+        with self.assertRaises(IndexError):
+            darray[:, 4, :]
+
+    def test_mpi_transport(self):
+        run_protected_plugin_runner(self.get_options('mpi'))
+
+    def test_redistribute_mpi(self):
+        self.mpirun('redistribute')
+
+    def test_mpi_transport_mpi(self):
+        if not h5py.get_config().mpi:
+            self.skipTest("h5py is not built with parallel hdf5.")
+        out_path = tempfile.mkdtemp()
+        self.mpirun('transport', out_path)
+        results = np.load(os.path.join(out_path, 'results.npz'))
+
+        exp = run_protected_plugin_runner(self.get_options('hdf5'))
+        expected = tu.get_final_results(exp)
+        self.assertEqual(sorted(results.keys()), sorted(expected.keys()))
+        for name in expected:
+            np.testing.assert_allclose(results[name], expected[name],
+                                       rtol=1e-5)
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['redistribute']:
+        redistribute_mpi()
+    elif sys.argv[1:2] == ['transport']:
+        run_mpi_transport(sys.argv[2])
+    else:
+        unittest.main()
@@ -0,0 +1,110 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+.. module:: output_buffer_test
+   :platform: Unix
+   :synopsis: Test that the results written directly into the transfer \
+       buffers are saved in the same way as returned results.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import unittest
+import numpy as np
+
+import savu.test.test_utils as tu
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner_no_process_list
+from savu.plugins.filters.median_filter import MedianFilter
+
+
+class OutputBufferTest(unittest.TestCase):
+
+    def setUp(self):
+        self.methods = dict((m, MedianFilter.__dict__[m]) for m in
+                            ['process_frames', 'set_filter_padding'])
+        # True for each frame whose result was written into the buffer
+        self.filled = []
+
+    def tearDown(self):
+        for name, method in self.methods.items():
+            setattr(MedianFilter, name, method)
+
+    def __set_buffered(self):
+        """ Write the median filter results into the output buffer, if it is
+        available, and return the buffer. """
+        process_frames = self.methods['process_frames']
+        filled = self.filled
+
+        def buffered_process_frames(plugin, data):
+            result = process_frames(plugin, data)
+            out = plugin.get_output_buffer()
+            filled.append(out is not None)
+            if out is None:
+                return result
+            out[...] = result
+            return out
+        MedianFilter.process_frames = buffered_process_frames
+
+    def __run(self, buffered, padded, threads=1, pipeline=0):
+        MedianFilter.process_frames = self.methods['process_frames']
+        if buffered:
+            self.__set_buffered()
+        if padded:
+            MedianFilter.set_filter_padding = \
+                self.methods['set_filter_padding']
+            params = {'kernel_size': [3, 3, 3]}
+        else:
+            MedianFilter.set_filter_padding = \
+                lambda plugin, in_data, out_data: None
+            params = {}
+        options = tu.set_experiment('tomo', threads=threads,
+                                    pipeline=pipeline)
+        plugin = 'savu.plugins.filters.median_filter'
+        plugin_dict = dict(tu.set_data_dict(['tomo'], ['test0']), **params)
+        exp = run_protected_plugin_runner_no_process_list(
+            options, plugin, data=[{}, plugin_dict, {}])
+        return tu.get_final_results(exp)
+
+    def assert_results_equal(self, expected, result):
+        self.assertTrue(expected)
+        self.assertEqual(sorted(expected.keys()), sorted(result.keys()))
+        for name in expected.keys():
+            np.testing.assert_array_equal(expected[name], result[name])
+
+    def test_unpadded(self):
+        # the buffer is available, so the results are not copied
+        expected = self.__run(False, False)
+        for kwargs in [{}, {'threads': 4}, {'threads': 2, 'pipeline': 2}]:
+            self.filled[:] = []
+            self.assert_results_equal(expected,
+                                      self.__run(True, False, **kwargs))
+            self.assertTrue(any(self.filled))
+
+    def test_padded(self):
+        # the output dataset is padded, so there is no buffer and the
+        # returned results are copied
+        expected = self.__run(False, True)
+        for threads in [1, 4]:
+            self.filled[:] = []
+            self.assert_results_equal(
+                expected, self.__run(True, True, threads=threads))
+            self.assertTrue(self.filled)
+            self.assertFalse(any(self.filled))
+
+if __name__ == "__main__":
+    unittest.main()
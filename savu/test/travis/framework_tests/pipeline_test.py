@@ -0,0 +1,68 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+.. module:: pipeline_test
+   :platform: Unix
+   :synopsis: Run plugins with the transfer pipeline switched on.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import unittest
+import numpy as np
+
+import savu.test.test_utils as tu
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner, run_protected_plugin_runner_no_process_list
+
+
+class PipelineTest(unittest.TestCase):
+
+    def __run(self, process_list, nBuffers):
+        data_file = tu.get_test_data_path('24737.nxs')
+        process_file = tu.get_test_process_path(process_list)
+        options = tu.set_options(data_file, process_file=process_file,
+                                 pipeline=nBuffers)
+        return tu.get_final_results(run_protected_plugin_runner(options))
+
+    def __run_plugin(self, plugin, nBuffers):
+        options = tu.set_experiment('tomoRaw')
+        options['pipeline'] = nBuffers
+        exp = run_protected_plugin_runner_no_process_list(options, plugin)
+        return tu.get_final_results(exp)
+
+    def assert_results_equal(self, serial, pipelined):
+        self.assertTrue(serial)
+        self.assertEqual(sorted(serial.keys()), sorted(pipelined.keys()))
+        for name in serial.keys():
+            np.testing.assert_array_equal(serial[name], pipelined[name])
+
+    def test_single_buffer(self):
+        self.assert_results_equal(self.__run('median_filter_test.nxs', 0),
+                                  self.__run('median_filter_test.nxs', 1))
+
+    def test_multiple_buffers(self):
+        self.assert_results_equal(self.__run('median_filter_test.nxs', 0),
+                                  self.__run('median_filter_test.nxs', 3))
+
+    def test_padded_plugin(self):
+        plugin = 'savu.plugins.filters.dezing_filter'
+        self.assert_results_equal(self.__run_plugin(plugin, 0),
+                                  self.__run_plugin(plugin, 2))
+
+if __name__ == "__main__":
+    unittest.main()
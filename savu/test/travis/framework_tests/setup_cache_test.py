@@ -0,0 +1,77 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+.. module:: setup_cache_test
+   :platform: Unix
+   :synopsis: Run a plugin list twice with the setup cache.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import tempfile
+import unittest
+
+import savu.test.test_utils as tu
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner_no_process_list
+
+
+class SetupCacheTest(unittest.TestCase):
+
+    def __run(self, cache, **kwargs):
+        options = tu.set_experiment('tomo')
+        options['setup_cache'] = cache
+        options.update(kwargs)
+        plugin = 'savu.plugins.filters.median_filter'
+        exp = run_protected_plugin_runner_no_process_list(options, plugin)
+        return exp.meta_data.plugin_list
+
+    def test_setup_cache(self):
+        cache = tempfile.mkdtemp()
+        checked = self.__run(cache)
+        self.assertEqual(len(os.listdir(cache)), 1)
+        cached = self.__run(cache)
+        self.assertEqual(len(os.listdir(cache)), 1)
+        self.assertEqual(checked._get_datasets_list(),
+                         cached._get_datasets_list())
+        self.assertEqual([p['id'] for p in checked.plugin_list],
+                         [p['id'] for p in cached.plugin_list])
+
+    def test_threads(self):
+        # the max frames of a thread-safe plugin depend on --threads, so a
+        # different number of threads must not use the cached plugin list
+        cache = tempfile.mkdtemp()
+        serial = self.__run(cache, threads=1)
+        threaded = self.__run(cache, threads=4)
+        self.assertEqual(len(os.listdir(cache)), 2)
+        expected = self.__run(None, threads=4)
+        self.assertEqual(threaded._get_datasets_list(),
+                         expected._get_datasets_list())
+        self.assertNotEqual(serial._get_datasets_list(),
+                            threaded._get_datasets_list())
+
+    def test_precision(self):
+        cache = tempfile.mkdtemp()
+        self.__run(cache)
+        self.__run(cache, precision='float16')
+        self.assertEqual(len(os.listdir(cache)), 2)
+        self.__run(cache, precision='float16')
+        self.assertEqual(len(os.listdir(cache)), 2)
+
+if __name__ == "__main__":
+    unittest.main()
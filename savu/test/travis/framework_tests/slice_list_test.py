@@ -0,0 +1,80 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: slice_list_test
+   :platform: Unix
+   :synopsis: unittest test class for the compact SliceList
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import unittest
+import numpy as np
+
+from savu.data.transport_data.slice_list import SliceList
+
+
+class SliceListTest(unittest.TestCase):
+
+    def __create_list(self):
+        # shape (4, 3, 5): core dim 1, slice dims 0 (fastest) and 2
+        return SliceList(3, [0, 2], [np.arange(4), np.arange(5)],
+                         constant={1: slice(0, 3, 1)})
+
+    def test_single_slice_list(self):
+        sl = self.__create_list()
+        self.assertEqual(len(sl), 20)
+        self.assertEqual(sl[0], (slice(0, 1, 1), slice(0, 3, 1),
+                                 slice(0, 1, 1)))
+        self.assertEqual(sl[5], (slice(1, 2, 1), slice(0, 3, 1),
+                                 slice(1, 2, 1)))
+        self.assertEqual(sl[-1], (slice(3, 4, 1), slice(0, 3, 1),
+                                  slice(4, 5, 1)))
+        self.assertEqual(len(list(sl)), 20)
+
+    def test_grouped(self):
+        sl = self.__create_list()._grouped(3, [0, 2], [1, 1])
+        self.assertEqual(len(sl), 7)
+        self.assertEqual(sl[1][2], slice(0, 2, 1))
+        self.assertEqual(sl[-1], (slice(2, 4, 1), slice(0, 3, 1),
+                                  slice(4, 5, 1)))
+
+    def test_banked(self):
+        sl = self.__create_list()._grouped(3, [0], [1], bank=4)
+        self.assertEqual(len(sl), 10)
+        self.assertEqual(sl[0][0], slice(0, 3, 1))
+        self.assertEqual(sl[1][0], slice(3, 4, 1))
+        self.assertEqual(sl[2][2], slice(1, 2, 1))
+
+    def test_window_fix_and_pad(self):
+        sl = self.__create_list()._grouped(3, [0], [1], bank=4)
+        sl._fix_length(0, 3, last=True)
+        sub = sl[8:10]
+        self.assertEqual(len(sub), 2)
+        self.assertEqual(sub[1][0], slice(3, 6, 1))
+        sub._pad(1, -2, 2, (4, 3, 5))
+        self.assertEqual(sub[0][1], slice(-2, 5, 1))
+        self.assertEqual(sub[0][0], slice(0, 3, 1))
+
+    def test_split_frames(self):
+        sl = SliceList(3, [0], [np.arange(2)])._grouped(2, [0], [1])
+        split = sl._split_frames(['1.2', '2.3'], (2, 4, 5))
+        self.assertEqual(len(split), 4)
+        self.assertEqual(split[1][1], slice(2, 4, None))
+        self.assertEqual(split[2][2], slice(3, 5, None))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: stitch_data_test
+   :platform: Unix
+   :synopsis: Test the threaded reading of stitched datasets.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import h5py
+import tempfile
+import unittest
+import numpy as np
+
+from savu.data.meta_data import MetaData
+from savu.data.data_structures.data_types.stitch_data import StitchData
+
+
+class DummyExperiment(object):
+
+    def __init__(self, threads):
+        self.meta_data = MetaData()
+        self.meta_data.set('threads', threads)
+
+
+class DummyData(object):
+
+    def __init__(self, data, threads):
+        self.data = data
+        self.exp = DummyExperiment(threads)
+
+    def get_shape(self):
+        return self.data.shape
+
+
+def sequential_getitem(stitched, idx):
+    """ The previous StitchData.__getitem__, reading each data object in
+    turn. """
+    size = [len(np.arange(s.start, s.stop, s.step)) for s in idx]
+    obj_list, in_slice_list, out_slice_list = stitched._get_lists(idx)
+    data = np.empty(size, dtype=stitched.dtype)
+    for i in range(len(obj_list)):
+        data[tuple(out_slice_list[i])] = \
+            stitched._getitem(obj_list[i], in_slice_list[i])
+    return data
+
+
+class StitchDataTest(unittest.TestCase):
+
+    def setUp(self):
+        self.arrays = [np.random.rand(5, 6, 7).astype(np.float32)
+                       for i in range(4)]
+        fname = os.path.join(tempfile.mkdtemp(), 'stitch.h5')
+        self.h5file = h5py.File(fname, 'w')
+        self.dsets = [self.h5file.create_dataset('data%i' % i, data=a)
+                      for i, a in enumerate(self.arrays)]
+
+    def tearDown(self):
+        self.h5file.close()
+
+    def stitch(self, data_list, stack_or_cat, dim, threads=1):
+        return StitchData([DummyData(d, threads) for d in data_list],
+                          stack_or_cat, dim)
+
+    def check(self, stitched, expected, indices):
+        for idx in indices:
+            result = stitched[idx]
+            np.testing.assert_array_equal(
+                result, sequential_getitem(stitched, idx))
+            np.testing.assert_array_equal(result, expected[idx])
+
+    def test_cat_hdf5(self):
+        # concatenated hdf5 datasets are read directly into the output
+        stitched = self.stitch(self.dsets, 'cat', 0)
+        expected = np.concatenate(self.arrays, axis=0)
+        self.assertEqual(stitched.get_shape(), expected.shape)
+        self.check(stitched, expected, [
+            (slice(0, 20, 1), slice(0, 6, 1), slice(0, 7, 1)),
+            (slice(3, 12, 1), slice(1, 4, 1), slice(0, 7, 1)),
+            (slice(1, 19, 3), slice(0, 6, 2), slice(2, 7, 1))])
+
+    def test_cat_array(self):
+        stitched = self.stitch(self.arrays, 'cat', 1, threads=8)
+        expected = np.concatenate(self.arrays, axis=1)
+        self.check(stitched, expected, [
+            (slice(0, 5, 1), slice(0, 24, 1), slice(0, 7, 1)),
+            (slice(2, 3, 1), slice(5, 20, 2), slice(0, 7, 3))])
+
+    def test_stack(self):
+        stitched = self.stitch(self.dsets, 'stack', 1)
+        expected = np.stack(self.arrays, axis=1)
+        self.assertEqual(stitched.get_shape(), expected.shape)
+        self.check(stitched, expected, [
+            (slice(0, 5, 1), slice(0, 4, 1), slice(0, 6, 1), slice(0, 7, 1)),
+            (slice(1, 4, 2), slice(1, 4, 1), slice(2, 3, 1), slice(0, 7, 2))])
+
+    def test_mixed_dtypes(self):
+        data_list = [self.dsets[0], self.arrays[1].astype(np.float64)]
+        stitched = self.stitch(data_list, 'cat', 0)
+        self.assertEqual(stitched.dtype, np.float64)
+        expected = np.concatenate(self.arrays[:2], axis=0)
+        self.check(stitched, expected.astype(np.float64), [
+            (slice(2, 9, 1), slice(0, 6, 1), slice(0, 7, 1))])
+
+if __name__ == "__main__":
+    unittest.main()
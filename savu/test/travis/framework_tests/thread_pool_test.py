@@ -0,0 +1,74 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+.. module:: thread_pool_test
+   :platform: Unix
+   :synopsis: Run thread-safe plugins with their frames processed in a \
+       thread pool.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import unittest
+import numpy as np
+
+import savu.test.test_utils as tu
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner, run_protected_plugin_runner_no_process_list
+
+
+class ThreadPoolTest(unittest.TestCase):
+
+    def __run(self, process_list, nThreads, nBuffers=0):
+        data_file = tu.get_test_data_path('24737.nxs')
+        process_file = tu.get_test_process_path(process_list)
+        options = tu.set_options(data_file, process_file=process_file,
+                                 threads=nThreads, pipeline=nBuffers)
+        return tu.get_final_results(run_protected_plugin_runner(options))
+
+    def __run_plugin(self, plugin, nThreads):
+        options = tu.set_experiment('tomoRaw')
+        options['threads'] = nThreads
+        exp = run_protected_plugin_runner_no_process_list(options, plugin)
+        return tu.get_final_results(exp)
+
+    def assert_results_equal(self, serial, threaded):
+        self.assertTrue(serial)
+        self.assertEqual(sorted(serial.keys()), sorted(threaded.keys()))
+        for name in serial.keys():
+            np.testing.assert_array_equal(serial[name], threaded[name])
+
+    def test_multiple_frames(self):
+        self.assert_results_equal(self.__run('median_filter_test.nxs', 1),
+                                  self.__run('median_filter_test.nxs', 4))
+
+    def test_threads_and_pipeline(self):
+        self.assert_results_equal(
+            self.__run('median_filter_test.nxs', 1),
+            self.__run('median_filter_test.nxs', 2, nBuffers=2))
+
+    def test_padded_plugin(self):
+        plugin = 'savu.plugins.filters.dezing_filter'
+        self.assert_results_equal(self.__run_plugin(plugin, 1),
+                                  self.__run_plugin(plugin, 3))
+
+    def test_raven_filter(self):
+        self.assert_results_equal(self.__run('raven_filter_test.nxs', 1),
+                                  self.__run('raven_filter_test.nxs', 2))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: dark_flat_field_correction_test
+   :platform: Unix
+   :synopsis: unittest for the dark and flat field correction
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import unittest
+import numpy as np
+
+from savu.plugins.corrections.dark_flat_field_correction import \
+    DarkFlatFieldCorrection
+
+
+class DarkFlatFieldCorrectionTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.dark = rng.uniform(0, 10, (5, 6))
+        self.flat = self.dark + rng.uniform(50, 100, (5, 6))
+        self.data = rng.uniform(-20, 150, (3, 5, 6))
+        # (flat - dark) is zero: 0/0 is set to zero
+        self.flat[0, 0] = self.dark[0, 0]
+        self.data[:, 0, 0] = self.dark[0, 0]
+
+    def correct(self, low=None, high=None, log=False):
+        plugin = DarkFlatFieldCorrection()
+        plugin.parameters = {'log': log}
+        plugin.warn, plugin.low, plugin.high = 0.05, low, high
+        plugin.dark, plugin.flat = self.dark, self.flat
+        with np.errstate(divide='ignore', invalid='ignore'):
+            plugin.inv_flat_minus_dark = 1.0/(self.flat - self.dark)
+        plugin._proj_pre_process(None, 0)
+        return plugin, plugin.correct_proj([self.data])
+
+    def expected(self, low=None, high=None):
+        """ The correction as calculated before it was applied in place. """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            data = np.nan_to_num((self.data - self.dark) /
+                                 (self.flat - self.dark))
+        if low:
+            data[data < low] = low
+        if high:
+            data[data > high] = high
+        return data
+
+    def test_correction(self):
+        plugin, result = self.correct()
+        self.assertEqual(result.dtype, np.float32)
+        np.testing.assert_allclose(result, self.expected(), rtol=1e-5)
+
+    def test_clipping(self):
+        plugin, result = self.correct(low=0.1, high=0.9)
+        self.assertEqual(result.min(), np.float32(0.1))
+        self.assertEqual(result.max(), np.float32(0.9))
+        np.testing.assert_allclose(result, self.expected(low=0.1, high=0.9),
+                                   rtol=1e-5)
+        self.assertTrue(plugin.flag_low_warning)
+        self.assertTrue(plugin.flag_high_warning)
+
+    def test_log(self):
+        plugin, result = self.correct(low=0.1, log=True)
+        np.testing.assert_allclose(
+            result, -np.log(self.expected(low=0.1) + 1), rtol=1e-5)
+
+    def test_infinite(self):
+        # a non-zero value over a zero (flat - dark) is clipped to the
+        # largest finite value
+        self.data[:, 0, 0] = self.dark[0, 0] + 1
+        plugin, result = self.correct()
+        self.assertTrue(np.all(result[:, 0, 0] == np.finfo(np.float32).max))
+
+if __name__ == "__main__":
+    unittest.main()
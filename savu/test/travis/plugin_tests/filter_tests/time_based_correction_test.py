@@ -0,0 +1,94 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: time_based_correction_test
+   :platform: Unix
+   :synopsis: unittest for the time-based dark and flat field correction
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import unittest
+import numpy as np
+
+from savu.plugins.corrections.time_based_correction import \
+    TimeBasedCorrection
+
+
+class TimeBasedCorrectionTest(unittest.TestCase):
+
+    def setUp(self):
+        # (start, end) indices of three groups of flat fields
+        self.flat_idx = [(10, 15), (50, 55), (100, 105)]
+        self.dark_idx = [(0, 5), (105, 110)]
+
+    def test_weights_before(self):
+        lower, upper, weight = \
+            TimeBasedCorrection().get_weights(self.flat_idx, [2, 9])
+        np.testing.assert_array_equal(lower, [0, 0])
+        np.testing.assert_array_equal(upper, [0, 0])
+        np.testing.assert_array_equal(weight, [0, 0])
+
+    def test_weights_between(self):
+        # the weight is 0 at the last frame of a group and increases to 1 at
+        # the first frame of the next
+        frames = [14, 30, 49, 60, 99]
+        lower, upper, weight = \
+            TimeBasedCorrection().get_weights(self.flat_idx, frames)
+        np.testing.assert_array_equal(lower, [0, 0, 0, 1, 1])
+        np.testing.assert_array_equal(upper, [1, 1, 1, 2, 2])
+        np.testing.assert_allclose(weight, [0, 16/36., 35/36., 6/46., 45/46.])
+
+    def test_weights_after(self):
+        lower, upper, weight = \
+            TimeBasedCorrection().get_weights(self.flat_idx, [105, 200])
+        np.testing.assert_array_equal(lower, [2, 2])
+        np.testing.assert_array_equal(upper, [2, 2])
+        np.testing.assert_array_equal(weight, [0, 0])
+
+    def test_nearest_frames(self):
+        frames, distance = \
+            TimeBasedCorrection().find_nearest_frames(self.flat_idx, 30)
+        self.assertEqual(list(frames), [0, 1])
+        np.testing.assert_allclose(distance, [20/36., 16/36.])
+
+    def test_process_frames(self):
+        rng = np.random.RandomState(0)
+        frames = np.array([6, 7, 30, 31, 60, 101, 120])
+        plugin = TimeBasedCorrection()
+        plugin.parameters = {'in_range': False}
+        plugin.slice_dir = 0
+        plugin.sslice = [slice(None)]*3
+        plugin.flat_idx, plugin.dark_idx = self.flat_idx, self.dark_idx
+        plugin.flat = list(rng.uniform(50, 100, (3, 4, 5)))
+        plugin.dark = list(rng.uniform(0, 10, (2, 4, 5)))
+        plugin.field_cache = {}
+        plugin._get_frames = lambda: frames
+        data = rng.uniform(0, 100, (len(frames), 4, 5))
+        result = plugin.process_frames([data])
+
+        # frame by frame
+        for i, frame in enumerate(frames):
+            flat = plugin.calculate_flat_field(
+                frame, data[i],
+                *plugin.find_nearest_frames(self.flat_idx, frame))
+            dark = plugin.calculate_dark_field(
+                *plugin.find_nearest_frames(self.dark_idx, frame))
+            np.testing.assert_allclose(
+                result[i], (data[i] - dark)/(flat - dark), rtol=1e-5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -21,10 +21,196 @@
 
 """
 
+import os
+import sys
+import math
 import unittest
+import subprocess
+import numpy as np
+import scipy.ndimage as ndi
+from mpi4py import MPI
+from distutils.spawn import find_executable
+
 from savu.test import test_utils as tu
+from savu.data.meta_data import MetaData
 from savu.test.travis.framework_tests.plugin_runner_test import \
     run_protected_plugin_runner
+from savu.plugins.centering.vo_centering import VoCentering
+
+
+def get_plugin(**kwargs):
+    """ Get a VoCentering plugin that is ready to search a sinogram. """
+    plugin = VoCentering()
+    plugin.parameters = {'ratio': 2.0, 'row_drop': 20, 'search_radius': 3,
+                         'step': 0.2, 'start_pixel': None,
+                         'search_area': (-50, 50), 'fit_order': 0,
+                         'outlier_threshold': 3.0}
+    plugin.parameters.update(kwargs)
+    plugin.mask_cache, plugin.fft_cache, plugin.fft_threads = {}, {}, 1
+    plugin.get_in_meta_data = lambda: [{}]
+    return plugin
+
+
+class DummyExperiment(object):
+
+    def __init__(self, mpi):
+        self.meta_data = MetaData()
+        self.meta_data.set('mpi', mpi)
+
+
+class DummyDataset(object):
+
+    def __init__(self, data):
+        self.data = data
+
+    def get_data_dimension_by_axis_label(self, label):
+        return {'rotation_angle': 0, 'detector_y': 1, 'detector_x': 2}[label]
+
+
+def get_frame_info(n_rows=12, tilt=0.0, seed=0):
+    """ The position, centre and sharpness of each sinogram, with the centre
+    varying linearly with the detector row. """
+    rng = np.random.RandomState(seed)
+    rows = np.arange(n_rows)
+    cor = 80.0 + tilt*rows + rng.normal(0, 0.05, n_rows)
+    sharpness = rng.uniform(0.4, 0.6, n_rows)
+    return [([r], c, s) for r, c, s in zip(rows, cor, sharpness)]
+
+
+def process_frames(plugin, frame_info):
+    """ Record the frame information with VoCentering.process_frames, with
+    the searches replaced by the centre and a coarse metric of the required
+    sharpness. """
+    plugin.frame_info = {}
+    for position, cor, sharpness in frame_info:
+        sl = [slice(None), slice(position[0], position[0] + 1), slice(None)]
+        plugin.get_current_slice_list = lambda sl=sl: [sl]
+        plugin._coarse_search = \
+            lambda sino, c=cor, s=sharpness: (c, np.array([1 - s, 1, 1]))
+        plugin._fine_search = lambda sino, raw_cor: (raw_cor, None)
+        plugin.process_frames([np.zeros((5, 7), dtype=np.float32)])
+
+
+def post_process(frame_info, n_rows=12, mpi=False, **kwargs):
+    """ Run the VoCentering post_process on the frame information, for
+    sinograms of a (91, n_rows, 160) dataset, and return the meta data. """
+    plugin = get_plugin(datasets_to_populate=[], **kwargs)
+    plugin.exp = DummyExperiment(mpi)
+    meta_data = MetaData()
+    plugin.get_in_meta_data = lambda: [meta_data]
+    plugin.slice_dirs = (1,)
+    plugin.orig_full_shape = (91, n_rows, 160)
+    plugin.orig_shape = (n_rows, 1)
+    process_frames(plugin, frame_info)
+    cor_raw = np.array([[c] for p, c, s in frame_info])
+    out_data = [DummyDataset(cor_raw), DummyDataset(np.zeros((n_rows, 1)))]
+    plugin.get_in_datasets = lambda: [DummyDataset(None)]
+    plugin.get_datasets = lambda: ([DummyDataset(None)], out_data)
+    plugin.post_process()
+    np.testing.assert_array_equal(out_data[1].data[:, 0],
+                                  meta_data.get('centre_of_rotation'))
+    return meta_data
+
+
+def post_process_mpi():
+    """ Share the frames between the processes and check that post_process
+    gives the result of a single process (run with mpirun). """
+    rank, size = MPI.COMM_WORLD.rank, MPI.COMM_WORLD.size
+    frame_info = get_frame_info(tilt=0.3)
+    frame_info[5] = ([5], 95.0, 0.5)
+    frames = frame_info[rank::size]
+    # the final transfer block of the last process is padded
+    if rank == size - 1:
+        frames += [frames[-1]]*2
+    meta_data = post_process(frames, mpi=True, fit_order=1)
+    expected = post_process(frame_info, fit_order=1)
+    for key in ['centre_of_rotation', 'cor_error']:
+        np.testing.assert_allclose(meta_data.get(key), expected.get(key))
+    np.testing.assert_array_equal(meta_data.get('cor_inliers'),
+                                  expected.get('cor_inliers'))
+
+
+def get_sinogram(centre, nAngles=181, nCols=160):
+    """ A sinogram of three gaussian blobs rotating about centre. """
+    theta = np.linspace(0, np.pi, nAngles)[:, None]
+    cols = np.arange(nCols)[None, :]
+    sino = np.zeros((nAngles, nCols), dtype=np.float32)
+    for radius, phase, width in [(20, 0.3, 6), (35, 2.0, 4), (0, 0, 10)]:
+        pos = centre + radius*np.cos(theta + phase)
+        sino += np.exp(-((cols - pos)/width)**2)
+    return sino
+
+
+def old_create_mask(params, Nrow, Ncol, obj_radius):
+    """ The mask of the previous implementation, created row by row. """
+    du = 1.0/Ncol
+    dv = (Nrow-1.0)/(Nrow*2.0*math.pi)
+    cen_row = int(np.ceil(Nrow/2)-1)
+    cen_col = int(np.ceil(Ncol/2)-1)
+    drop = params['row_drop']
+    mask = np.zeros((Nrow, Ncol), dtype=np.float32)
+    for i in range(Nrow):
+        num1 = np.round(((i-cen_row)*dv/obj_radius)/du)
+        p1, p2 = (np.clip(np.sort((-num1+cen_col, num1+cen_col)),
+                          0, Ncol-1)).astype(int)
+        mask[i, p1:p2+1] = np.ones(p2-p1+1, dtype=np.float32)
+    if drop < cen_row:
+        mask[cen_row-drop:cen_row+drop+1, :] = 0
+    mask[:, cen_col-1:cen_col+2] = 0
+    return mask
+
+
+def old_coarse_search(params, sino):
+    """ The previous coarse search, with one 2D FFT for each shift. """
+    smin, smax = params['search_area']
+    (Nrow, Ncol) = sino.shape
+    centre_fliplr = (Ncol - 1.0)/2.0
+    sino2 = np.fliplr(sino[1:])
+    compensateimage = np.zeros((Nrow-1, Ncol), dtype=np.float32)
+    compensateimage[:] = sino[-1]
+    list_shift = np.arange(smin, smax + 1)*2
+    list_metric = np.zeros(len(list_shift), dtype=np.float32)
+    mask = old_create_mask(params, 2*Nrow-1, Ncol, 0.5*params['ratio']*Ncol)
+    for count, i in enumerate(list_shift):
+        sino2a = np.roll(sino2, i, axis=1)
+        if i >= 0:
+            sino2a[:, 0:i] = compensateimage[:, 0:i]
+        else:
+            sino2a[:, i:] = compensateimage[:, i:]
+        list_metric[count] = np.sum(np.abs(np.fft.fftshift(
+            np.fft.fft2(np.vstack((sino, sino2a)))))*mask)
+    minpos = np.argmin(list_metric)
+    return centre_fliplr + list_shift[minpos]/2.0, list_metric
+
+
+def old_fine_search(params, sino, raw_cor, prefilter=False):
+    """ The previous fine search, with sinograms shifted by spline
+    interpolation (which blurs the sinogram unless prefilter is True). """
+    (Nrow, Ncol) = sino.shape
+    centerfliplr = (Ncol + 1.0)/2.0-1.0
+    shiftsino = np.int16(2*(raw_cor-centerfliplr))
+    sino2 = np.roll(np.fliplr(sino[1:]), shiftsino, axis=1)
+    search_rad = params['search_radius']
+    if raw_cor <= centerfliplr:
+        lefttake = int(np.ceil(search_rad+1))
+        righttake = int(np.floor(2*raw_cor-search_rad-1))
+    else:
+        lefttake = int(np.ceil(raw_cor-(Ncol-1-raw_cor)+search_rad+1))
+        righttake = int(np.floor(Ncol-1-search_rad-1))
+    Ncol1 = righttake - lefttake + 1
+    mask = old_create_mask(params, 2*Nrow-1, Ncol1, 0.5*params['ratio']*Ncol)
+    numshift = np.int16((2*search_rad)/params['step'])+1
+    listshift = np.linspace(-search_rad, search_rad, num=numshift)
+    listmetric = np.zeros(len(listshift), dtype=np.float32)
+    factor1 = np.mean(sino[-1, lefttake:righttake])
+    for num1, i in enumerate(listshift):
+        sino2a = ndi.interpolation.shift(sino2, (0, i), prefilter=prefilter)
+        factor2 = np.mean(sino2a[0, lefttake:righttake])
+        sinojoin = np.vstack((sino, sino2a*factor1/factor2))
+        listmetric[num1] = np.sum(np.abs(np.fft.fftshift(
+            np.fft.fft2(sinojoin[:, lefttake:righttake + 1])))*mask)
+    minpos = np.argmin(listmetric)
+    return raw_cor + listshift[minpos]/2.0, listmetric
 
 
 class VoCenterTest(unittest.TestCase):
@@ -57,5 +243,144 @@ class VoCenterTest(unittest.TestCase):
         run_protected_plugin_runner(tu.set_options(data_file,
                                                    process_file=process_file))
 
+
+class VoCenteringSearchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.plugin = get_plugin()
+
+    def test_mask(self):
+        for shape in [(359, 160), (360, 161), (101, 50)]:
+            np.testing.assert_array_equal(
+                self.plugin._create_mask(shape[0], shape[1], 80),
+                old_create_mask(self.plugin.parameters, shape[0], shape[1],
+                                80))
+
+    def test_weights(self):
+        # the metric of the real FFT with the weights is the metric of the
+        # full FFT with the mask
+        rng = np.random.RandomState(0)
+        for shape in [(21, 31), (20, 30), (21, 30)]:
+            sino = rng.rand(*shape).astype(np.float32)
+            mask = self.plugin._create_mask(shape[0], shape[1], 10.0)
+            expected = np.sum(np.abs(np.fft.fftshift(np.fft.fft2(sino)))*mask)
+            weights = self.plugin._get_weights(shape[0], shape[1], 10.0)
+            self.assertAlmostEqual(
+                np.sum(np.abs(np.fft.rfft2(sino))*weights)/expected, 1.0,
+                places=5)
+
+    def test_coarse_search(self):
+        for centre in [83.3, 74.6]:
+            sino = get_sinogram(centre)
+            cor, metric = self.plugin._coarse_search(sino)
+            old_cor, old_metric = \
+                old_coarse_search(self.plugin.parameters, sino)
+            self.assertEqual(cor, old_cor)
+            np.testing.assert_allclose(metric, old_metric, rtol=1e-4)
+            self.assertLessEqual(abs(cor - centre), 0.5)
+
+    def test_batches(self):
+        # the candidates are transformed a few at a time
+        sino = get_sinogram(83.3)
+        cor, metric = self.plugin._coarse_search(sino)
+        self.plugin.batch_bytes = 7*sino.nbytes
+        batch_cor, batch_metric = self.plugin._coarse_search(sino)
+        self.assertEqual(batch_cor, cor)
+        np.testing.assert_allclose(batch_metric, metric, rtol=1e-5)
+
+    def test_fine_search(self):
+        # the sub-pixel shifts are now exact, rather than blurred by the
+        # spline interpolation, which can move the centre by a single step
+        params = self.plugin.parameters
+        for centre in [83.3, 74.6, 81.17]:
+            sino = get_sinogram(centre)
+            raw_cor = self.plugin._coarse_search(sino)[0]
+            cor = self.plugin._fine_search(sino, raw_cor)[0]
+            old_cor = old_fine_search(params, sino, raw_cor)[0]
+            self.assertLessEqual(abs(cor - old_cor), params['step']/2 + 1e-6)
+            old_cor = \
+                old_fine_search(params, sino, raw_cor, prefilter=True)[0]
+            self.assertAlmostEqual(cor, old_cor)
+            self.assertLessEqual(abs(cor - centre), params['step'])
+
+
+class VoCenteringFitTest(unittest.TestCase):
+
+    def test_outlier(self):
+        frame_info = get_frame_info()
+        frame_info[5] = ([5], 95.0, 0.5)
+        meta_data = post_process(frame_info)
+        inliers = meta_data.get('cor_inliers')
+        np.testing.assert_array_equal(np.nonzero(~inliers)[0], [5])
+        cor = np.array([c for p, c, s in frame_info])
+        np.testing.assert_allclose(meta_data.get('centre_of_rotation'),
+                                   np.mean(cor[inliers]), atol=0.01)
+        self.assertTrue(np.all(meta_data.get('cor_error') < 0.05))
+
+    def test_flat_metric(self):
+        # a frame with a flat metric curve is rejected
+        frame_info = get_frame_info()
+        frame_info[3] = ([3], 80.3, 0.0)
+        inliers = post_process(frame_info).get('cor_inliers')
+        np.testing.assert_array_equal(np.nonzero(~inliers)[0], [3])
+
+    def test_fit_order(self):
+        # a tilted rotation axis is followed by a first order fit
+        frame_info = get_frame_info(tilt=0.3)
+        rows = np.arange(12)
+        meta_data = post_process(frame_info, fit_order=1)
+        self.assertTrue(np.all(meta_data.get('cor_inliers')))
+        np.testing.assert_allclose(meta_data.get('centre_of_rotation'),
+                                   80.0 + 0.3*rows, atol=0.1)
+        # the constant fit is the weighted mean
+        meta_data = post_process(frame_info, fit_order=0)
+        self.assertTrue(np.all(meta_data.get('cor_inliers')))
+        cor, sharpness = np.array([(c, s) for p, c, s in frame_info]).T
+        np.testing.assert_allclose(meta_data.get('centre_of_rotation'),
+                                   np.average(cor, weights=sharpness + 1e-6))
+
+    def test_fit_all_rows(self):
+        # the fit is evaluated at every row, including the rows that were
+        # not processed
+        frame_info = get_frame_info(tilt=-0.2)[::3]
+        meta_data = post_process(frame_info, fit_order=1)
+        rows, cor, sharpness = \
+            np.array([(p[0], c, s) for p, c, s in frame_info]).T
+        coeffs = np.polyfit(rows, cor, 1, w=np.sqrt(sharpness + 1e-6))
+        np.testing.assert_allclose(meta_data.get('centre_of_rotation'),
+                                   np.polyval(coeffs, np.arange(12)))
+        self.assertEqual(len(meta_data.get('cor_error')), 12)
+
+    def test_outlier_threshold(self):
+        frame_info = get_frame_info()
+        frame_info[7] = ([7], 81.0, 0.5)
+        inliers = post_process(frame_info).get('cor_inliers')
+        self.assertFalse(inliers[7])
+        inliers = post_process(frame_info, outlier_threshold=50.0).get(
+            'cor_inliers')
+        self.assertTrue(np.all(inliers))
+
+    def test_padded_block(self):
+        # the frames that pad the final transfer block repeat the final
+        # slice, which must not add weight to the final row
+        frame_info = get_frame_info()
+        frame_info[-1] = ([11], 80.6, 0.6)
+        padded = post_process(frame_info + [frame_info[-1]]*6)
+        expected = post_process(frame_info)
+        self.assertFalse(expected.get('cor_inliers')[-1])
+        for key in ['centre_of_rotation', 'cor_error', 'cor_inliers',
+                    'cor_sharpness']:
+            np.testing.assert_array_equal(padded.get(key), expected.get(key))
+
+    def test_post_process_mpi(self):
+        if find_executable('mpirun') is None:
+            self.skipTest("mpirun is not available.")
+        cmd = ['mpirun', '-np', '2', sys.executable,
+               os.path.abspath(__file__.replace('.pyc', '.py')), 'fit']
+        self.assertEqual(subprocess.call(cmd), 0)
+
 if __name__ == "__main__":
-    unittest.main()
+    if sys.argv[1:2] == ['fit']:
+        post_process_mpi()
+    else:
+        unittest.main()
@@ -0,0 +1,120 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: random_hdf5_loader_test
+   :platform: Unix
+   :synopsis: Test that the random hdf5 loader data does not depend on the \
+       chunking or the number of processes.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import sys
+import h5py
+import tempfile
+import unittest
+import subprocess
+import numpy as np
+from mpi4py import MPI
+from distutils.spawn import find_executable
+
+from savu.test import test_utils as tu
+from savu.plugins.loaders.random_hdf5_loader import RandomHdf5Loader
+
+# a small block size, so the data is generated in many blocks
+block_size = 100
+
+
+def load(out_path, params, **kwargs):
+    """ Create the random dataset in out_path and return its values. """
+    options = tu.set_options(tu.get_test_data_path('24737.nxs'),
+                             out_path=out_path, **kwargs)
+    options['loader'] = 'savu.plugins.loaders.random_hdf5_loader'
+    params = dict({'size': [12, 10, 8], 'patterns': [
+        'SINOGRAM.0c.1s.2c', 'PROJECTION.0s.1c.2c'], 'axis_labels': [
+        'rotation_angle.degrees', 'detector_y.pixel', 'detector_x.pixel']},
+        **params)
+    tu._add_loader_to_plugin_list(options, params=params)
+    RandomHdf5Loader.block_size = block_size
+    tu.plugin_runner(options)
+    with h5py.File(os.path.join(out_path, 'input_array.h5'), 'r') as f:
+        return f['test'][...]
+
+
+def load_mpi(out_path):
+    """ Create the dataset with every process (run with mpirun). """
+    names = ','.join('CPU%i' % i for i in range(MPI.COMM_WORLD.size))
+    load(out_path, {'seed': 3}, process_names=names)
+
+
+class RandomHdf5LoaderTest(unittest.TestCase):
+
+    def tearDown(self):
+        RandomHdf5Loader.block_size = 2**22
+
+    def load(self, params, **kwargs):
+        return load(tempfile.mkdtemp(), params, **kwargs)
+
+    def test_blocks(self):
+        loader = RandomHdf5Loader()
+        loader.block_size = block_size
+        get_blocks = loader._RandomHdf5Loader__get_blocks
+        for shape in [(12, 10, 8), (3, 4, 120), (5, 7, 3, 11)]:
+            covered = np.zeros(shape, dtype=int)
+            for sl in get_blocks(shape):
+                self.assertLessEqual(covered[sl].size, block_size)
+                covered[sl] += 1
+            np.testing.assert_array_equal(covered, 1)
+
+    def test_seed(self):
+        data = self.load({'seed': 1})
+        np.testing.assert_array_equal(self.load({'seed': 1}), data)
+        self.assertFalse(np.array_equal(self.load({'seed': 2}), data))
+
+    def test_pattern(self):
+        # the chunks are calculated for the pattern, but the data is not
+        # affected by them
+        sino = self.load({'pattern': 'SINOGRAM'})
+        proj = self.load({'pattern': 'PROJECTION'})
+        np.testing.assert_array_equal(sino, proj)
+
+    def test_phantom(self):
+        params = {'generator': 'phantom', 'range': [10, 1000]}
+        sino = self.load(dict(params, pattern='SINOGRAM'))
+        proj = self.load(dict(params, pattern='PROJECTION'))
+        np.testing.assert_array_equal(sino, proj)
+
+    def test_processes(self):
+        if find_executable('mpirun') is None:
+            self.skipTest("mpirun is not available.")
+        if not h5py.get_config().mpi:
+            self.skipTest("h5py is not built with parallel hdf5.")
+        out_path = tempfile.mkdtemp()
+        cmd = ['mpirun', '-np', '2', sys.executable,
+               os.path.abspath(__file__.replace('.pyc', '.py')), 'load',
+               out_path]
+        self.assertEqual(subprocess.call(cmd), 0)
+        with h5py.File(os.path.join(out_path, 'input_array.h5'), 'r') as f:
+            data = f['test'][...]
+        expected = self.load({'seed': 3})
+        np.testing.assert_array_equal(data, expected)
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['load']:
+        load_mpi(sys.argv[2])
+    else:
+        unittest.main()
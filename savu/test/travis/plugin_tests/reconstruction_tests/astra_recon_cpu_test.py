@@ -24,9 +24,53 @@
 """
 
 import unittest
+import numpy as np
+
 import savu.test.test_utils as tu
 from savu.test.travis.framework_tests.plugin_runner_test import \
     run_protected_plugin_runner_no_process_list
+from savu.plugins.reconstructions.astra_recons.astra_recon_cpu import \
+    AstraReconCpu
+
+
+class DummyPluginData(object):
+
+    def __init__(self, shape):
+        self.shape = shape
+
+    def get_shape(self):
+        return self.shape
+
+    def get_data_dimension_by_axis_label(self, label, contains=False):
+        return {'rot': 0, 'x': 1}[label]
+
+
+def get_disc_sinogram(angles, nDet, cor, radius, offset):
+    """ A sinogram (angles, detector) of a disc of unit attenuation, offset
+    from the centre of rotation. """
+    theta = np.deg2rad(angles)[:, None]
+    t = np.arange(nDet)[None, :] - (cor + offset*np.cos(theta))
+    return (2*np.sqrt(np.clip(radius**2 - t**2, 0, None))).astype(np.float32)
+
+
+def get_plugin(alg, sino_shape):
+    """ An AstraReconCpu plugin, ready to process sinograms of sino_shape
+    (angles, detector). """
+    plugin = AstraReconCpu()
+    plugin.parameters = {'reconstruction_type': alg, 'n_iterations': 10,
+                         'sino_pad': False, 'FBP_filter': 'ram-lak',
+                         'projector': 'line'}
+    plugin.sino_pad = 0
+    plugin.get_plugin_in_datasets = lambda: [DummyPluginData(sino_shape)]
+    plugin.pre_process()
+    return plugin
+
+
+def reconstruct(plugin, sino, cor, angles):
+    vol_shape = (sino.shape[1], sino.shape[1])
+    plugin.get_frame_params = \
+        lambda: [np.array([cor]), angles, vol_shape, None]
+    return plugin.process_frames([sino])
 
 
 class AstraReconCPUTest(unittest.TestCase):
@@ -41,5 +85,48 @@ class AstraReconCPUTest(unittest.TestCase):
         plugin = 'savu.plugins.reconstructions.astra_recons.astra_recon_cpu'
         run_protected_plugin_runner_no_process_list(options, plugin)
 
+    def __run_threads(self, alg, nThreads):
+        options = tu.set_experiment('tomo')
+        options['threads'] = nThreads
+        plugin = 'savu.plugins.reconstructions.astra_recons.astra_recon_cpu'
+        plugin_dict = dict(tu.set_data_dict(['tomo'], ['test0']),
+                           reconstruction_type=alg, n_iterations=5)
+        exp = run_protected_plugin_runner_no_process_list(
+            options, plugin, data=[{}, plugin_dict, {}])
+        return tu.get_final_results(exp)
+
+    def test_astra_recon_cpu_threads(self):
+        # each thread reconstructs a different set of sinograms, which must
+        # not change the result of the iterative algorithms
+        for alg in ['FBP', 'SIRT', 'CGLS', 'SART']:
+            serial = self.__run_threads(alg, 1)
+            threaded = self.__run_threads(alg, 4)
+            self.assertTrue(serial)
+            self.assertEqual(sorted(serial.keys()), sorted(threaded.keys()))
+            for name in serial.keys():
+                np.testing.assert_array_equal(
+                    serial[name], threaded[name], err_msg=alg)
+
+
+class AstraObjectsTest(unittest.TestCase):
+
+    def test_reused_objects(self):
+        # the sinograms reconstructed by a single plugin, which reuses its
+        # astra objects, match those reconstructed with new objects
+        angles = np.linspace(0, 180, 40, endpoint=False)
+        frames = [(23.5, 10, 6), (23.5, 16, -4), (25.0, 12, 3)]
+        sinos = [get_disc_sinogram(angles, 48, *f) for f in frames]
+        for alg in ['FBP', 'SIRT', 'SART', 'ART', 'CGLS', 'BP']:
+            cached = get_plugin(alg, sinos[0].shape)
+            for sino, frame in zip(sinos, frames):
+                fresh = get_plugin(alg, sino.shape)
+                expected = reconstruct(fresh, sino, frame[0], angles)
+                fresh.post_process()
+                result = reconstruct(cached, sino, frame[0], angles)
+                np.testing.assert_array_equal(result, expected, err_msg=alg)
+            self.assertEqual(len(cached.astra_ids), 1)
+            cached.post_process()
+            self.assertFalse(cached.astra_ids)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,151 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. module:: simple_recon_test
+   :platform: Unix
+   :synopsis: Test the vectorised filtered back-projection of SimpleRecon.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import unittest
+import numpy as np
+
+from savu.plugins.reconstructions.simple_recon import SimpleRecon
+
+
+def get_disc_sinograms(angles, nDet, cors, radius=16, offset=6):
+    """ Sinograms (angles, slices, detector) of a disc of unit attenuation,
+    offset from the centre of rotation, with a centre for each slice. """
+    theta = np.deg2rad(angles)[:, None]
+    det = np.arange(nDet)[None, :]
+    sinograms = []
+    for cor in cors:
+        t = det - (cor + offset*np.cos(theta))
+        sinograms.append(2*np.sqrt(np.clip(radius**2 - t**2, 0, None)))
+    return np.stack(sinograms, axis=1).astype(np.float32)
+
+
+def get_disc(nRows, nCols, radius=16, offset=6):
+    y, x = np.mgrid[:nRows, :nCols]
+    x, y = x - nCols//2, y - nRows//2
+    return ((x - offset)**2 + y**2 < radius**2).astype(np.float32)
+
+
+def loop_fbp(sino, cor, angles, vol_shape):
+    """ A filtered back-projection of a single sinogram, one angle at a time,
+    with the Ram-Lak filter applied as a convolution in real space. """
+    nAngles, nDet = sino.shape
+    n = np.arange(-(nDet - 1), nDet)
+    h = np.zeros(len(n))
+    h[n == 0] = 0.25
+    odd = n % 2 == 1
+    h[odd] = -1.0/(np.pi*n[odd])**2
+    y, x = np.mgrid[:vol_shape[0], :vol_shape[1]]
+    x, y = x - vol_shape[1]//2, y - vol_shape[0]//2
+    det = np.arange(-1, nDet + 1)
+    result = np.zeros(vol_shape)
+    for i, theta in enumerate(np.deg2rad(angles)):
+        filtered = np.convolve(sino[i], h)[nDet - 1:2*nDet - 1]
+        padded = np.concatenate(([0], filtered, [0]))
+        t = x*np.cos(theta) - y*np.sin(theta) + cor
+        result += np.interp(t, det, padded, left=0, right=0)
+    return result*np.pi/nAngles
+
+
+def previous_process_frames(sino, cor, vol_shape):
+    """ The previous SimpleRecon.process_frames for a single sinogram. """
+    def _filter(sinogram):
+        ff = np.arange(sinogram.shape[0])
+        ff -= sinogram.shape[0]//2
+        ff = np.abs(ff)
+        return np.fft.ifft(np.fft.fft(sinogram)*ff).real
+
+    def _mapping_array(shape, center, theta):
+        x, y = np.meshgrid(np.arange(-center[0], shape[0] - center[0]),
+                           np.arange(-center[1], shape[1] - center[1]))
+        return x*np.cos(theta) - y*np.sin(theta)
+
+    centre = (vol_shape[0]//2, vol_shape[1]//2)
+    nAngles, nDet = sino.shape
+    result = np.zeros(vol_shape, dtype=np.float32)
+    for i in range(nAngles):
+        theta = i*(np.pi/nAngles)
+        mapping_array = _mapping_array(vol_shape, centre, theta)
+        filt = np.zeros(nDet*3, dtype=np.float32)
+        filt[nDet:nDet*2] = _filter(np.log(np.nan_to_num(sino[i])+1))
+        result += filt[(mapping_array + cor + nDet).astype('int')]
+    return result
+
+
+class SimpleReconTest(unittest.TestCase):
+
+    def setUp(self):
+        self.angles = np.linspace(0, 180, 90, endpoint=False)
+        self.nDet, self.vol_shape = 70, (64, 64)
+        self.cors = [35.3, 33.0, 35.3]
+        self.sino = get_disc_sinograms(self.angles, self.nDet, self.cors)
+
+    def recon(self, sino, cors, map_bytes=None):
+        plugin = SimpleRecon()
+        if map_bytes is not None:
+            plugin.map_bytes = map_bytes
+        plugin.pre_process()
+        vol_shape = (self.vol_shape[0], len(cors), self.vol_shape[1])
+        plugin.get_frame_params = \
+            lambda: [np.array(cors), self.angles, vol_shape, None]
+        return plugin.process_frames([sino])
+
+    def test_multiple_frames(self):
+        self.assertEqual(SimpleRecon().get_max_frames(), 'multiple')
+        result = self.recon(self.sino, self.cors)
+        self.assertEqual(result.shape, (64, 3, 64))
+        for i, cor in enumerate(self.cors):
+            single = self.recon(self.sino[:, i], [cor])
+            self.assertEqual(single.shape, self.vol_shape)
+            np.testing.assert_allclose(result[:, i], single, rtol=1e-5,
+                                       atol=1e-5)
+
+    def test_loop(self):
+        result = self.recon(self.sino, self.cors)
+        for i, cor in enumerate(self.cors):
+            expected = \
+                loop_fbp(self.sino[:, i], cor, self.angles, self.vol_shape)
+            np.testing.assert_allclose(result[:, i], expected, rtol=1e-4,
+                                       atol=1e-4)
+
+    def test_uncached_maps(self):
+        np.testing.assert_allclose(
+            self.recon(self.sino, self.cors, map_bytes=0),
+            self.recon(self.sino, self.cors), rtol=1e-5, atol=1e-5)
+
+    def test_previous(self):
+        # the previous output was scaled by its filter and the log of the
+        # data, so the reconstructions are compared by their correlation
+        disc = get_disc(*self.vol_shape)
+        corr = lambda a, b: np.corrcoef(a.ravel(), b.ravel())[0, 1]
+        for i, cor in enumerate(self.cors):
+            result = self.recon(self.sino[:, i], [cor])
+            previous = \
+                previous_process_frames(self.sino[:, i], cor, self.vol_shape)
+            self.assertGreater(corr(result, previous), 0.8)
+            self.assertGreater(corr(result, disc), corr(previous, disc))
+            self.assertGreater(corr(result, disc), 0.95)
+            inside = get_disc(*self.vol_shape, radius=13) > 0
+            self.assertAlmostEqual(np.mean(result[inside]), 1.0, places=2)
+
+if __name__ == "__main__":
+    unittest.main()
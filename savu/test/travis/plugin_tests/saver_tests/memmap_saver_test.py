@@ -0,0 +1,119 @@
+# Copyright 2014 Diamond Light Source Ltd.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+.. module:: memmap_saver_test
+   :platform: Unix
+   :synopsis: Load raw binary data and save it to raw binary and MRC files.
+
+.. moduleauthor:: Nicola Wadeson <scientificsoftware@diamond.ac.uk>
+
+"""
+
+import os
+import sys
+import glob
+import h5py
+import tempfile
+import unittest
+import subprocess
+import numpy as np
+from mpi4py import MPI
+from distutils.spawn import find_executable
+
+from savu.test import test_utils as tu
+from savu.test.travis.framework_tests.plugin_runner_test import \
+    run_protected_plugin_runner_no_process_list
+from savu.data.data_structures.data_types.mrc import MRC
+
+
+def create_data(shape, byte_order='little'):
+    data = np.random.rand(*shape).astype(np.float32)
+    dtype = data.dtype.newbyteorder('<' if byte_order == 'little' else '>')
+    data_file = os.path.join(tempfile.mkdtemp(), 'data.raw')
+    data.astype(dtype).tofile(data_file)
+    return data, data_file
+
+
+def run_saver(data_file, shape, saver_dict, byte_order='little', **kwargs):
+    options = tu.set_options(data_file, **kwargs)
+    options['loader'] = \
+        'savu.plugins.loaders.full_field_loaders.raw_binary_loader'
+    plugins = ['savu.plugins.basic_operations.no_process_plugin',
+               'savu.plugins.savers.memmap_saver']
+    loader_dict = {'shape': list(shape), 'dtype': 'float32',
+                   'byte_order': byte_order}
+    data_dict = tu.set_data_dict(['tomo'], ['tomo'])
+    saver_dict = dict({'in_datasets': ['tomo']}, **saver_dict)
+    run_protected_plugin_runner_no_process_list(
+        options, plugins, data=[loader_dict, data_dict, saver_dict, {}])
+    ext = '.mrc' if saver_dict.get('format') == 'mrc' else '.raw'
+    return glob.glob(os.path.join(options['out_path'], '*' + ext))
+
+
+def run_saver_mpi(data_file, out_path, shape):
+    """ Save the data with every process (run with mpirun). """
+    names = ','.join('CPU%i' % i for i in range(MPI.COMM_WORLD.size))
+    run_saver(data_file, shape, {'pattern': 'PROJECTION'},
+              out_path=out_path, process_names=names)
+
+
+class MemmapSaverTest(unittest.TestCase):
+
+    def __run(self, saver_dict, byte_order='little', shape=(10, 12, 14)):
+        data, data_file = create_data(shape, byte_order)
+        return data, run_saver(data_file, shape, saver_dict, byte_order)
+
+    def __check_raw(self, data, files):
+        self.assertEqual(len(files), 1)
+        saved = np.fromfile(files[0], dtype='<f4').reshape(data.shape)
+        np.testing.assert_array_equal(saved, data)
+
+    def test_raw(self):
+        data, files = self.__run({'format': 'raw'}, byte_order='big')
+        self.__check_raw(data, files)
+
+    def test_raw_multiple_transfers(self):
+        # 70 projections are transferred 14 at a time
+        data, files = self.__run({'pattern': 'PROJECTION'}, shape=(70, 6, 8))
+        self.__check_raw(data, files)
+
+    def test_raw_mpi(self):
+        if find_executable('mpirun') is None:
+            self.skipTest("mpirun is not available.")
+        if not h5py.get_config().mpi:
+            self.skipTest("h5py is not built with parallel hdf5.")
+        shape = (70, 6, 8)
+        data, data_file = create_data(shape)
+        out_path = tempfile.mkdtemp()
+        cmd = ['mpirun', '-np', '2', sys.executable,
+               os.path.abspath(__file__.replace('.pyc', '.py')), 'save',
+               data_file, out_path] + [str(s) for s in shape]
+        self.assertEqual(subprocess.call(cmd), 0)
+        self.__check_raw(data, glob.glob(os.path.join(out_path, '*.raw')))
+
+    def test_mrc(self):
+        data, files = self.__run({'format': 'mrc'})
+        self.assertEqual(len(files), 1)
+        saved = MRC(None, files[0])
+        self.assertEqual(saved.get_shape(), data.shape)
+        np.testing.assert_array_equal(saved[[slice(None)]*3], data)
+        self.assertAlmostEqual(saved.header_dict['amax'], data.max())
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['save']:
+        run_saver_mpi(sys.argv[2], sys.argv[3], map(int, sys.argv[4:]))
+    else:
+        unittest.main()
@@ -54,6 +54,32 @@ def __option_parser():
                         default=False)
     parser.add_argument("-q", "--quiet", action="store_true", dest="quiet",
                         help="Display only Errors and Info.", default=False)
+    pipe_help = "Overlap file transfers with processing, using this number "\
+        "of in-flight transfer buffers (0 to disable)."
+    parser.add_argument("--pipeline", help=pipe_help, type=int, default=0)
+    cache_help = "The hdf5 chunk cache size in MB, used to optimise the "\
+        "chunking of output datasets (default 1)."
+    parser.add_argument("--chunk_cache", help=cache_help, type=float,
+                        default=1)
+    comp_help = "Compress the %s datasets: none, lzf, gzip or "\
+        "gzip:<level> (default none)."
+    parser.add_argument("--compress_final", default='none',
+                        help=comp_help % 'final result')
+    parser.add_argument("--compress_inter", default='none',
+                        help=comp_help % 'intermediate')
+    mem_help = "Hold intermediate datasets in memory, up to this total "\
+        "size in GB, rather than writing them to file (default 0)."
+    parser.add_argument("--memory", help=mem_help, type=float, default=0)
+    thread_help = "The number of threads used by each process to run "\
+        "thread-safe plugins (default 1)."
+    parser.add_argument("--threads", help=thread_help, type=int, default=1)
+    prec_help = "Limit floating point datasets to this precision: auto, "\
+        "float32 or float16 (default auto)."
+    parser.add_argument("--precision", help=prec_help, default='auto',
+                        choices=['auto', 'float32', 'float16'])
+    setup_help = "Cache the plugin list check in this folder, so that "\
+        "repeat runs with the same configuration skip it."
+    parser.add_argument("--setup_cache", help=setup_help, default=None)
 
     # Hidden arguments
     # process names
@@ -87,6 +113,14 @@ def _set_options(args):
     options['process_names'] = args.names
     options['verbose'] = args.verbose
     options['quiet'] = args.quiet
+    options['pipeline'] = args.pipeline
+    options['chunk_cache'] = int(args.chunk_cache*1e6)
+    options['compression'] = {'final_result': args.compress_final,
+                              'intermediate': args.compress_inter}
+    options['memory_budget'] = int(args.memory*1e9)
+    options['threads'] = args.threads
+    options['precision'] = args.precision
+    options['setup_cache'] = args.setup_cache
     options['cluster'] = args.cluster
     options['syslog_server'] = args.syslog
     options['syslog_port'] = args.syslog_port